@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   9b7c41e8-ca9d-11f1-8d15-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Compare loading and rendering the reports of many vehicles one after the
+other on a synchronous session with the asyncio access layer (aio.py),
+which loads the vehicles concurrently and renders each report as soon
+as it is ready. Both load the same per vehicle statements (the vehicle,
+`queries.vehicle_report` and `queries.vehicle_report_summary`) and the
+results are checked for equality.
+
+Requires the optional `async` dependencies (aiosqlite).
+
+# Usage
+
+$ python benchmarks/bench_async.py
+$ python benchmarks/bench_async.py --vehicles=16 --concurrency=8
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import asyncio
+import tempfile
+import time
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+import pandas as pd
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session, select_vehicle_by_id
+from fuel_tracker.writer import BulkWriter
+from fuel_tracker.queries import vehicle_report, vehicle_report_summary
+from fuel_tracker import aio
+
+from bench_bulk_writer import make_fleet
+
+# -------------
+
+
+def render(vehicle, report, summary) -> str:
+    """
+    Format the report the way `ft report show` does.
+    """
+
+    return "\n".join(
+        [
+            str(vehicle),
+            report.to_markdown(tablefmt="pretty"),
+            summary.to_markdown(tablefmt="pretty"),
+        ]
+    )
+
+
+def load_sync(db, vids: list[int], tail: int) -> dict:
+    """
+    Load and render the vehicles one after the other on one session.
+    """
+
+    results = {}
+
+    with db.begin() as session:
+        for vid in vids:
+            vehicle = session.execute(select_vehicle_by_id(vid)).scalars().first()
+            report = pd.read_sql(vehicle_report(vid, tail), session.connection())
+            summary = pd.read_sql(vehicle_report_summary(vid), session.connection())
+
+            render(vehicle, report, summary)
+
+            results[vid] = (report, summary)
+
+    return results
+
+
+async def load_async(sessionmaker, vids: list[int], tail: int, concurrency: int) -> dict:
+    """
+    Load the vehicles concurrently and render each one as it completes.
+    """
+
+    results = {}
+
+    async for vehicle, report, summary in aio.vehicle_reports(
+        sessionmaker, vids, tail, concurrency=concurrency
+    ):
+        render(vehicle, report, summary)
+
+        results[vehicle.vehicle_id] = (report, summary)
+
+    return results
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="The number of vehicles to generate.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=20_000,
+    show_default=True,
+    help="The number of fuel records per vehicle.",
+)
+@click.option(
+    "--tail",
+    type=int,
+    default=10,
+    show_default=True,
+    help="The number of records in each report (-1 for all).",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="The number of vehicles loaded at the same time.",
+)
+def main(*args, **kwargs):
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "async.db"
+
+        db = get_session(path)
+
+        with db.begin() as session:
+            writer = BulkWriter(session)
+
+            for vehicle, fuel_records in make_fleet(kwargs["vehicles"], kwargs["records"]):
+                vid = writer.add_vehicle(vehicle)
+
+                for record in fuel_records:
+                    record["vehicle_id"] = vid
+
+                writer.add_fuel_records(fuel_records)
+
+        vids = list(range(1, kwargs["vehicles"] + 1))
+
+        click.echo(
+            f"{kwargs['vehicles']} vehicles x {kwargs['records']} records, "
+            f"--tail={kwargs['tail']}"
+        )
+
+        start = time.perf_counter()
+        expected = load_sync(db, vids, kwargs["tail"])
+        elapsed = time.perf_counter() - start
+
+        click.echo(f"{'sync (sequential)':>24}: {elapsed:8.3f} s")
+
+        async def run():
+            async with aio.async_session(
+                path,
+                pool_size=kwargs["concurrency"],
+            ) as sessionmaker:
+                start = time.perf_counter()
+                actual = await load_async(
+                    sessionmaker, vids, kwargs["tail"], kwargs["concurrency"]
+                )
+                elapsed = time.perf_counter() - start
+
+            return elapsed, actual
+
+        elapsed, actual = asyncio.run(run())
+
+        click.echo(f"{'async (concurrency ' + str(kwargs['concurrency']) + ')':>24}: {elapsed:8.3f} s")
+
+        db.kw["bind"].dispose()
+
+    for vid in vids:
+        for e, a in zip(expected[vid], actual[vid]):
+            pd.testing.assert_frame_equal(e, a)
+
+    click.secho("The reports are the same.", fg="cyan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   a356f6ae-ca98-11f1-96d7-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Compare the rows/sec of the ORM relationship cascade (the original
+`ft bulk add` path) against the Core `BulkWriter`.
+
+# Usage
+
+$ python benchmarks/bench_bulk_writer.py --vehicles=10 --records=20000
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import random
+import tempfile
+import time
+
+from datetime import date, timedelta
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import Vehicle, FuelRecord, get_session
+from fuel_tracker.writer import BulkWriter
+
+# -------------
+
+
+def make_fleet(vehicles: int, records: int, seed: int = 42) -> list:
+    """
+    Return a list of (vehicle, fuel_records) tuples of synthetic data.
+    """
+
+    rng = random.Random(seed)
+
+    fleet = []
+
+    for i in range(vehicles):
+        vehicle = {
+            "name": f"vehicle-{i}",
+            "make": "Make",
+            "model": "Model",
+            "year": 2000 + i % 20,
+            "tank_capacity": 60.0,
+            "initial_odometer": 0.0,
+        }
+
+        fill_date = date(2000, 1, 1)
+        fuel_records = []
+
+        for _ in range(records):
+            fill_date += timedelta(days=rng.randint(3, 30))
+            fuel = round(rng.uniform(20, 60), 3)
+
+            fuel_records.append(
+                {
+                    "fill_date": fill_date,
+                    "mileage": round(fuel * rng.uniform(12, 18), 1),
+                    "fuel": fuel,
+                    "cost": round(fuel * rng.uniform(0.9, 1.6), 2),
+                    "partial": rng.random() < 0.05,
+                    "comment": None,
+                }
+            )
+
+        fleet.append((vehicle, fuel_records))
+
+    return fleet
+
+
+def orm_path(db, fleet):
+    """
+    The original implementation - attach the records to the vehicle and
+    let the unit-of-work flush them through the relationship cascade.
+    """
+
+    for vehicle, fuel_records in fleet:
+        with db.begin() as session:
+            session.add(
+                Vehicle(
+                    **vehicle,
+                    fuel_records=[FuelRecord(**fr) for fr in fuel_records],
+                )
+            )
+
+
+def core_path(db, fleet):
+    """
+    The `BulkWriter` implementation.
+    """
+
+    for vehicle, fuel_records in fleet:
+        with db.begin() as session:
+            writer = BulkWriter(session)
+            vid = writer.add_vehicle(vehicle)
+
+            writer.add_fuel_records(
+                [fr | {"vehicle_id": vid} for fr in fuel_records]
+            )
+
+
+@click.command()
+@click.option("--vehicles", type=int, default=10, show_default=True)
+@click.option("--records", type=int, default=20_000, show_default=True, help="Records per vehicle.")
+def main(vehicles, records):
+
+    fleet = make_fleet(vehicles, records)
+    total = vehicles * records
+
+    click.echo(f"{vehicles} vehicles x {records} records = {total} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        for label, writer in (("orm", orm_path), ("core", core_path)):
+
+            db = get_session(Path(tmp) / f"{label}.db")
+
+            start = time.perf_counter()
+            writer(db, fleet)
+            elapsed = time.perf_counter() - start
+
+            click.echo(f"{label:>5}: {elapsed:8.3f} s {total / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
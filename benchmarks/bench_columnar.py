@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   e6b1f0a8-ca9b-11f1-8c11-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Compare the round-trip (export and import) time and the file size of
+the CSV, Parquet and Feather formats of `ft bulk export` and `ft bulk
+add`. A synthetic fleet is written to a temporary database, exported in
+each format and imported into a new database.
+
+Requires pyarrow.
+
+# Usage
+
+$ python benchmarks/bench_columnar.py
+$ python benchmarks/bench_columnar.py --vehicles=100 --records=4000
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import tempfile
+import time
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+from sqlalchemy import select, func
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session, FuelRecord
+from fuel_tracker.writer import BulkWriter
+from fuel_tracker.ingest import stream_add
+from fuel_tracker.export import (
+    CsvSink,
+    ParquetSink,
+    FeatherSink,
+    export_vehicles,
+)
+
+from bench_bulk_writer import make_fleet
+
+# -------------
+
+# format -> (sink, the file name passed to the sink, the glob of the
+# files that are written)
+FORMATS = {
+    "csv": (CsvSink, "fleet.csv", "fleet_*.csv"),
+    "parquet": (ParquetSink, "fleet.parquet", "fleet.parquet"),
+    "feather": (FeatherSink, "fleet.feather", "fleet.feather"),
+}
+
+
+def round_trip(source, vehicles: list[str], fmt: str, folder: Path) -> dict:
+    """
+    Export the vehicles from the source database in the format and
+    import the files into a new database. Returns the timings, the size
+    of the files and the number of records imported.
+    """
+
+    sink, name, pattern = FORMATS[fmt]
+
+    folder.mkdir()
+
+    start = time.perf_counter()
+
+    with source.begin() as session:
+        exported = export_vehicles(session, vehicles, [sink(folder / name)])
+
+    export_time = time.perf_counter() - start
+
+    files = sorted(folder.glob(pattern))
+
+    target = get_session(folder / "target.db")
+
+    start = time.perf_counter()
+
+    with target.begin() as session:
+        for path in files:
+            stream_add(session, path)
+
+    import_time = time.perf_counter() - start
+
+    with target() as session:
+        imported = session.execute(
+            select(func.count()).select_from(FuelRecord)
+        ).scalar()
+
+    return {
+        "export": export_time,
+        "import": import_time,
+        "size": sum(path.stat().st_size for path in files),
+        "exported": exported,
+        "imported": imported,
+    }
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=50,
+    show_default=True,
+    help="The number of vehicles to generate.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=2_000,
+    show_default=True,
+    help=(
+        "The number of fuel records per vehicle. Keep it under ~5000, "
+        "pandas can't parse the fill dates past the year 2262."
+    ),
+)
+def main(*args, **kwargs):
+
+    fleet = make_fleet(kwargs["vehicles"], kwargs["records"])
+
+    click.echo(
+        f"{kwargs['vehicles']} vehicles x {kwargs['records']} records = "
+        f"{kwargs['vehicles'] * kwargs['records']} rows"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        source = get_session(tmp / "source.db")
+
+        with source.begin() as session:
+            writer = BulkWriter(session)
+
+            for vehicle, fuel_records in fleet:
+                vid = writer.add_vehicle(vehicle)
+
+                for record in fuel_records:
+                    record["vehicle_id"] = vid
+
+                writer.add_fuel_records(fuel_records)
+
+        vehicles = [vehicle["name"] for vehicle, _ in fleet]
+
+        click.echo(
+            f"{'format':>8} {'export':>10} {'import':>10} {'round trip':>11} {'size':>10}"
+        )
+
+        for fmt in FORMATS:
+            result = round_trip(source, vehicles, fmt, tmp / fmt)
+
+            if result["imported"] != result["exported"]:
+                raise click.ClickException(
+                    f"{fmt}: exported {result['exported']} records, "
+                    f"imported {result['imported']}"
+                )
+
+            click.echo(
+                f"{fmt:>8} "
+                f"{result['export']:>8.3f} s "
+                f"{result['import']:>8.3f} s "
+                f"{result['export'] + result['import']:>9.3f} s "
+                f"{result['size'] / 2**20:>7.2f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   4f2d8b6e-caa5-11f1-9c3e-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Time importing a master spreadsheet again after a few rows were added
+to it, with `ft bulk add --stream` (the first import) and `ft bulk add
+--incremental`. The master sheet is a CSV file of a synthetic fleet, it
+is imported into an empty database and then grows by `--new` rows per
+vehicle:
+
+- import - the first import of the sheet (`--stream`)
+- read - only reading and normalizing the grown sheet, the floor of any
+  import
+- incremental - the grown sheet, the rows are matched by content
+- incremental (fuel_id) - the grown sheet with the fuel_id column
+  written by `ft bulk export`, the old rows are matched by fuel_id
+
+The incremental imports are rolled back, they start from the same
+database.
+
+# Usage
+
+$ python benchmarks/bench_incremental.py
+$ python benchmarks/bench_incremental.py --vehicles=250 --records=2000 --new=2
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import csv
+import tempfile
+import time
+
+from collections import Counter
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+from fuel_tracker.ingest import stream_add, read_chunks
+from fuel_tracker.writer import ADDED, UPDATED, UNCHANGED
+
+from fleet import generate_fleet, CSV_COLUMNS
+
+# -------------
+
+
+def write_sheet(path: Path, fleet, fuel_ids: bool = False, old: int = 0) -> None:
+    """
+    Write the fleet to one CSV file. With `fuel_ids` the first `old`
+    records of each vehicle have the fuel_id they were given by the
+    first import (the rows are inserted in order), the rest are blank.
+    """
+
+    columns = ["fuel_id", *CSV_COLUMNS] if fuel_ids else CSV_COLUMNS
+
+    fuel_id = 0
+
+    with path.open("w", newline="", encoding="utf-8") as fo:
+        writer = csv.DictWriter(fo, fieldnames=columns)
+        writer.writeheader()
+
+        for vehicle, fuel_records in fleet:
+            for i, record in enumerate(fuel_records):
+                row = vehicle | record
+
+                if fuel_ids and i < old:
+                    fuel_id += 1
+                    row["fuel_id"] = fuel_id
+
+                writer.writerow(row)
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="The number of vehicles to generate.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=2_000,
+    show_default=True,
+    help="The number of fuel records per vehicle in the first import.",
+)
+@click.option(
+    "--new",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="The number of fuel records added to each vehicle before the re-import.",
+)
+def main(*args, **kwargs):
+
+    vehicles = kwargs["vehicles"]
+    records = kwargs["records"]
+
+    rows = vehicles * records
+
+    click.echo(
+        f"{vehicles} vehicles x {records} records = {rows:,} rows, "
+        f"{vehicles * kwargs['new']:,} new rows"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        master = tmp / "master.csv"
+        grown = tmp / "grown.csv"
+        exported = tmp / "exported.csv"
+
+        write_sheet(master, generate_fleet(vehicles, records))
+
+        # the generator is deterministic, the first `records` of each
+        # vehicle are the same
+        write_sheet(grown, generate_fleet(vehicles, records + kwargs["new"]))
+
+        write_sheet(
+            exported,
+            generate_fleet(vehicles, records + kwargs["new"]),
+            fuel_ids=True,
+            old=records,
+        )
+
+        db = get_session(tmp / "fleet.db")
+
+        start = time.perf_counter()
+
+        with db.begin() as session:
+            stream_add(session, master)
+
+        elapsed = time.perf_counter() - start
+
+        click.echo(f"{'import':>22}: {elapsed:8.3f} s {rows / elapsed:>12,.0f} rows/s")
+
+        start = time.perf_counter()
+        count = sum(len(chunk) for chunk in read_chunks(grown))
+        elapsed = time.perf_counter() - start
+
+        click.echo(f"{'read':>22}: {elapsed:8.3f} s {count / elapsed:>12,.0f} rows/s")
+
+        for name, sheet in {
+            "incremental": grown,
+            "incremental (fuel_id)": exported,
+        }.items():
+
+            with db() as session:
+                start = time.perf_counter()
+                added = stream_add(session, sheet, incremental=True)
+                elapsed = time.perf_counter() - start
+
+                session.rollback()
+
+            counts = Counter()
+
+            for _, statuses in added.values():
+                counts.update(statuses)
+
+            click.echo(
+                f"{name:>22}: {elapsed:8.3f} s {count / elapsed:>12,.0f} rows/s "
+                f"({counts[ADDED]:,} added, {counts[UPDATED]:,} updated, "
+                f"{counts[UNCHANGED]:,} unchanged)"
+            )
+
+        db.kw["bind"].dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   8a9d55b6-ca9c-11f1-b0f2-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Compare the report engines of `ft report show --engine=sql|numpy` on a
+synthetic fleet (one million records by default). The full history of
+every vehicle is reported (`--tail=-1`) and the two engines are checked
+for the same results.
+
+- sql - the columns are calculated by SQLite, read with pandas.read_sql
+- numpy - the raw columns are read and calculated with NumPy
+- numpy (compute) - only the NumPy calculations, the history is already
+  in memory
+
+# Usage
+
+$ python benchmarks/bench_metrics.py
+$ python benchmarks/bench_metrics.py --vehicles=2 --records=50000
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import tempfile
+import time
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+import numpy as np
+import pandas as pd
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+from fuel_tracker.writer import BulkWriter
+from fuel_tracker.queries import vehicles_report
+from fuel_tracker import metrics
+
+from bench_bulk_writer import make_fleet
+
+# -------------
+
+
+def timed(function, *args, runs: int = 3):
+    """
+    Call the function `runs` times and return the best time and the
+    result of the last call.
+    """
+
+    best = None
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="The number of vehicles to generate.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=100_000,
+    show_default=True,
+    help="The number of fuel records per vehicle.",
+)
+@click.option(
+    "--runs",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="The number of times to run each engine, the best run is used.",
+)
+def main(*args, **kwargs):
+
+    rows = kwargs["vehicles"] * kwargs["records"]
+
+    click.echo(f"{kwargs['vehicles']} vehicles x {kwargs['records']} records = {rows} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        db = get_session(Path(tmp) / "metrics.db")
+
+        vids = []
+
+        with db.begin() as session:
+            writer = BulkWriter(session)
+
+            for vehicle, fuel_records in make_fleet(kwargs["vehicles"], kwargs["records"]):
+                vid = writer.add_vehicle(vehicle)
+                vids.append(vid)
+
+                for record in fuel_records:
+                    record["vehicle_id"] = vid
+
+                    # mark every 10th fill-up as partial
+                    record["partial"] = record["fill_date"].toordinal() % 10 == 0
+
+                writer.add_fuel_records(fuel_records)
+
+        with db() as session:
+
+            def sql_engine():
+                return pd.read_sql(vehicles_report(vids, -1), session.connection())
+
+            def numpy_engine():
+                return metrics.vehicles_report(session, vids, -1)
+
+            history = metrics.load_history(session, vids)
+
+            results = {
+                "sql": timed(sql_engine, runs=kwargs["runs"]),
+                "numpy": timed(numpy_engine, runs=kwargs["runs"]),
+                "numpy (compute)": timed(metrics.compute_metrics, history, runs=kwargs["runs"]),
+            }
+
+    for engine, (elapsed, _) in results.items():
+        click.echo(f"{engine:>16}: {elapsed:8.3f} s {rows / elapsed:>14,.0f} rows/s")
+
+    sql = results["sql"][1]
+    numpy = results["numpy"][1]
+
+    for column in metrics.REPORT_COLUMNS:
+        if column == "fill_date":
+            same = (sql[column].astype(str) == numpy[column].astype(str)).all()
+
+        else:
+            same = np.allclose(sql[column], numpy[column], atol=1e-3, equal_nan=True)
+
+        if not same:
+            raise click.ClickException(f"The engines don't agree on {column}!")
+
+    click.secho("The engines agree.", fg="cyan")
+
+
+if __name__ == "__main__":
+    main()
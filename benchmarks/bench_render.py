@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   b3e07d5a-caa0-11f1-a4c9-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Compare the ways `ft report show --tail=-1` can write the reports of a
+synthetic fleet:
+
+- to_markdown - the DataFrames rendered by tabulate (the way `ft report
+  show` used to)
+- frame_table - the same DataFrames written by render.py (the cached
+  reports and --engine=numpy)
+- streamed - the text streamed from the cursor, the widths from
+  `MAX(LENGTH())` (--no-cache)
+
+The times include loading the reports. The tables are checked for
+equality with the tabulate output.
+
+# Usage
+
+$ python benchmarks/bench_render.py
+$ python benchmarks/bench_render.py --vehicles=1 --records=20000
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import tempfile
+import time
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+from fuel_tracker.render import table_lines
+from fuel_tracker.command_report import (
+    load_reports,
+    frame_tables,
+    streamed_tables,
+    REPORT_HEADERS,
+    SUMMARY_HEADERS,
+)
+
+from fleet import generate_fleet, write_database
+
+# -------------
+
+
+def to_markdown(session, vids) -> list[str]:
+    """
+    The tables rendered with DataFrame.to_markdown.
+    """
+
+    tables = []
+
+    for df, df_totals in load_reports(session, vids, -1, False, "sql").values():
+        df = df.reset_index(drop=True)
+
+        economy = ['l_per_100km', 'mpg_us', 'mpg_imp']
+        df[economy] = df[economy].astype(object).where(df[economy].notna(), None)
+
+        df = df.rename(columns=REPORT_HEADERS)
+        df_totals = df_totals.reset_index(drop=True).rename(columns=SUMMARY_HEADERS)
+
+        tables.append(df.to_markdown(index=True, tablefmt="pretty", missingval=""))
+        tables.append(df_totals.to_markdown(index=True, tablefmt="pretty", missingval=""))
+
+    return tables
+
+
+def written(tables, vids) -> list[str]:
+    """
+    The tables written by render.py. `tables` returns the tables of a
+    vehicle_id.
+    """
+
+    return [
+        "\n".join(table_lines(*table)) for vid in vids for table in tables(vid)
+    ]
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="The number of vehicles to generate.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=10_000,
+    show_default=True,
+    help="The number of fuel records per vehicle.",
+)
+def main(*args, **kwargs):
+
+    rows = kwargs["vehicles"] * kwargs["records"]
+
+    click.echo(f"{kwargs['vehicles']} vehicles x {kwargs['records']} records = {rows:,} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = get_session(Path(tmp) / "render.db")
+
+        write_database(db, generate_fleet(kwargs["vehicles"], kwargs["records"]))
+
+        vids = list(range(1, kwargs["vehicles"] + 1))
+
+        methods = {
+            "to_markdown": lambda session: to_markdown(session, vids),
+            "frame_table": lambda session: written(
+                frame_tables(load_reports(session, vids, -1, False, "sql")).get, vids
+            ),
+            "streamed": lambda session: written(
+                streamed_tables(session, vids, -1, False), vids
+            ),
+        }
+
+        results = {}
+
+        for name, method in methods.items():
+            with db() as session:
+                start = time.perf_counter()
+                tables = method(session)
+                elapsed = time.perf_counter() - start
+
+            results[name] = tables
+
+            click.echo(f"{name:>12}: {elapsed:8.3f} s {rows / elapsed:>12,.0f} rows/s")
+
+        db.kw["bind"].dispose()
+
+    for name, tables in results.items():
+        if tables != results["to_markdown"]:
+            raise click.ClickException(f"The {name} tables differ from to_markdown!")
+
+    click.secho("The tables are the same.", fg="cyan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   e6a9c0f2-caa2-11f1-b5d8-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Compare the output formats of `ft report show --tail=-1` and `ft bulk
+export` for a whole synthetic fleet: the tables (from the cached
+DataFrames and streamed with --no-cache) and the JSON Lines and CSV
+rows. Each command runs in its own process (the output goes to
+/dev/null) with `--timings-json`, the peak memory is the peak resident
+set size of the process.
+
+Run it with two fleet sizes. The memory of the streamed formats grows
+with the database (not the rows), up to the SQLite page cache and the
+memory mapped part of the file (`cache_size` and `mmap_size` in
+settings.toml), the rest stays the same.
+
+# Usage
+
+$ python benchmarks/bench_report_formats.py
+$ python benchmarks/bench_report_formats.py --vehicles=100 --records=2000
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+
+from fleet import generate_fleet, write_database
+
+# -------------
+
+FT = "from fuel_tracker.fueltracker import main; main()"
+
+# name -> `ft` arguments, {vehicles} is replaced by the vehicle names
+COMMANDS = {
+    "table": ["report", "show", "{vehicles}", "--tail=-1"],
+    "table --no-cache": ["report", "show", "{vehicles}", "--tail=-1", "--no-cache"],
+    "jsonl": ["report", "show", "{vehicles}", "--tail=-1", "--format=jsonl"],
+    "csv": ["report", "show", "{vehicles}", "--tail=-1", "--format=csv"],
+    "export jsonl": ["bulk", "export", "--all", "--format=jsonl"],
+    "export csv": ["bulk", "export", "--all", "--format=csv"],
+}
+
+
+def run_ft(folder: Path, arguments: list[str]) -> dict:
+    """
+    Run `ft` in a new process with the configuration folder and return
+    its --timings-json measurements.
+    """
+
+    timings = folder / "timings.json"
+
+    env = os.environ | {"XDG_CONFIG_HOME": str(folder)}
+
+    subprocess.run(
+        [sys.executable, "-c", FT, f"--timings-json={timings}", *arguments],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+
+    return json.loads(timings.read_text())
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=50,
+    show_default=True,
+    help="The number of vehicles to generate.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=2_000,
+    show_default=True,
+    help="The number of fuel records per vehicle.",
+)
+def main(*args, **kwargs):
+
+    rows = kwargs["vehicles"] * kwargs["records"]
+
+    click.echo(f"{kwargs['vehicles']} vehicles x {kwargs['records']} records = {rows:,} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+
+        config = folder / "bluebill.net" / "fuel_tracker"
+        config.mkdir(parents=True)
+
+        db = get_session(config / "fuel.db")
+        write_database(db, generate_fleet(kwargs["vehicles"], kwargs["records"]))
+        db.kw["bind"].dispose()
+
+        names = [f"vehicle-{i:05d}" for i in range(kwargs["vehicles"])]
+
+        click.echo(f"{'format':>18} {'wall':>10} {'rows/s':>10} {'peak memory':>12}")
+
+        for name, command in COMMANDS.items():
+            arguments = []
+
+            for argument in command:
+                arguments.extend(names if argument == "{vehicles}" else [argument])
+
+            result = run_ft(folder, arguments)
+
+            click.echo(
+                f"{name:>18} "
+                f"{result['wall']:>8.3f} s "
+                f"{rows / result['wall']:>10,.0f} "
+                f"{result['peak_memory'] / 2**20:>9.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   d81f37a4-ca9d-11f1-9c52-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Compare resolving a long list of vehicle names and ids one query per
+argument (the way `ft bulk delete` and `ft fuel add` used to) with the
+VehicleResolver, which looks all of them up in one statement. Half of
+the arguments are names and half are ids, the results are checked for
+equality.
+
+# Usage
+
+$ python benchmarks/bench_resolver.py
+$ python benchmarks/bench_resolver.py --vehicles=2000
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import tempfile
+import time
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session, select_vehicle_by_id, select_vehicle_by_name
+from fuel_tracker.writer import BulkWriter
+from fuel_tracker.common import is_int
+from fuel_tracker.resolver import VehicleResolver
+
+# -------------
+
+
+def resolve_per_argument(session, vehicles: list[str]) -> dict[str, int]:
+    """
+    One query per argument.
+    """
+
+    resolved = {}
+
+    for vehicle in vehicles:
+
+        if is_int(vehicle):
+            statement = select_vehicle_by_id(int(vehicle))
+
+        else:
+            statement = select_vehicle_by_name(vehicle)
+
+        selected = session.execute(statement).scalar()
+
+        if selected is not None:
+            resolved[vehicle] = selected.vehicle_id
+
+    return resolved
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=2),
+    default=500,
+    show_default=True,
+    help="The number of vehicles (and arguments).",
+)
+def main(*args, **kwargs):
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = get_session(Path(tmp) / "resolver.db")
+
+        with db.begin() as session:
+            vids = BulkWriter(session).add_vehicles(
+                [{"name": f"vehicle-{i}"} for i in range(kwargs["vehicles"])]
+            )
+
+        arguments = [
+            str(vid) if i % 2 else f"vehicle-{i}" for i, vid in enumerate(vids)
+        ]
+
+        with db() as session:
+            start = time.perf_counter()
+            expected = resolve_per_argument(session, arguments)
+            per_argument = time.perf_counter() - start
+
+        with db() as session:
+            start = time.perf_counter()
+            resolved, unresolved = VehicleResolver().resolve(session, arguments)
+            resolver = time.perf_counter() - start
+
+        db.kw["bind"].dispose()
+
+    click.echo(f"{len(arguments)} arguments")
+    click.echo(f"{'query per argument':>20}: {1000 * per_argument:8.1f} ms")
+    click.echo(f"{'VehicleResolver':>20}: {1000 * resolver:8.1f} ms")
+
+    if resolved != expected or unresolved:
+        raise click.ClickException("The resolved vehicles differ!")
+
+    click.secho("The resolved vehicles are the same.", fg="cyan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   6c1f9e2a-ca9d-11f1-9a63-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Load test `ft serve`. A synthetic fleet is written to a temporary
+database, `ft serve` is started on it in a subprocess and `--clients`
+threads send requests over keep-alive connections for `--duration`
+seconds. The requests/sec and the latency percentiles are reported and
+compared with running `ft report show` once per request.
+
+# Usage
+
+$ python benchmarks/bench_serve.py
+$ python benchmarks/bench_serve.py --endpoint=report --clients=8 --no-cache
+$ python benchmarks/bench_serve.py --endpoint=export --clients=2
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+from fuel_tracker.writer import BulkWriter
+
+from bench_bulk_writer import make_fleet
+
+# -------------
+
+FT = [sys.executable, "-c", "from fuel_tracker.fueltracker import main; main()"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int, timeout: float = 30.0) -> None:
+    """
+    Wait until the server accepts connections.
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+
+        except OSError:
+            time.sleep(0.1)
+
+    raise click.ClickException("ft serve did not start")
+
+
+def request_paths(endpoint: str, names: list[str]):
+    """
+    Return a function that returns the path of the next request.
+    """
+
+    if endpoint == "vehicles":
+        return lambda: "/vehicles"
+
+    if endpoint == "export":
+        return lambda: f"/export?vehicle={random.choice(names)}"
+
+    return lambda: f"/report?vehicle={random.choice(names)}&tail=10"
+
+
+def client(port: int, next_path, stop: float, latencies: list, errors: list) -> None:
+    """
+    Send requests on one keep-alive connection until `stop`.
+    """
+
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+
+    while time.monotonic() < stop:
+        start = time.perf_counter()
+
+        connection.request("GET", next_path())
+        response = connection.getresponse()
+        response.read()
+
+        if response.status != 200:
+            errors.append(response.status)
+
+        latencies.append(time.perf_counter() - start)
+
+    connection.close()
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+    help="The number of vehicles to generate.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=1_000,
+    show_default=True,
+    help="The number of fuel records per vehicle.",
+)
+@click.option(
+    "--endpoint",
+    type=click.Choice(["report", "vehicles", "export"]),
+    default="report",
+    show_default=True,
+    help="The request to send, for a random vehicle.",
+)
+@click.option(
+    "--clients",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="The number of concurrent clients.",
+)
+@click.option(
+    "--duration",
+    type=click.FloatRange(min=1),
+    default=10,
+    show_default=True,
+    help="The length of the test in seconds.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Start ft serve with --no-cache.",
+)
+@click.option(
+    "--cli-runs",
+    type=click.IntRange(min=0),
+    default=5,
+    show_default=True,
+    help="The number of `ft report show` runs to compare with (0 to skip).",
+)
+def main(*args, **kwargs):
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        # `ft` finds its settings in $XDG_CONFIG_HOME
+        config = tmp / "bluebill.net" / "fuel_tracker"
+        config.mkdir(parents=True)
+
+        db = get_session(config / "fuel.db")
+
+        names = []
+
+        with db.begin() as session:
+            writer = BulkWriter(session)
+
+            for vehicle, fuel_records in make_fleet(kwargs["vehicles"], kwargs["records"]):
+                vid = writer.add_vehicle(vehicle)
+                names.append(vehicle["name"])
+
+                for record in fuel_records:
+                    record["vehicle_id"] = vid
+
+                writer.add_fuel_records(fuel_records)
+
+        env = dict(os.environ, XDG_CONFIG_HOME=str(tmp))
+
+        port = free_port()
+
+        command = FT + ["serve", "--port", str(port), "--quiet"]
+
+        if kwargs["no_cache"]:
+            command.append("--no-cache")
+
+        server = subprocess.Popen(command, env=env, stderr=subprocess.DEVNULL)
+
+        try:
+            wait_for(port)
+
+            next_path = request_paths(kwargs["endpoint"], names)
+
+            latencies = []
+            errors = []
+
+            stop = time.monotonic() + kwargs["duration"]
+
+            threads = [
+                threading.Thread(
+                    target=client,
+                    args=(port, next_path, stop, latencies, errors),
+                )
+                for _ in range(kwargs["clients"])
+            ]
+
+            start = time.perf_counter()
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+            elapsed = time.perf_counter() - start
+
+        finally:
+            server.terminate()
+            server.wait()
+
+        if errors:
+            raise click.ClickException(f"{len(errors)} requests failed: {set(errors)}")
+
+        latencies.sort()
+
+        def percentile(p: float) -> float:
+            return 1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        click.echo(
+            f"{kwargs['vehicles']} vehicles x {kwargs['records']} records, "
+            f"{kwargs['clients']} clients, GET /{kwargs['endpoint']}"
+        )
+        click.echo(
+            f"ft serve: {len(latencies) / elapsed:>10,.1f} requests/s  "
+            f"p50 {percentile(0.50):.1f} ms  p95 {percentile(0.95):.1f} ms  "
+            f"p99 {percentile(0.99):.1f} ms"
+        )
+
+        if kwargs["cli_runs"]:
+            times = []
+
+            for _ in range(kwargs["cli_runs"]):
+                start = time.perf_counter()
+
+                subprocess.run(
+                    FT + ["report", "show", random.choice(names), "--no-cache"],
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                )
+
+                times.append(time.perf_counter() - start)
+
+            median = statistics.median(times)
+
+            click.echo(
+                f"ft report show: {1 / median:>4,.1f} requests/s  "
+                f"p50 {1000 * median:.1f} ms (one process per request)"
+            )
+
+
+if __name__ == "__main__":
+    main()
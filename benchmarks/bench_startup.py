@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   6d2f43c0-ca9a-11f1-a1c5-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Measure the import time of the `ft` command line for the commands that
+should start quickly and check it against a budget. The import time is
+taken from `python -X importtime`, the best of `--runs` runs is used.
+
+The script also checks that the heavy modules (pandas, numpy, openpyxl,
+odfpy and tabulate) are not imported at all by these commands. It exits
+with a non-zero status if a command is over budget or imports one of
+them.
+
+A temporary configuration folder is used so the real database isn't
+touched.
+
+# Usage
+
+$ python benchmarks/bench_startup.py
+$ python benchmarks/bench_startup.py --runs=10 --scale=2
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import os
+import re
+import sys
+import subprocess
+import tempfile
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+# -------------
+
+# command line -> import time budget in milliseconds
+BUDGETS = {
+    "--help": 250,
+    "fuel add --help": 900,
+}
+
+# modules that must not be imported by the commands above
+HEAVY_MODULES = {"pandas", "numpy", "openpyxl", "odf", "tabulate"}
+
+# import time:  self [us] | cumulative | imported package
+IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+RUN_FT = "from fuel_tracker.fueltracker import main; main()"
+
+
+def import_profile(command: str, env: dict) -> tuple[float, set]:
+    """
+    Run `ft <command>` with `-X importtime` and return a tuple of the
+    total import time in milliseconds and the set of top level packages
+    that were imported.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUN_FT, *command.split()],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        raise click.ClickException(f"ft {command} failed:\n{result.stderr}")
+
+    total = 0
+    packages = set()
+
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+
+        if match:
+            total += int(match.group(1))
+            packages.add(match.group(4).split(".")[0])
+
+    return total / 1000, packages
+
+
+@click.command()
+@click.option(
+    "--runs",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="The number of times to run each command, the best run is used.",
+)
+@click.option(
+    "--scale",
+    type=click.FloatRange(min=0, min_open=True),
+    default=1.0,
+    show_default=True,
+    help="Multiply the budgets, for slower machines.",
+)
+def main(*args, **kwargs):
+
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        env = os.environ | {"XDG_CONFIG_HOME": tmp, "HOME": tmp, "APPDATA": tmp}
+
+        for command, budget in BUDGETS.items():
+            budget *= kwargs["scale"]
+
+            profiles = [import_profile(command, env) for _ in range(kwargs["runs"])]
+            best, packages = min(profiles, key=lambda p: p[0])
+
+            heavy = sorted(packages & HEAVY_MODULES)
+            over = best > budget
+
+            failed |= over or bool(heavy)
+
+            click.secho(
+                f"ft {command:<20} {best:8.1f} ms (budget {budget:.0f} ms)",
+                fg="red" if over else None,
+            )
+
+            if heavy:
+                click.secho(f"  imports {', '.join(heavy)}", fg="red")
+
+    if failed:
+        click.secho("Startup is over budget!", fg="red")
+        sys.exit(1)
+
+    click.secho("Startup is within budget.", fg="cyan")
+
+
+if __name__ == "__main__":
+    main()
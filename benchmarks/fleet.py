@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   1f6b2d8c-ca9e-11f1-a3b7-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+A deterministic synthetic fleet generator for the benchmarks. The same
+arguments always produce the same vehicles and fuel records, on any
+machine. Each vehicle has its own random generator (seeded with the
+fleet seed and the vehicle number) so the first vehicles of a large
+fleet are the same as the vehicles of a small one.
+
+The fuel records are shaped like real ones:
+
+- every vehicle has its own tank, fuel economy, driving distance per day
+  and start date
+- the economy is a little worse in the winter
+- partial fill-ups add less fuel than was used, the rest is added by the
+  next full fill-up (so the partial-fill aware economy stays realistic)
+- the price of fuel follows a random walk
+- the odd long gap (the vehicle was parked or the receipts were lost)
+- a few comments
+
+The fleet can be written to a database (with the BulkWriter) or to CSV
+files in the `ft bulk add` format (data/*.csv).
+
+# Usage
+
+$ python benchmarks/fleet.py --vehicles=100 --records=1000 --db=fleet.db
+$ python benchmarks/fleet.py --vehicles=10 --records=500 --csv=fleet/
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import csv
+import math
+import random
+
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+from fuel_tracker.writer import BulkWriter
+
+# -------------
+
+MODELS = [
+    ("Toyota", "Corolla"),
+    ("Toyota", "Matrix"),
+    ("Toyota", "Tacoma"),
+    ("Honda", "Civic"),
+    ("Honda", "CR-V"),
+    ("Ford", "F-150"),
+    ("Ford", "Escape"),
+    ("Volkswagen", "Passat"),
+    ("Volkswagen", "Golf"),
+    ("Kia", "Soul"),
+    ("Dodge", "Intrepid"),
+    ("Subaru", "Outback"),
+]
+
+COMMENTS = [
+    "highway trip",
+    "winter tires",
+    "towing",
+    "city driving",
+    "new tires",
+]
+
+CSV_COLUMNS = [
+    "name",
+    "make",
+    "model",
+    "year",
+    "tank_capacity",
+    "initial_odometer",
+    "fill_date",
+    "mileage",
+    "fuel",
+    "cost",
+    "partial",
+    "comment",
+]
+
+
+def make_vehicle(rng: random.Random, i: int) -> dict:
+    """
+    Return the VEHICLE values of vehicle `i`.
+    """
+
+    make, model = rng.choice(MODELS)
+
+    return {
+        "name": f"vehicle-{i:05d}",
+        "make": make,
+        "model": model,
+        "year": rng.randint(1995, 2024),
+        "tank_capacity": float(rng.randrange(40, 95, 5)),
+        "initial_odometer": round(rng.uniform(0, 150_000), 1),
+    }
+
+
+def make_fuel_records(
+    rng: random.Random,
+    vehicle: dict,
+    records: int,
+    partial_rate: float,
+    gap_rate: float,
+) -> list[dict]:
+    """
+    Return `records` fuel records of the vehicle in fill_date order.
+    """
+
+    tank = vehicle["tank_capacity"]
+
+    l_per_100km = rng.uniform(5.0, 14.0)
+    km_per_day = rng.uniform(20, 120)
+    price = rng.uniform(0.6, 1.1)
+
+    fill_date = date(2000, 1, 1) + timedelta(days=rng.randint(0, 5000))
+
+    # the fuel used but not added back by partial fill-ups
+    deficit = 0.0
+
+    fuel_records = []
+
+    for _ in range(records):
+        partial = rng.random() < partial_rate
+
+        # drive most of a tank (less before a partial fill-up)
+        share = rng.uniform(0.2, 0.5) if partial else rng.uniform(0.55, 0.9)
+
+        season = 1 + 0.1 * math.cos(2 * math.pi * (fill_date.timetuple().tm_yday - 15) / 365)
+        economy = l_per_100km * season * rng.uniform(0.92, 1.08)
+
+        mileage = round(tank * share / economy * 100, 1)
+        used = mileage * economy / 100
+
+        if partial:
+            fuel = used * rng.uniform(0.3, 0.8)
+            deficit += used - fuel
+
+        else:
+            fuel = used + deficit
+            deficit = 0.0
+
+        fuel = round(min(fuel, tank), 3)
+
+        days = max(1, round(mileage / (km_per_day * rng.uniform(0.7, 1.3))))
+
+        if rng.random() < gap_rate:
+            days += rng.randint(30, 365)
+
+        fill_date += timedelta(days=days)
+
+        price = min(2.5, max(0.5, price * rng.uniform(0.985, 1.0165)))
+
+        fuel_records.append(
+            {
+                "fill_date": fill_date,
+                "mileage": mileage,
+                "fuel": fuel,
+                "cost": round(fuel * price, 2),
+                "partial": partial,
+                "comment": rng.choice(COMMENTS) if rng.random() < 0.02 else None,
+            }
+        )
+
+    return fuel_records
+
+
+def generate_fleet(
+    vehicles: int,
+    records: int,
+    seed: int = 42,
+    partial_rate: float = 0.08,
+    gap_rate: float = 0.01,
+) -> Iterator[tuple[dict, list[dict]]]:
+    """
+    Yield (vehicle, fuel_records) tuples of the synthetic fleet, one
+    vehicle at a time so large fleets don't have to fit in memory.
+
+    # Parameters
+
+    vehicles:int
+        - The number of vehicles.
+
+    records:int
+        - The number of fuel records per vehicle.
+
+    seed:int
+        - The fleet seed. The same seed produces the same fleet.
+
+    partial_rate:float
+        - The fraction of fill-ups that are partial.
+
+    gap_rate:float
+        - The fraction of fill-ups that follow a long gap (30 to 365
+          days).
+    """
+
+    for i in range(vehicles):
+        rng = random.Random(f"{seed}-{i}")
+
+        vehicle = make_vehicle(rng, i)
+
+        yield vehicle, make_fuel_records(rng, vehicle, records, partial_rate, gap_rate)
+
+
+def write_database(db, fleet) -> int:
+    """
+    Write the fleet to the database, one transaction per vehicle.
+    Returns the number of fuel records written.
+    """
+
+    count = 0
+
+    for vehicle, fuel_records in fleet:
+        with db.begin() as session:
+            writer = BulkWriter(session)
+            vid = writer.add_vehicle(vehicle)
+
+            for record in fuel_records:
+                record["vehicle_id"] = vid
+
+            count += writer.add_fuel_records(fuel_records)
+
+    return count
+
+
+def write_csv(folder: Path, fleet) -> list[Path]:
+    """
+    Write one `ft bulk add` CSV file per vehicle to the folder and
+    return the paths.
+    """
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+
+    for vehicle, fuel_records in fleet:
+        path = folder / f"{vehicle['name']}.csv"
+
+        with path.open("w", newline="", encoding="utf-8") as fo:
+            writer = csv.DictWriter(fo, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+
+            for record in fuel_records:
+                writer.writerow(vehicle | record)
+
+        paths.append(path)
+
+    return paths
+
+
+@click.command()
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="The number of vehicles.",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    default=1_000,
+    show_default=True,
+    help="The number of fuel records per vehicle.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=42,
+    show_default=True,
+    help="The fleet seed.",
+)
+@click.option(
+    "--partial-rate",
+    type=click.FloatRange(min=0, max=1),
+    default=0.08,
+    show_default=True,
+    help="The fraction of fill-ups that are partial.",
+)
+@click.option(
+    "--gap-rate",
+    type=click.FloatRange(min=0, max=1),
+    default=0.01,
+    show_default=True,
+    help="The fraction of fill-ups that follow a long gap.",
+)
+@click.option(
+    "--db",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the fleet to this database.",
+)
+@click.option(
+    "--csv",
+    "csv_folder",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Write the fleet to CSV files (one per vehicle) in this folder.",
+)
+def main(*args, **kwargs):
+
+    if not kwargs["db"] and not kwargs["csv_folder"]:
+        raise click.UsageError("Specify --db and/or --csv.")
+
+    def fleet():
+        return generate_fleet(
+            kwargs["vehicles"],
+            kwargs["records"],
+            seed=kwargs["seed"],
+            partial_rate=kwargs["partial_rate"],
+            gap_rate=kwargs["gap_rate"],
+        )
+
+    if kwargs["db"]:
+        db = get_session(kwargs["db"])
+        count = write_database(db, fleet())
+        db.kw["bind"].dispose()
+
+        click.echo(f"{kwargs['db']}: {kwargs['vehicles']} vehicles, {count} fuel records")
+
+    if kwargs["csv_folder"]:
+        paths = write_csv(kwargs["csv_folder"], fleet())
+
+        click.echo(f"{kwargs['csv_folder']}: {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main()
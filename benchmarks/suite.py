@@ -0,0 +1,762 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   3a9d5e10-ca9e-11f1-8e4c-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+The benchmark suite. Every `ft` command and the report statements of
+queries.py are timed against a synthetic fleet (see fleet.py) and the
+results are saved so each run is compared with the previous run on the
+same machine and fleet. Use it before and after a change to catch
+performance regressions.
+
+The commands are run in process (click's CliRunner) against a
+temporary configuration folder, the real database isn't touched. The
+process start-up time is measured separately by bench_startup.py.
+
+The fleet database is generated once per size and seed and kept in
+`benchmarks/.fleets`, the results are appended to
+`benchmarks/.results/results.jsonl` (one JSON object per run with the
+commit, machine and fleet).
+
+Fleet sizes (vehicles x records per vehicle):
+
+- small - 10 x 500
+- medium - 100 x 1,000
+- large - 1,000 x 1,000 (one million fuel records)
+- wide - 10,000 x 100
+
+# Usage
+
+$ python benchmarks/suite.py --list
+$ python benchmarks/suite.py --size=medium
+$ python benchmarks/suite.py --size=large -k report -k queries
+$ python benchmarks/suite.py --size=medium --compare=3b17f74 --fail-on-regression
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import gc
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+import pandas as pd
+
+from click.testing import CliRunner
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.fueltracker import main as ft_main
+from fuel_tracker.models import get_session
+from fuel_tracker.queries import (
+    vehicle_report,
+    vehicle_report_summary,
+    vehicles_report,
+    vehicles_report_summary,
+)
+from fuel_tracker.export import export_statement, iter_batches
+from fuel_tracker import metrics
+
+from fleet import generate_fleet, write_database, write_csv
+
+# -------------
+
+HERE = Path(__file__).resolve().parent
+
+SIZES = {
+    "small": (10, 500),
+    "medium": (100, 1_000),
+    "large": (1_000, 1_000),
+    "wide": (10_000, 100),
+}
+
+# Change this when fleet.py changes the data it generates, the cached
+# fleets and the saved results are no longer comparable.
+FLEET_VERSION = 1
+
+# The number of vehicles used by the benchmarks that work on a
+# selection of the fleet (report show, bulk add, bulk delete, ...)
+SELECTION = 10
+
+# Changes smaller than this (seconds) are noise, never a regression
+NOISE_FLOOR = 0.005
+
+
+class Benchmark:
+    """
+    A timed function of the suite.
+
+    # Parameters
+
+    name:str
+        - The name shown in the results (and matched by `-k`).
+
+    function:Callable
+        - The timed function, called with the Workspace.
+
+    setup:Callable
+        - An untimed function called with the Workspace before every
+          run. Optional.
+
+    mutates:bool
+        - The function changes the database. It is restored before the
+          next benchmark.
+    """
+
+    def __init__(self, name: str, function: Callable, setup: Optional[Callable], mutates: bool):
+        self.name = name
+        self.function = function
+        self.setup = setup
+        self.mutates = mutates
+
+
+BENCHMARKS = []
+
+
+def benchmark(name: str, setup: Optional[Callable] = None, mutates: bool = False):
+    """
+    Register the decorated function as a benchmark.
+    """
+
+    def register(function):
+        BENCHMARKS.append(Benchmark(name, function, setup, mutates))
+        return function
+
+    return register
+
+
+class Workspace:
+    """
+    The temporary `ft` configuration folder with a copy of the fleet
+    database.
+
+    # Parameters
+
+    folder:Path
+        - The temporary folder (XDG_CONFIG_HOME).
+
+    fleet_db:Path
+        - The generated fleet database, it is copied and never changed.
+
+    fleet_csv:list[Path]
+        - The CSV files of the first SELECTION vehicles of the fleet.
+
+    fleet_xlsx:Path
+        - The same vehicles in one Excel spreadsheet.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        fleet_db: Path,
+        fleet_csv: list[Path],
+        fleet_xlsx: Path,
+        vehicles: int,
+    ):
+
+        self.folder = folder
+        self.fleet_db = fleet_db
+        self.fleet_csv = fleet_csv
+        self.fleet_xlsx = fleet_xlsx
+
+        self.config = folder / "bluebill.net" / "fuel_tracker"
+        self.config.mkdir(parents=True, exist_ok=True)
+
+        self.path_db = self.config / "fuel.db"
+
+        self.names = [f"vehicle-{i:05d}" for i in range(vehicles)]
+        self.selection = self.names[:SELECTION]
+
+        self.output = folder / "output"
+
+        self.dirty = True
+        self._db = None
+
+    def remove_database(self) -> None:
+        """
+        Delete the database, its WAL files and the report cache.
+        """
+
+        if self._db is not None:
+            self._db.kw["bind"].dispose()
+            self._db = None
+
+        # close the engines of the `ft` commands
+        gc.collect()
+
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{self.path_db}{suffix}").unlink(missing_ok=True)
+
+        shutil.rmtree(self.config / "cache", ignore_errors=True)
+        shutil.rmtree(self.output, ignore_errors=True)
+
+        self.output.mkdir()
+
+    def reset(self) -> None:
+        """
+        Restore the fleet database.
+        """
+
+        self.remove_database()
+
+        shutil.copyfile(self.fleet_db, self.path_db)
+
+        self.dirty = False
+
+    @property
+    def db(self):
+        """
+        A session factory on the workspace database.
+        """
+
+        if self._db is None:
+            self._db = get_session(self.path_db)
+
+        return self._db
+
+    def ft(self, *args: str, input: Optional[str] = None) -> str:
+        """
+        Run `ft` with the arguments and return its output. Raises a
+        ClickException if the command fails.
+        """
+
+        result = CliRunner().invoke(
+            ft_main,
+            [str(a) for a in args],
+            input=input,
+            env={"XDG_CONFIG_HOME": str(self.folder)},
+        )
+
+        if result.exit_code != 0:
+            raise click.ClickException(
+                f"ft {' '.join(map(str, args))} failed:\n{result.output}"
+                + (f"\n{result.exception!r}" if result.exception else "")
+            )
+
+        return result.output
+
+
+# ----------------
+# Setup functions
+
+
+def empty_database(ws: Workspace) -> None:
+    ws.remove_database()
+    ws.dirty = True
+
+
+def restore_database(ws: Workspace) -> None:
+    ws.reset()
+
+
+def warm_report_cache(ws: Workspace) -> None:
+    ws.ft("report", "show", *ws.selection)
+
+
+# ----------------
+# ft bulk
+
+
+@benchmark("ft bulk add (xlsx)", setup=empty_database, mutates=True)
+def bulk_add(ws):
+    ws.ft("bulk", "add", ws.fleet_xlsx)
+
+
+@benchmark("ft bulk add --stream (csv)", setup=empty_database, mutates=True)
+def bulk_add_stream(ws):
+    ws.ft("bulk", "add", "--stream", *ws.fleet_csv)
+
+
+@benchmark("ft bulk add --incremental (csv)")
+def bulk_add_incremental(ws):
+    # the vehicles are in the database, every row is unchanged
+    ws.ft("bulk", "add", "--incremental", *ws.fleet_csv)
+
+
+@benchmark("ft bulk export --all --csv")
+def bulk_export_all(ws):
+    ws.ft("bulk", "export", "--all", "--csv", ws.output / "fleet.csv")
+
+
+@benchmark("ft bulk export --csv (selection)")
+def bulk_export_selection(ws):
+    ws.ft("bulk", "export", *ws.selection, "--csv", ws.output / "selection.csv")
+
+
+@benchmark("ft bulk export --all --format=jsonl")
+def bulk_export_jsonl(ws):
+    ws.ft("bulk", "export", "--all", "--format=jsonl")
+
+
+@benchmark("ft bulk delete (selection)", setup=restore_database, mutates=True)
+def bulk_delete(ws):
+    ws.ft("bulk", "delete", *ws.selection)
+
+
+# ----------------
+# ft fuel
+
+
+@benchmark("ft fuel add", mutates=True)
+def fuel_add(ws):
+    ws.ft(
+        "fuel",
+        "add",
+        ws.names[0],
+        "--date=2030-01-01",
+        "--fuel=40",
+        "--mileage=500",
+        "--cost=60",
+        input="y\n",
+    )
+
+
+def ingest_records(ws: Workspace) -> None:
+    """
+    1,000 NDJSON records spread over the selection.
+    """
+
+    start = datetime(2060, 1, 1)
+
+    lines = [
+        json.dumps(
+            {
+                "vehicle": ws.selection[i % len(ws.selection)],
+                "fill_date": (start + timedelta(days=i)).strftime("%Y-%m-%d"),
+                "fuel": 40.0,
+                "mileage": 550.0,
+                "cost": 60.0,
+            }
+        )
+        for i in range(1_000)
+    ]
+
+    ws.ingest = "\n".join(lines) + "\n"
+
+    restore_database(ws)
+
+
+@benchmark("ft fuel ingest (1,000 records)", setup=ingest_records, mutates=True)
+def fuel_ingest(ws):
+    ws.ft("fuel", "ingest", "--quiet", input=ws.ingest)
+
+
+# ----------------
+# ft report
+
+
+@benchmark("ft report show (selection, sql)")
+def report_show_sql(ws):
+    ws.ft("report", "show", *ws.selection, "--no-cache")
+
+
+@benchmark("ft report show (selection, numpy)")
+def report_show_numpy(ws):
+    ws.ft("report", "show", *ws.selection, "--no-cache", "--engine=numpy")
+
+
+@benchmark("ft report show (selection, cached)", setup=warm_report_cache)
+def report_show_cached(ws):
+    ws.ft("report", "show", *ws.selection)
+
+
+@benchmark("ft report show --tail=-1 (1 vehicle, sql)")
+def report_show_all_sql(ws):
+    ws.ft("report", "show", ws.names[0], "--tail=-1", "--no-cache")
+
+
+@benchmark("ft report show --tail=-1 (1 vehicle, numpy)")
+def report_show_all_numpy(ws):
+    ws.ft("report", "show", ws.names[0], "--tail=-1", "--no-cache", "--engine=numpy")
+
+
+@benchmark("ft report show --format=jsonl (selection, all)")
+def report_show_jsonl(ws):
+    ws.ft("report", "show", *ws.selection, "--tail=-1", "--format=jsonl")
+
+
+@benchmark("ft report show --format=csv --summary")
+def report_show_csv_summary(ws):
+    ws.ft("report", "show", *ws.selection, "--format=csv", "--summary")
+
+
+# ----------------
+# queries.py
+
+
+def read(ws: Workspace, statement):
+    with ws.db() as session:
+        return pd.read_sql(statement, session.connection())
+
+
+@benchmark("queries.vehicle_report (1 vehicle, all)")
+def query_vehicle_report(ws):
+    read(ws, vehicle_report(1, -1))
+
+
+@benchmark("queries.vehicle_report_summary (1 vehicle)")
+def query_vehicle_report_summary(ws):
+    read(ws, vehicle_report_summary(1, include_optional=True))
+
+
+@benchmark("queries.vehicles_report (selection, tail 10)")
+def query_vehicles_report(ws):
+    read(ws, vehicles_report(list(range(1, SELECTION + 1)), 10))
+
+
+@benchmark("queries.vehicles_report_summary (all)")
+def query_vehicles_report_summary(ws):
+    read(ws, vehicles_report_summary(list(range(1, len(ws.names) + 1)), True))
+
+
+@benchmark("metrics.vehicles_report (selection, all)")
+def metrics_vehicles_report(ws):
+    with ws.db() as session:
+        metrics.vehicles_report(session, list(range(1, SELECTION + 1)), -1)
+
+
+@benchmark("export.export_statement (all)")
+def query_export_statement(ws):
+    with ws.db() as session:
+        for _ in iter_batches(session, export_statement(None), 1_000):
+            pass
+
+
+# ----------------
+# Fleets and results
+
+
+def fleet_database(vehicles: int, records: int, seed: int) -> Path:
+    """
+    Return the path of the cached fleet database, generating it the
+    first time.
+    """
+
+    folder = HERE / ".fleets"
+    folder.mkdir(exist_ok=True)
+
+    path = folder / f"fleet-v{FLEET_VERSION}-{vehicles}x{records}-{seed}.db"
+
+    if not path.exists():
+        click.echo(f"Generating {vehicles} x {records} fleet (seed {seed})...")
+
+        tmp = path.with_suffix(".tmp")
+
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{tmp}{suffix}").unlink(missing_ok=True)
+
+        db = get_session(tmp)
+        write_database(db, generate_fleet(vehicles, records, seed))
+
+        # fold the WAL into the database file so one file can be copied
+        with db.begin() as session:
+            session.connection().exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        db.kw["bind"].dispose()
+
+        tmp.replace(path)
+
+    else:
+        # bring a fleet cached by an older version up to the current
+        # schema once, instead of in every timed run
+        db = get_session(path)
+
+        with db.begin() as session:
+            session.connection().exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        db.kw["bind"].dispose()
+
+    return path
+
+
+def git_commit() -> tuple[Optional[str], bool]:
+    """
+    Return the short hash of HEAD and whether the tree has changes.
+    """
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+    return commit, bool(dirty)
+
+
+def load_results(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def find_baseline(history: list[dict], run: dict, commit: Optional[str]) -> Optional[dict]:
+    """
+    Return the latest saved run of the same fleet on this machine (of
+    the commit, if given).
+    """
+
+    keys = ("machine", "fleet_version", "vehicles", "records", "seed")
+
+    for previous in reversed(history):
+
+        if any(previous.get(k) != run[k] for k in keys):
+            continue
+
+        if commit is None or (previous.get("commit") or "").startswith(commit):
+            return previous
+
+    return None
+
+
+def time_benchmark(ws: Workspace, bench: Benchmark, repeat: int) -> list[float]:
+    """
+    Run the benchmark `repeat` times and return the times.
+    """
+
+    times = []
+
+    for _ in range(repeat):
+
+        if ws.dirty:
+            ws.reset()
+
+        if bench.setup:
+            bench.setup(ws)
+
+        start = time.perf_counter()
+        bench.function(ws)
+        times.append(time.perf_counter() - start)
+
+        if bench.mutates:
+            ws.dirty = True
+
+    return times
+
+
+@click.command()
+@click.option(
+    "--size",
+    type=click.Choice(list(SIZES)),
+    default="small",
+    show_default=True,
+    help="The fleet size.",
+)
+@click.option(
+    "--vehicles",
+    type=click.IntRange(min=SELECTION),
+    help="The number of vehicles (overrides --size).",
+)
+@click.option(
+    "--records",
+    type=click.IntRange(min=1),
+    help="The number of fuel records per vehicle (overrides --size).",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=42,
+    show_default=True,
+    help="The fleet seed.",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="The number of times each benchmark is run, the best time is compared.",
+)
+@click.option(
+    "-k",
+    "keywords",
+    multiple=True,
+    help="Only run the benchmarks with this text in their name (repeatable).",
+)
+@click.option(
+    "--list",
+    "list_only",
+    is_flag=True,
+    help="List the benchmarks and exit.",
+)
+@click.option(
+    "--results",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=HERE / ".results" / "results.jsonl",
+    show_default=True,
+    help="The file the results are appended to.",
+)
+@click.option(
+    "--compare",
+    type=str,
+    help="Compare with the latest run of this commit instead of the previous run.",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=0.10,
+    show_default=True,
+    help="A benchmark that is this much slower (0.10 = 10%) is a regression.",
+)
+@click.option(
+    "--fail-on-regression",
+    is_flag=True,
+    help="Exit with a non-zero status if there are regressions.",
+)
+@click.option(
+    "--no-save",
+    is_flag=True,
+    help="Don't save the results of this run.",
+)
+def main(*args, **kwargs):
+
+    selected = [
+        b
+        for b in BENCHMARKS
+        if not kwargs["keywords"] or any(k in b.name for k in kwargs["keywords"])
+    ]
+
+    if kwargs["list_only"]:
+        for b in BENCHMARKS:
+            click.echo(b.name)
+
+        return
+
+    if not selected:
+        raise click.UsageError("No benchmarks match -k.")
+
+    vehicles, records = SIZES[kwargs["size"]]
+    vehicles = kwargs["vehicles"] or vehicles
+    records = kwargs["records"] or records
+
+    commit, dirty = git_commit()
+
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "fleet_version": FLEET_VERSION,
+        "vehicles": vehicles,
+        "records": records,
+        "seed": kwargs["seed"],
+        "repeat": kwargs["repeat"],
+        "results": {},
+    }
+
+    fleet_db = fleet_database(vehicles, records, kwargs["seed"])
+
+    history = load_results(kwargs["results"])
+    baseline = find_baseline(history, run, kwargs["compare"])
+
+    if kwargs["compare"] and baseline is None:
+        raise click.ClickException(f"No saved run of {kwargs['compare']} for this fleet.")
+
+    previous = baseline["results"] if baseline else {}
+
+    click.echo(
+        f"{vehicles:,} vehicles x {records:,} records, best of {kwargs['repeat']}"
+        + (f", compared with {baseline['commit']} ({baseline['timestamp']})" if baseline else "")
+    )
+    click.echo()
+    click.echo(f"{'benchmark':<46} {'best':>10} {'median':>10} {'previous':>10} {'change':>8}")
+
+    regressions = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        fleet_csv = write_csv(
+            tmp / "csv",
+            generate_fleet(SELECTION, records, kwargs["seed"]),
+        )
+
+        fleet_xlsx = tmp / "selection.xlsx"
+
+        pd.concat(pd.read_csv(p) for p in fleet_csv).to_excel(fleet_xlsx, index=False)
+
+        ws = Workspace(tmp / "config", fleet_db, fleet_csv, fleet_xlsx, vehicles)
+
+        for bench in selected:
+            times = time_benchmark(ws, bench, kwargs["repeat"])
+
+            best = min(times)
+            median = statistics.median(times)
+
+            run["results"][bench.name] = {"best": best, "median": median, "times": times}
+
+            line = f"{bench.name:<46} {best:>9.3f}s {median:>9.3f}s"
+
+            before = previous.get(bench.name, {}).get("best")
+
+            if before is None:
+                click.echo(line)
+                continue
+
+            change = (best - before) / before
+
+            line += f" {before:>9.3f}s {change:>+8.1%}"
+
+            if change > kwargs["threshold"] and best - before > NOISE_FLOOR:
+                regressions.append(bench.name)
+                click.secho(line + "  regression", fg="red")
+
+            else:
+                click.echo(line)
+
+        ws.remove_database()
+
+    if not kwargs["no_save"]:
+        kwargs["results"].parent.mkdir(parents=True, exist_ok=True)
+
+        with kwargs["results"].open("a", encoding="utf-8") as fo:
+            fo.write(json.dumps(run) + "\n")
+
+    if regressions:
+        click.echo()
+        click.secho(f"{len(regressions)} regression(s)", fg="red")
+
+        if kwargs["fail_on_regression"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   8e35b0d2-ca9d-11f1-a6c4-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+An asyncio database access layer (SQLAlchemy asyncio with aiosqlite)
+for servers and batch jobs that report on many vehicles at once.
+
+The statements are the same as the synchronous ones (models.py and
+queries.py), only the execution is asynchronous. aiosqlite runs each
+connection in its own thread and SQLite releases the GIL while it
+executes a statement, the reports of several vehicles are calculated
+concurrently on separate pooled connections and the caller can render
+one report while the others are still loading:
+
+    async with async_session(path) as sessionmaker:
+
+        async for vehicle, report, summary in vehicle_reports(sessionmaker, vids):
+            print(vehicle)
+            print(report.to_markdown())
+
+The engine has to be disposed when it is no longer needed (`async_session`
+does it on exit, or call `dispose`). The aiosqlite connections run in
+their own threads and the interpreter waits for them to finish before
+it exits.
+
+It requires the optional `async` dependencies:
+
+$ pip install 'fuel_tracker[async]'
+
+Reference:
+- https://docs.sqlalchemy.org/en/20/orm/extensions/asyncio.html
+- https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#module-sqlalchemy.dialects.sqlite.aiosqlite
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import asyncio
+
+from contextlib import asynccontextmanager
+from typing import Optional
+
+# ------------
+# 3rd Party - From PyPI
+
+import pandas as pd
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# ------------
+# Custom Modules
+
+from . import models
+from . import queries
+
+from .models import Vehicle, DEFAULT_PRAGMAS, WINDOW_FUNCTIONS, format_pragmas
+from .migrations import migrate
+from .common import require_aiosqlite
+
+# -------------
+
+
+async def get_async_session(path, pragmas: Optional[dict] = None, **engine_options):
+    """
+    The asyncio version of `models.get_session`. Given the path to the
+    sqlite database, return an async_sessionmaker. The pragmas and the
+    engine options are handled the same way and the database is
+    migrated if it is behind.
+
+    The connections are pooled (SQLAlchemy defaults to opening a new
+    aiosqlite connection per checkout), `pool_size` is the number of
+    vehicles that can be loaded at the same time. Close them with
+    `dispose` or use `async_session`.
+    """
+
+    require_aiosqlite()
+
+    engine_options.setdefault("poolclass", AsyncAdaptedQueuePool)
+
+    statements = format_pragmas(DEFAULT_PRAGMAS | (pragmas or {}))
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        echo=False,
+        **engine_options,
+    )
+
+    # The connection events are registered on the synchronous engine
+    # that the async engine wraps, the aiosqlite connection adapter
+    # accepts the same calls as pysqlite.
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+
+        for statement in statements:
+            cursor.execute(statement)
+
+        cursor.close()
+
+        # NOTE: aiosqlite doesn't wrap `create_window_function`. It is
+        # queued on the thread of the connection, the way aiosqlite
+        # runs its own `create_function`.
+        driver = dbapi_connection.driver_connection
+
+        for name, (count, aggregate) in WINDOW_FUNCTIONS.items():
+            dbapi_connection.await_(
+                driver._execute(driver._conn.create_window_function, name, count, aggregate)
+            )
+
+    async with engine.connect() as connection:
+        await connection.run_sync(lambda c: migrate(c.engine))
+
+    # the vehicles are used after their session is closed, don't expire
+    # them
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def dispose(sessionmaker) -> None:
+    """
+    Close the pooled connections of the sessionmaker returned by
+    `get_async_session`, their aiosqlite threads stop.
+    """
+
+    await sessionmaker.kw["bind"].dispose()
+
+
+@asynccontextmanager
+async def async_session(path, pragmas: Optional[dict] = None, **engine_options):
+    """
+    `get_async_session` as an async context manager, the engine is
+    disposed on exit:
+
+    async with async_session(path) as sessionmaker:
+        async with sessionmaker() as session:
+            ...
+    """
+
+    sessionmaker = await get_async_session(path, pragmas, **engine_options)
+
+    try:
+        yield sessionmaker
+
+    finally:
+        await dispose(sessionmaker)
+
+
+async def read_frame(session, statement) -> pd.DataFrame:
+    """
+    Execute the statement and return the rows as a DataFrame, the
+    asyncio version of `pd.read_sql`. The statement is executed on the
+    connection, skipping the ORM result processing.
+    """
+
+    connection = await session.connection()
+
+    result = await connection.execute(statement)
+
+    return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+
+async def select_vehicle_by_id(session, vid: int) -> Optional[Vehicle]:
+    """
+    Return the vehicle with the id or None if it doesn't exist.
+    """
+
+    result = await session.execute(models.select_vehicle_by_id(vid))
+
+    return result.scalars().first()
+
+
+async def select_vehicle_by_name(session, name: str) -> Optional[Vehicle]:
+    """
+    Return the vehicle with the name or None if it doesn't exist.
+    """
+
+    result = await session.execute(models.select_vehicle_by_name(name))
+
+    return result.scalars().first()
+
+
+async def vehicle_report(session, vid: int, tail: int = -1) -> pd.DataFrame:
+    """
+    Return the `ft report show` records of the vehicle as a DataFrame,
+    see `queries.vehicle_report`.
+    """
+
+    return await read_frame(session, queries.vehicle_report(vid, tail))
+
+
+async def vehicle_report_summary(
+    session,
+    vid: int,
+    include_optional: bool = False,
+) -> pd.DataFrame:
+    """
+    Return the yearly summary of the vehicle as a DataFrame, see
+    `queries.vehicle_report_summary`.
+    """
+
+    return await read_frame(
+        session,
+        queries.vehicle_report_summary(vid, include_optional),
+    )
+
+
+async def vehicle_reports(
+    sessionmaker,
+    vids: list[int],
+    tail: int = -1,
+    include_optional: bool = False,
+    concurrency: int = 4,
+):
+    """
+    Load the vehicles, their reports and yearly summaries concurrently
+    and yield (vehicle, report, summary) tuples as they complete (not
+    in the order of `vids`). Each vehicle is loaded in its own session,
+    at most `concurrency` at a time. Vehicles that don't exist are
+    skipped.
+
+    # Parameters
+
+    sessionmaker:async_sessionmaker
+        - The sessionmaker returned by `get_async_session`.
+
+    vids:list[int]
+        - The vehicle ids.
+
+    tail:int
+        - The number of records in the report, -1 for all of them.
+
+    include_optional:bool
+        - Include the optional summary columns.
+
+    concurrency:int
+        - The number of vehicles loaded at the same time. It should not
+          be larger than the connection pool.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load(vid: int):
+
+        async with semaphore, sessionmaker() as session:
+            vehicle = await select_vehicle_by_id(session, vid)
+
+            if vehicle is None:
+                return None
+
+            report = await vehicle_report(session, vid, tail)
+            summary = await vehicle_report_summary(session, vid, include_optional)
+
+            return vehicle, report, summary
+
+    tasks = [asyncio.ensure_future(load(vid)) for vid in dict.fromkeys(vids)]
+
+    try:
+        for task in asyncio.as_completed(tasks):
+            result = await task
+
+            if result is not None:
+                yield result
+
+    finally:
+        # the consumer stopped early, don't leave the loads running
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   d6f2a1b4-ca9c-11f1-8f3e-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+An on-disk cache for the `ft report show` results.
+
+Each entry is a pickle file in the cache folder, named after the SHA-256
+of its key. The key includes the data version of the vehicle (see
+`vehicle_versions`), any change to the vehicle or its fuel records
+changes the key and the stale entry is never read again. It ages out of
+the cache instead.
+
+The cache is a least recently used (LRU) cache bounded by the total size
+of the files. A hit touches the file, when the cache grows past its size
+the files that were used the longest time ago are deleted.
+
+Files are written to a temporary file and renamed into place so
+concurrent `ft` processes never read a partial entry.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from pathlib import Path
+from typing import Any, Optional
+
+# ------------
+# 3rd Party - From PyPI
+
+from sqlalchemy import select
+
+# ------------
+# Custom Modules
+
+from .models import VehicleVersion
+from .migrations import SCHEMA_VERSION
+
+# -------------
+
+# Change this when the cached values change shape to invalidate the
+# existing entries.
+CACHE_FORMAT = 1
+
+
+def vehicle_versions(session, vids: list[int]) -> dict[int, int]:
+    """
+    Return a dictionary mapping the vehicle_id to its data version, one
+    indexed lookup for all of the vehicles. Vehicles without a version
+    are not included.
+    """
+
+    result = session.execute(
+        select(VehicleVersion.vehicle_id, VehicleVersion.version).where(
+            VehicleVersion.vehicle_id.in_(vids)
+        )
+    )
+
+    return dict(result.all())
+
+
+def cache_key(**parts) -> str:
+    """
+    Return the cache key (a hex digest) of the keyword arguments. The
+    values must be JSON serializable.
+
+    The key includes the pandas and NumPy versions, the cached values
+    are pickled DataFrames and may not load in another version.
+    """
+
+    # NOTE: imported here, loading a cached value imports them anyway
+    import numpy as np
+    import pandas as pd
+
+    parts["format"] = CACHE_FORMAT
+    parts["schema"] = SCHEMA_VERSION
+    parts["pandas"] = pd.__version__
+    parts["numpy"] = np.__version__
+
+    key = json.dumps(parts, sort_keys=True, default=str)
+
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """
+    A size bounded LRU cache of pickled values in a folder.
+
+    # Parameters
+
+    folder:Path
+        - The folder to store the cache files in. It is created if it
+          doesn't exist.
+
+    max_size:int
+        - The maximum total size of the cache files in bytes. 0 disables
+          the cache.
+    """
+
+    suffix = ".pickle"
+
+    def __init__(self, folder: Path, max_size: int):
+
+        self.folder = Path(folder)
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def path(self, key: str) -> Path:
+        return self.folder / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the cached value of the key or None if it isn't in the
+        cache (or can't be read).
+        """
+
+        if not self.enabled:
+            return None
+
+        path = self.path(key)
+
+        try:
+            data = path.read_bytes()
+
+        except OSError:
+            self.misses += 1
+            return None
+
+        try:
+            value = pickle.loads(data)
+
+        except Exception:
+            # A damaged entry, or one pickled by another version of
+            # pandas or NumPy (AttributeError, ModuleNotFoundError,
+            # TypeError, ...). It will never load, delete it.
+            path.unlink(missing_ok=True)
+
+            self.misses += 1
+            return None
+
+        try:
+            # mark it as recently used
+            os.utime(path)
+
+        except OSError:
+            # evicted by another process
+            pass
+
+        self.hits += 1
+
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store the value in the cache and evict the least recently used
+        entries if the cache is over its size.
+        """
+
+        if not self.enabled:
+            return
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        if len(data) > self.max_size:
+            return
+
+        fd, tmp = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "wb") as fo:
+                fo.write(data)
+
+            os.replace(tmp, self.path(key))
+
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        """
+        Return the (last used time, size, path) of the cache files,
+        least recently used first.
+        """
+
+        entries = []
+
+        for path in self.folder.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+
+            except OSError:
+                # deleted by another process
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+
+        return entries
+
+    def evict(self) -> int:
+        """
+        Delete the least recently used entries until the cache fits in
+        max_size. Returns the number of entries deleted.
+        """
+
+        entries = self.entries()
+
+        size = sum(s for _, s, _ in entries)
+        deleted = 0
+
+        for _, entry_size, path in entries:
+
+            if size <= self.max_size:
+                break
+
+            path.unlink(missing_ok=True)
+
+            size -= entry_size
+            deleted += 1
+
+        return deleted
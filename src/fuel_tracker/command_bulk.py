@@ -25,23 +25,43 @@ from datetime import date
 # 3rd Party - From PyPI
 
 import click
-import pandas as pd
 
-from pandas import ExcelWriter
-
-from sqlalchemy import delete
+# NOTE: renamed, the `ft bulk delete` command function is named delete
+from sqlalchemy import delete as delete_statement
+from sqlalchemy import update as update_statement
 
 # ------------
 # Custom Modules
 
-from .models import (
-    Vehicle,
-    FuelRecord,
-    select_vehicle_by_id,
-    select_vehicle_by_name,
+from .models import Vehicle, VehicleVersion, rebuild_fuel_summary
+
+from .common import require_pyarrow
+
+from .resolver import VehicleResolver
+
+from .ingest import (
+    VEHICLE_COLUMNS,
+    DEFAULT_CHUNK_SIZE,
+    COLUMNAR_SUFFIXES,
+    normalize_chunk,
+    stream_add,
+    parallel_add,
 )
 
-from .common import is_int
+from .writer import BulkWriter, ADDED, UPDATED, UNCHANGED
+
+from .export import (
+    DEFAULT_BATCH_SIZE as DEFAULT_EXPORT_BATCH_SIZE,
+    CsvSink,
+    XlsxSink,
+    OdsSink,
+    TableSink,
+    JsonLinesSink,
+    CsvStreamSink,
+    ParquetSink,
+    FeatherSink,
+    export_vehicles,
+)
 
 # -------------
 
@@ -60,6 +80,27 @@ def bulk(*args, **kwargs):
     pass
 
 
+def echo_added(added: dict) -> None:
+    """
+    Display the vehicles and the fuel records written by `stream_add`
+    or `parallel_add`.
+    """
+
+    for name, (vid, count) in added.items():
+        click.echo(f"{vid} - {name}")
+
+        if isinstance(count, int):
+            click.echo(f"Fuel Records: {count}")
+
+        else:
+            click.echo(
+                f"Fuel Records: {count[ADDED]} added, {count[UPDATED]} updated, "
+                f"{count[UNCHANGED]} unchanged"
+            )
+
+        click.echo()
+
+
 @bulk.command("add")
 @click.pass_context
 @click.argument(
@@ -72,6 +113,42 @@ def bulk(*args, **kwargs):
         path_type=Path,
     ),
 )
+@click.option(
+    "--stream",
+    is_flag=True,
+    help=(
+        "Read the spreadsheets in chunks and write each chunk directly "
+        "to the database. Memory use stays flat regardless of the size "
+        "of the spreadsheet. Supports `.csv`, `.xlsx` and `.ods`. "
+        "Parquet and Feather files are always streamed."
+    ),
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CHUNK_SIZE,
+    show_default=True,
+    help="The number of rows to read and write at a time with `--stream`.",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help=(
+        "Parse the spreadsheets in parallel using `n` processes. "
+        "The database is written by a single process. Implies `--stream`."
+    ),
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help=(
+        "Only write the rows that are new or changed since the "
+        "spreadsheet was last imported, the rest are skipped. Vehicles "
+        "are matched by name. Implies `--stream`."
+    ),
+)
 def add(*args, **kwargs):
     """
     Add a new vehicle and fuel records from a spreadsheet to the
@@ -97,60 +174,116 @@ def add(*args, **kwargs):
 
     NOTE: The order doesn't matter.
 
+    With `--stream` the spreadsheet is read in chunks of `--chunk-size`
+    rows. Vehicles are matched by name, existing vehicles will have the
+    fuel records appended to them. CSV files are also supported in this
+    mode.
+
+    With `--jobs` the spreadsheets are parsed in parallel by a pool of
+    processes and written to the database, in one transaction, by this
+    process. This is useful for importing a directory of `.ods` files,
+    which are slow to parse.
+
+    Parquet (`.parquet`) and Arrow IPC/Feather (`.feather`, `.arrow`)
+    files written by `ft bulk export` are typed and are always read in
+    chunks, as if `--stream` was given. They require pyarrow.
+
+    With `--incremental` a spreadsheet can be imported again after rows
+    were added or changed. A row with a `fuel_id` (i.e. exported with
+    `ft bulk export`) that is in the database for the same vehicle
+    updates that fuel record if it changed. The other rows are compared with the fuel records of
+    their vehicle by content (date, mileage, fuel, cost, partial and
+    comment), the ones that aren't in the database are added. Without a
+    `fuel_id` column a changed row is added as a new fuel record.
+
     # Usage
 
     \b
     $ ft bulk add ./data/vw-passat-2015.ods
     $ ft bulk add ./data/vw-passat-2015.ods ./data/dodge-intrepid-1997.ods
     $ ft bulk add ./data/*.ods
+    $ ft bulk add ./data/fleet.csv --stream --chunk-size=50000
+    $ ft bulk add ./data/*.ods --jobs=4
+    $ ft bulk add ./fleet.parquet
+    $ ft bulk add ./data/fleet.csv --incremental
 
     """
 
     ctx = args[0]
     config = ctx.obj["config"]
 
+    if any(s.suffix.lower() in COLUMNAR_SUFFIXES for s in kwargs["spreadsheet"]):
+        require_pyarrow()
+
+    if kwargs["jobs"] > 1:
+
+        spreadsheets = list(kwargs["spreadsheet"])
+
+        click.echo(f"Processing {len(spreadsheets)} spreadsheets with {kwargs['jobs']} processes...")
+
+        with config["db"].begin() as session:
+            results = parallel_add(
+                session,
+                spreadsheets,
+                kwargs["chunk_size"],
+                kwargs["jobs"],
+                kwargs["incremental"],
+            )
+
+        for spreadsheet, added in results.items():
+            click.echo(f"{spreadsheet}:")
+            echo_added(added)
+
+        return
+
     for spreadsheet in kwargs["spreadsheet"]:
         click.echo(f"Processing {spreadsheet}...")
 
-        df = pd.read_excel(spreadsheet, parse_dates=["fill_date"])
-
-        # Fill NaN with 0, before casting to bool. Otherwise we end up
-        # with a lot of True values.
-        df["partial"] = df["partial"].fillna(0)
-        df = df.astype({"partial": bool})
-
-        vehicles = {}
-        vehicle_columns = [
-            "name",
-            "make",
-            "model",
-            "year",
-            "tank_capacity",
-            "initial_odometer",
-        ]
-
-        for vehicle_values, group in df.groupby(vehicle_columns):
-            new_vehicle = Vehicle(
-                **{k: v for k, v in zip(vehicle_columns, vehicle_values)}
-            )
+        if (
+            kwargs["stream"]
+            or kwargs["incremental"]
+            or spreadsheet.suffix.lower() in COLUMNAR_SUFFIXES
+        ):
 
-            # remove the vehicle columns from the dataframe
-            fr = group.drop(vehicle_columns, axis=1)
+            with config["db"].begin() as session:
+                added = stream_add(
+                    session,
+                    spreadsheet,
+                    kwargs["chunk_size"],
+                    kwargs["incremental"],
+                )
+
+            echo_added(added)
+
+            continue
+
+        import pandas as pd
 
-            new_vehicle.fuel_records = [
-                FuelRecord(**fuel_record) for fuel_record in fr.to_dict("records")
-            ]
+        df = normalize_chunk(pd.read_excel(spreadsheet))
+
+        for vehicle_values, group in df.groupby(VEHICLE_COLUMNS):
+
+            # remove the vehicle columns from the dataframe
+            fr = group.drop(VEHICLE_COLUMNS, axis=1)
 
             with config["db"].begin() as session:
-                session.add(new_vehicle)
-                session.flush()  # get the new id
+                writer = BulkWriter(session)
 
-                click.echo(new_vehicle)
+                vid = writer.add_vehicle(dict(zip(VEHICLE_COLUMNS, vehicle_values)))
+
+                records = fr.to_dict("records")
+
+                for record in records:
+                    record["vehicle_id"] = vid
+
+                writer.add_fuel_records(records)
+
+                click.echo(session.get(Vehicle, vid))
 
                 # create a vehicle format function that can handle the
                 # units (liters and kilometers)
 
-                click.echo(f"Fuel Records: {len(new_vehicle.fuel_records)}")
+                click.echo(f"Fuel Records: {writer.records_written}")
                 click.echo()
 
 
@@ -178,44 +311,50 @@ def delete(*args, **kwargs):
 
     with config["db"].begin() as session:
 
-        for vid in kwargs["vehicles"]:
-
-            click.echo(f"Deleting {vid}...")
-
-            if is_int(vid):
+        resolved, unresolved = VehicleResolver().resolve(session, kwargs["vehicles"])
 
-                statement = select_vehicle_by_id(vid)
+        for vehicle, reason in unresolved.items():
+            click.secho(f"{vehicle} {reason}, doing nothing!", fg="red")
 
-            else:
+        for vehicle in resolved:
+            click.echo(f"Deleting {vehicle}...")
 
-                statement = select_vehicle_by_name(vid)
-
-            selected_vehicle = session.execute(statement).first()
-
-            # NOTE: session.execute returns an iterable. Deal with it
-            # appropriately
+        if resolved:
+            # the fuel records are deleted by ON DELETE CASCADE
+            session.execute(
+                delete_statement(Vehicle).where(
+                    Vehicle.vehicle_id.in_(set(resolved.values()))
+                )
+            )
 
-            if len(selected_vehicle) == 1:
 
-                delete_query = delete(Vehicle).where(Vehicle.vehicle_id == vid)
-                session.execute(delete_query)
+@bulk.command("rebuild-summary")
+@click.pass_context
+def rebuild_summary(*args, **kwargs):
+    """
+    Recompute the yearly summary (FUEL_SUMMARY) table from the fuel
+    records. The table is kept up to date automatically, this is only
+    needed if the fuel records were changed with the triggers missing
+    (i.e. by an older version of Fuel Tracker).
 
-            elif len(selected_vehicle) == 0:
+    # Usage
 
-                click.secho(f"No matches for: {vid}", fg="cyan")
+    $ ft bulk rebuild-summary
+    """
 
-            else:
+    ctx = args[0]
+    config = ctx.obj["config"]
 
-                click.secho(
-                    f"More than one vehicle returned ({len(selected_vehicle)})! Doing Nothing!",
-                    fg="red",
-                )
+    with config["db"].begin() as session:
+        rebuild_fuel_summary(session.connection())
 
-                click.secho("Here are the returned Vehicles:", fg="red")
+        # the cached reports were built from the old summary, change the
+        # version of every vehicle so they are never read again
+        session.execute(
+            update_statement(VehicleVersion).values(version=VehicleVersion.version + 1)
+        )
 
-                for v in selected_vehicle:
-                    click.secho(v, fg="red")
-                    click.echo()
+    click.secho("Completed!", fg="cyan")
 
 
 @bulk.command("export")
@@ -255,6 +394,48 @@ def delete(*args, **kwargs):
     ),
     help="Write the vehicle(s) and fuel records to a csv file.",
 )
+@click.option(
+    "--parquet",
+    type=click.Path(
+        exists=False,
+        dir_okay=False,
+        readable=False,
+        path_type=Path,
+    ),
+    help="Write the vehicle(s) and fuel records to a Parquet file (requires pyarrow).",
+)
+@click.option(
+    "--feather",
+    type=click.Path(
+        exists=False,
+        dir_okay=False,
+        readable=False,
+        path_type=Path,
+    ),
+    help="Write the vehicle(s) and fuel records to an Arrow IPC/Feather file (requires pyarrow).",
+)
+@click.option(
+    "--format",
+    type=click.Choice(["table", "jsonl", "csv"]),
+    help=(
+        "Write the vehicle(s) and fuel records to stdout as a table per "
+        "vehicle (the default without a file), JSON Lines or one CSV table. "
+        "The records are written as they are read, it can be combined with "
+        "the files."
+    ),
+)
+@click.option(
+    "--all",
+    is_flag=True,
+    help="Export all of the vehicles in the database.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_EXPORT_BATCH_SIZE,
+    show_default=True,
+    help="The number of rows fetched from the database at a time.",
+)
 def export(*args, **kwargs):
     """
     bulk export the specified vehicles by name or id separated by spaces
@@ -264,11 +445,23 @@ def export(*args, **kwargs):
     - csv
     - excel
     - ods - open office format
-    - stdout
+    - parquet - columnar, requires pyarrow
+    - feather - Arrow IPC, columnar, requires pyarrow
+    - stdout - a table, JSON Lines or CSV (--format)
 
     The vehicle and fuel records will be combined into one table and
     exported to the file. If an output format isn't selected, it will
-    be displayed in the terminal.
+    be displayed in the terminal. Parquet and Feather write all of the
+    vehicles to a single file with typed columns.
+
+    For pipelines, `--format=jsonl` writes one JSON object per record
+    and `--format=csv` one CSV table of all of the vehicles to stdout
+    (the messages are written to stderr).
+
+    The records are streamed from the database `--batch-size` rows at a
+    time and written as they arrive (CSV and Excel), so memory stays
+    bounded no matter how many records are exported. The records of all
+    of the vehicles are read with one query, in vehicle id order.
 
     # Usage
 
@@ -280,77 +473,62 @@ def export(*args, **kwargs):
 
     $ ft bulk export passat intrepid 2 --ods=./output/file.ods
     $ ft bulk export passat intrepid soul matrix --ods=./output/data.ods --csv=./output/data.csv
+    $ ft bulk export passat intrepid --parquet=fleet.parquet --feather=fleet.feather
+    $ ft bulk export --all --excel=fleet.xlsx
+    $ ft bulk export --all --format=jsonl | jq .cost
+    $ ft bulk export passat intrepid --format=csv > fleet.csv
     """
 
     ctx = args[0]
     config = ctx.obj["config"]
 
-    output = []
-    with config["db"].begin() as session:
-
-        for vid in kwargs["vehicles"]:
-
-            click.echo(f"Exporting {vid}...")
-            click.echo()
+    if not kwargs["vehicles"] and not kwargs["all"]:
+        raise click.UsageError("Specify the vehicles to export or use --all.")
 
-            if is_int(vid):
+    sinks = []
 
-                statement = select_vehicle_by_id(vid, join=True)
+    if kwargs["csv"]:
+        sinks.append(CsvSink(kwargs["csv"]))
 
-            else:
+    if kwargs["excel"]:
+        sinks.append(XlsxSink(kwargs["excel"]))
 
-                statement = select_vehicle_by_name(vid, join=True)
+    if kwargs["ods"]:
+        sinks.append(OdsSink(kwargs["ods"]))
 
-            page_name = f"{vid}"
+    if kwargs["parquet"]:
+        sinks.append(ParquetSink(kwargs["parquet"]))
 
-            df = pd.read_sql(statement, session.connection())
-            df = df.drop(["vehicle_id", "vehicle_id_1"], axis=1)
+    if kwargs["feather"]:
+        sinks.append(FeatherSink(kwargs["feather"]))
 
-            if kwargs.get("csv", False):
+    if kwargs["format"] == "jsonl":
+        sinks.append(JsonLinesSink(click.get_binary_stream("stdout")))
 
-                csv_file = kwargs.get("csv")
-                df.to_csv(csv_file.parent / Path(f"{csv_file.stem}_{page_name}.csv"))
+    elif kwargs["format"] == "csv":
+        sinks.append(CsvStreamSink(click.get_text_stream("stdout")))
 
-            output.append((page_name, df))
+    elif kwargs["format"] == "table" or not sinks:
+        sinks.append(TableSink())
 
-    if kwargs.get("excel", False):
+    # keep stdout clean for the JSON Lines and CSV records
+    err = kwargs["format"] in ("jsonl", "csv")
 
-        with ExcelWriter(kwargs.get("excel")) as writer:
+    def on_vehicle(vehicle):
+        click.echo(f"Exporting {vehicle}...", err=err)
+        click.echo(err=err)
 
-            for page_name, df in output:
-                df.to_excel(writer, page_name, index=False)
+    def on_missing(vehicle, reason):
+        click.secho(f"{vehicle} {reason}, skipping.", fg="red", err=True)
 
-            writer.save()
-
-    if kwargs.get("ods", False):
-
-        with ExcelWriter(
-            kwargs.get("ods"),
-            engine="odf",
-        ) as writer:
-
-            for page_name, df in output:
-                # for some reason, export the fill_date as a datetime to
-                # ods assigns the cell formatting as a number. In the
-                # spreadsheet we can change the format to date and the
-                # value is displayed correctly, but the user shouldn't
-                # have to do that. We'll convert it to a string and leave it at that.
-                df["fill_date"] = pd.to_datetime(df["fill_date"]).dt.strftime(
-                    "%Y-%m-%d"
-                )
-                df.to_excel(writer, page_name, index=False)
-
-            writer.save()
-
-    if not kwargs.get("excel", False) and kwargs.get("ods", False):
-
-        for page_name, df in output:
-            click.echo(
-                df.to_markdown(
-                    index=False,
-                    tablefmt="pretty",
-                )
-            )
-            click.echo()
-
-    click.secho("Completed!", fg="cyan")
+    with config["db"].begin() as session:
+        export_vehicles(
+            session,
+            None if kwargs["all"] else kwargs["vehicles"],
+            sinks,
+            batch_size=kwargs["batch_size"],
+            on_vehicle=on_vehicle,
+            on_missing=on_missing,
+        )
+
+    click.secho("Completed!", fg="cyan", err=err)
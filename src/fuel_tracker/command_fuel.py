@@ -22,33 +22,24 @@
 
 import click
 
-from sqlalchemy import select
+from sqlalchemy import select, func
 from rich.console import Console
 
 # ------------
 # Custom Modules
 
-from .models import (
-    Vehicle,
-    FuelRecord,
-    select_vehicle_by_id,
-    select_vehicle_by_name,
-)
+from .models import Vehicle, FuelRecord
+
+from .common import date_format_strings
+
+from .resolver import VehicleResolver, NOT_A_VEHICLE
 
-from .common import is_int
+from .stream import ingest as ingest_stream
 
 # -------------
 
 console = Console()
 
-date_format_strings = [
-    "%Y-%m-%d",
-    "%d/%m/%y",
-    "%m/%d/%y",
-    "%d/%m/%Y",
-    "%m/%d/%Y",
-]
-
 
 @click.group("fuel")
 @click.pass_context
@@ -218,27 +209,18 @@ def add(*args, **kwargs):
 
     with config["db"].begin() as session:
 
-        # do we have an integer or a string?
-        if is_int(vid):
-
-            statement = select_vehicle_by_id(vid)
+        vehicle_id, reason = VehicleResolver().resolve_one(session, vid)
 
-        else:
+        if vehicle_id is None:
 
-            statement = select_vehicle_by_name(vid)
-
-        # NOTE: select(Vehicle) returns the SQL statement that must be
-        # executed against the engine.
-
-        selected_vehicle = session.execute(statement).first()
-
-        if selected_vehicle is None:
+            if reason != NOT_A_VEHICLE:
+                console.print(f"{vid} {reason}.", style="red")
 
             fuel_add_usage(vid, session)
 
             ctx.exit()
 
-        selected_vehicle = selected_vehicle[0]
+        selected_vehicle = session.get(Vehicle, vehicle_id)
 
         # Now that we have a valid vehicle, let's make sure we have
         # valid data.
@@ -283,13 +265,90 @@ def add(*args, **kwargs):
 
         if click.confirm("Is the Fuel Record Correct?", abort=True, default=True):
 
-            selected_vehicle.fuel_records.append(FuelRecord(**data))
+            # Insert the record directly with the foreign key, the
+            # vehicle's fuel records are never loaded.
+            session.add(FuelRecord(vehicle_id=selected_vehicle.vehicle_id, **data))
             session.flush()
 
-            console.print(
-                f"{len(selected_vehicle.fuel_records)} "
-                "Fuel Records associated with the vehicle."
-            )
+            count = session.execute(
+                select(func.count())
+                .select_from(FuelRecord)
+                .where(FuelRecord.vehicle_id == selected_vehicle.vehicle_id)
+            ).scalar()
+
+            console.print(f"{count} Fuel Records associated with the vehicle.")
+
+
+@fuel.command("ingest")
+@click.pass_context
+@click.argument(
+    "source",
+    type=click.File("r"),
+    default="-",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["ndjson", "csv"]),
+    default="ndjson",
+    show_default=True,
+    help="The format of the records. CSV requires a header line.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Commit after this many records.",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    show_default=True,
+    help="Commit pending records after this many seconds.",
+)
+@click.option(
+    "--quiet",
+    is_flag=True,
+    help="Don't report the rejected records.",
+)
+def ingest(*args, **kwargs):
+    """
+    Add a continuous stream of fuel records to the database from stdin
+    (or a file). There are no prompts or confirmations. The records are
+    committed in batches of `--batch-size` or every `--interval`
+    seconds, whichever comes first.
+
+    Each record must have a vehicle (name or id), fill_date, fuel,
+    mileage and cost. partial and comment are optional. Records that
+    can't be added are reported on stderr and skipped.
+
+    # Usage
+
+    \b
+    $ telematics-feed | ft fuel ingest
+    $ ft fuel ingest records.csv --format=csv
+    $ echo '{"vehicle": "passat", "fill_date": "2021-08-29", "fuel": 45.893, "mileage": 645.8, "cost": 54.35}' | ft fuel ingest
+    """
+
+    ctx = args[0]
+    config = ctx.obj["config"]
+
+    def on_error(line, message):
+        if not kwargs["quiet"]:
+            click.secho(f"Record {line}: {message}", fg="red", err=True)
+
+    added, rejected = ingest_stream(
+        config["db"],
+        kwargs["source"],
+        fmt=kwargs["fmt"],
+        batch_size=kwargs["batch_size"],
+        interval=kwargs["interval"],
+        on_error=on_error,
+    )
+
+    click.secho(f"{added} Fuel Records added, {rejected} rejected.", fg="cyan", err=True)
 
 
 # ft fuel show passat --records=10 <- default
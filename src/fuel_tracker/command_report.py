@@ -17,34 +17,82 @@
 # ------------
 # System Modules - Included with Python
 
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
 # ------------
 # 3rd Party - From PyPI
 
 import click
 
-import pandas as pd
-
 from rich.console import Console
 from sqlalchemy import select
 
 # ------------
 # Custom Modules
 
-from .models import (
-    Vehicle,
-    FuelRecord,
-    select_vehicle_by_id,
-    select_vehicle_by_name,
+from .models import Vehicle
+
+from .queries import (
+    vehicles_report,
+    vehicles_report_summary,
+    report_text,
+    ROLLING_WINDOW,
+    REPORT_ORDER,
+    SUMMARY_ORDER,
 )
 
-from .queries import vehicle_report, vehicle_report_summary
+from .cache import ReportCache, cache_key, vehicle_versions
+
+from .resolver import VehicleResolver
+
+from .profiling import phase
 
-from .common import integer_or_string
+from .render import table_lines, frame_table, indexed
+
+from .export import JsonLinesSink, CsvStreamSink, iter_batches
 
 # -------------
 
 console = Console()
 
+# The number of vehicles in one statement of `write_reports` and
+# `streamed_tables`. SQLite sorts the rows of the statement in memory,
+# this keeps it bounded no matter how many vehicles are written.
+REPORT_BATCH = 50
+
+# The friendly column names of the report and the summary
+REPORT_HEADERS = {
+    'fuel_id':'fuel (id)',
+    'fill_date':'fill date',
+    'cost_per_liter':'$/l',
+    'l_per_100km':'l/100km',
+    'l_per_100km_rolling':f'l/100km ({ROLLING_WINDOW})',
+    'mpg_us':'mpg (us)',
+    'mpg_imp':'mpg (imp)',
+}
+
+SUMMARY_HEADERS = {
+    'fill_ups':'Fill-Ups',
+    'total_mileage':'Mileage (Total)',
+    'total_fuel':'Fuel (Total)',
+    'total_cost':'Cost (Total)',
+    'min_mileage':'Mileage (Min)',
+    'max_mileage':'Mileage (Max)',
+    'avg_mileage':'Mileage (Avg)',
+    'min_fuel':'Fuel (Min)',
+    'max_fuel':'Fuel (Max)',
+    'avg_fuel':'Fuel (Avg)',
+    'min_cost':'Cost (Min)',
+    'max_cost':'Cost (Max)',
+    'avg_cost':'Cost (Avg)',
+    'avg_cost_per_liter':'$/l (Avg)',
+    'avg_l_per_100km':'l/100km (Avg)',
+    'mpg_us':'mpg (us) (Avg)',
+    'mpg_imp':'mpg (imp) (Avg)',
+}
+
 
 @click.group("report")
 @click.pass_context
@@ -55,6 +103,317 @@ def report(*args, **kwargs):
 
     pass
 
+def split_by_vehicle(df) -> dict:
+    """
+    Split the multi-vehicle report DataFrame into one DataFrame per
+    vehicle (without the vehicle_id column). Vehicles that don't have
+    any rows map to an empty DataFrame.
+    """
+
+    empty = df.drop(columns='vehicle_id').iloc[0:0]
+
+    groups = {
+        vid: group.drop(columns='vehicle_id')
+        for vid, group in df.groupby('vehicle_id', sort=False)
+    }
+
+    return defaultdict(lambda: empty.copy(), groups)
+
+
+def load_reports(session, vids, tail, extra_summary, engine) -> dict:
+    """
+    Load the reports and the yearly summaries of the vehicles, two
+    statements for all of them. Returns a dictionary mapping the
+    vehicle_id to the (report, summary) DataFrames.
+    """
+
+    # NOTE: pandas (and NumPy) are only imported when the reports are
+    # loaded as DataFrames, see `streamed_tables`.
+
+    import pandas as pd
+
+    if engine == "numpy":
+        from . import metrics
+
+        df = metrics.vehicles_report(session, vids, tail)
+
+    else:
+        df = pd.read_sql(vehicles_report(vids, tail), session.connection())
+
+    reports = split_by_vehicle(df)
+
+    summaries = split_by_vehicle(
+        pd.read_sql(
+            vehicles_report_summary(vids, include_optional=extra_summary),
+            session.connection(),
+        )
+    )
+
+    return {vid: (reports[vid], summaries[vid]) for vid in vids}
+
+
+def cached_reports(
+    session,
+    config,
+    vids,
+    tail,
+    extra_summary,
+    engine,
+    use_cache=True,
+) -> dict:
+    """
+    The cached version of `load_reports`. The reports are read from the
+    report cache (see cache.py) in the user configuration folder, the
+    vehicles that aren't cached are loaded in two statements and added
+    to the cache.
+    """
+
+    cache = ReportCache(
+        config["user_config"] / "cache",
+        config["settings"]["report_cache_size"] * 2**20 if use_cache else 0,
+    )
+
+    # NOTE: Read the versions before the reports. If the data changes in
+    # between, the newer report is stored under the older version and is
+    # never read.
+    with phase("cache lookup"):
+        versions = vehicle_versions(session, vids) if cache.enabled else {}
+
+        keys = {
+            vid: cache_key(
+                database=str(config["path_db"]),
+                vehicle_id=vid,
+                version=version,
+                tail=tail,
+                extra_summary=extra_summary,
+                engine=engine,
+            )
+            for vid, version in versions.items()
+        }
+
+        results = {}
+
+        for vid, key in keys.items():
+            value = cache.get(key)
+
+            if value is not None:
+                results[vid] = value
+
+    missing = [vid for vid in vids if vid not in results]
+
+    if missing:
+        with phase("query"):
+            loaded = load_reports(session, missing, tail, extra_summary, engine)
+
+        for vid in missing:
+            results[vid] = loaded[vid]
+
+            if vid in keys:
+                cache.put(keys[vid], loaded[vid])
+
+    return results
+
+
+def frame_tables(results) -> dict:
+    """
+    Return the tables of the (report, summary) DataFrames returned by
+    `cached_reports`. Returns a dictionary mapping the vehicle_id to
+    the [report, summary] tables, (headers, rows, widths) tuples for
+    `table_lines`.
+    """
+
+    return {
+        vid: [frame_table(df, REPORT_HEADERS), frame_table(df_totals, SUMMARY_HEADERS)]
+        for vid, (df, df_totals) in results.items()
+    }
+
+
+class VehicleRows:
+    """
+    Read the rows of a multi-vehicle statement, ordered by vehicle_id,
+    one vehicle at a time as they are read from the cursor. The rows of
+    the vehicles that come before the requested one are kept in memory,
+    only when the vehicles are requested out of vehicle_id order.
+    """
+
+    def __init__(self, rows):
+        self.groups = groupby(rows, key=itemgetter(0))
+        self.group = None
+        self.read = {}
+
+    def _next(self):
+        """
+        The next (vehicle_id, rows) group of the cursor or None. A group
+        is only read after the previous group was returned by `rows`.
+        """
+
+        if self.group is None:
+            self.group = next(self.groups, False)
+
+        return self.group or None
+
+    def rows(self, vid):
+        """
+        Return an iterator over the rows of the vehicle, empty if it
+        doesn't have any. Each vehicle is read once and the iterator
+        has to be exhausted before the next vehicle is read.
+        """
+
+        if vid in self.read:
+            return iter(self.read.pop(vid))
+
+        while (group := self._next()) is not None and group[0] < vid:
+            self.read[group[0]] = list(group[1])
+            self.group = None
+
+        if group is None or group[0] != vid:
+            return iter(())
+
+        self.group = None
+
+        return group[1]
+
+
+def streamed_table(rows, columns, headers) -> tuple:
+    """
+    Return the (headers, rows, widths) table of the rows of a single
+    vehicle for `table_lines`, see `VehicleRows`. The rows are text,
+    read from the cursor as the table is written, the widths are read
+    from the first row (see `report_text`). No pandas.
+    """
+
+    first = next(rows, None)
+
+    headers = [headers.get(c, c) for c in columns]
+
+    # like tabulate, an empty table doesn't have an index column
+    if first is None:
+        return headers, [], [0] * len(columns)
+
+    count, *widths = first[len(columns) + 1:]
+
+    def cells():
+        yield first[1:len(columns) + 1]
+
+        for row in rows:
+            yield row[1:len(columns) + 1]
+
+    return ['', *headers], indexed(cells()), [len(str(count - 1)), *widths]
+
+
+def streamed_tables(session, vids, tail, extra_summary):
+    """
+    Return a function that returns an iterator over the report and the
+    summary table of a vehicle_id (see `report_lines`). The vehicles
+    are requested in the order of `vids`, the report and the summary
+    statements are executed once for REPORT_BATCH vehicles at a time
+    and their rows are split by vehicle as the tables are written. See
+    `streamed_table`.
+    """
+
+    batches = {}
+
+    for start in range(0, len(vids), REPORT_BATCH):
+        ids = vids[start:start + REPORT_BATCH]
+
+        for vid in ids:
+            batches[vid] = ids
+
+    current = {'ids': None}
+
+    def execute(statement, order_by):
+        columns = [c.name for c in statement.selected_columns][1:]
+
+        result = session.execute(
+            report_text(statement, order_by).execution_options(yield_per=1000)
+        )
+
+        return VehicleRows(iter(result)), columns
+
+    def tables(vid):
+        ids = batches[vid]
+
+        if current['ids'] is not ids:
+            current['ids'] = ids
+            current['report'] = execute(vehicles_report(ids, tail), REPORT_ORDER)
+            current['summary'] = execute(
+                vehicles_report_summary(ids, include_optional=extra_summary),
+                SUMMARY_ORDER,
+            )
+
+        for name, headers in [('report', REPORT_HEADERS), ('summary', SUMMARY_HEADERS)]:
+            reader, columns = current[name]
+
+            yield streamed_table(reader.rows(vid), columns, headers)
+
+    return tables
+
+
+def write_reports(session, vehicles, sink, statement) -> int:
+    """
+    Stream the reports (or summaries) of the vehicles to the sink (see
+    export.py) as they are read from the cursor. `statement` returns the
+    multi-vehicle statement of a list of vehicle ids, it is executed for
+    REPORT_BATCH vehicles at a time. The vehicle name is added after the
+    vehicle_id, use `report_columns` for the columns of the sink. The
+    rows are in vehicle_id order.
+
+    Returns the number of rows written.
+    """
+
+    names = {v.vehicle_id: v.name for v in vehicles}
+    vids = sorted(names)
+
+    count = 0
+
+    try:
+        for start in range(0, len(vids), REPORT_BATCH):
+            ids = vids[start:start + REPORT_BATCH]
+
+            for batch in iter_batches(session, statement(ids)):
+                sink.write([(row[0], names[row[0]], *row[1:]) for row in batch])
+                count += len(batch)
+
+        sink.finish()
+
+    finally:
+        sink.close()
+
+    return count
+
+
+def report_columns(statement) -> list[str]:
+    """
+    The columns of the rows written by `write_reports`.
+    """
+
+    vehicle_id, *columns = [c.name for c in statement.selected_columns]
+
+    return [vehicle_id, 'name', *columns]
+
+
+def report_lines(vehicles, tables):
+    """
+    Yield the lines of `ft report show`, the vehicle, its report and
+    the summary by year. `tables` returns an iterator over the report
+    and summary tables of a vehicle_id.
+    """
+
+    for v in vehicles:
+        report_summary = tables(v.vehicle_id)
+
+        yield ''
+        yield str(v)
+        yield ''
+
+        yield from table_lines(*next(report_summary))
+
+        yield ''
+        yield 'Summary by Year:'
+
+        yield from table_lines(*next(report_summary))
+
+
 def report_show_usage(db):
     """
     Display how to use `$ ft report show` with examples from the
@@ -116,6 +475,46 @@ def report_show_usage(db):
     is_flag=True,
     help="Include extra columns in the summary report",
 )
+@click.option(
+    "--engine",
+    type=click.Choice(["sql", "numpy"]),
+    default="sql",
+    show_default=True,
+    help=(
+        "Calculate the report columns in SQLite (sql) or read the raw "
+        "history and calculate them with NumPy (numpy)."
+    ),
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help=(
+        "Don't read or write the report cache, always query the database. "
+        "The rows are written as they are read from SQLite."
+    ),
+)
+@click.option(
+    "--pager",
+    is_flag=True,
+    help="Display the reports in the system pager (i.e. less).",
+)
+@click.option(
+    "--format",
+    type=click.Choice(["table", "jsonl", "csv"]),
+    default="table",
+    show_default=True,
+    help=(
+        "Display the reports as tables or write the rows to stdout as JSON "
+        "Lines or CSV for other programs. jsonl and csv are streamed from "
+        "SQLite as they are read (--engine, the cache and --pager only apply "
+        "to the tables)."
+    ),
+)
+@click.option(
+    "--summary",
+    is_flag=True,
+    help="With --format=jsonl or csv, write the summary by year instead of the fuel records.",
+)
 def show(*args, **kwargs):
     """
     Display fuel information about the vehicles in a tabular format.
@@ -138,6 +537,18 @@ def show(*args, **kwargs):
 
     $ ft report show passat --tail=-1
 
+    The report columns are calculated by SQLite. To read the raw history
+    and calculate them with NumPy use `--engine=numpy`, it is faster
+    for long histories:
+
+    $ ft report show passat --tail=-1 --engine=numpy
+
+    The reports are cached (see `report_cache_size` in settings.toml)
+    until the vehicle or its fuel records change. To skip the cache use
+    `--no-cache`:
+
+    $ ft report show passat --no-cache
+
     To hide the partial and/or the comments columns use `--hide-partial`
     and/or `--hide-commments`:
 
@@ -149,136 +560,123 @@ def show(*args, **kwargs):
 
     And it will display a list of valid options.
 
+    To read the reports in other programs, write them to stdout as JSON
+    Lines (one object per row) or CSV. The rows are in vehicle id order,
+    the columns are named like the database columns. Use `--summary` for
+    the summary by year:
+
+    $ ft report show passat intrepid --tail=-1 --format=jsonl
+
+    $ ft report show passat --format=csv --summary > summary.csv
+
     """
 
     ctx = args[0]
     config = ctx.obj["config"]
 
-    # figure out which vehicles are id and which are names...
-    vehicle_ids, vehicle_names = integer_or_string(kwargs["vehicles"])
-
+    cache_size = config["settings"]["report_cache_size"]
 
     # do we have any arguments?
-    if len(vehicle_ids) == 0 and len(vehicle_names) == 0:
+    if len(kwargs["vehicles"]) == 0:
 
         report_show_usage(config["db"])
 
         ctx.exit()
 
 
+    # keep stdout clean for the JSON Lines and CSV rows
+    messages = console if kwargs["format"] == "table" else Console(stderr=True)
+
     with config["db"].begin() as session:
 
-        selected_vehicles = []
+        with phase("resolve vehicles"):
+            resolved, unresolved = VehicleResolver().resolve(session, kwargs["vehicles"])
 
-        if vehicle_ids:
+        for vehicle, reason in unresolved.items():
+            messages.print(f'{vehicle} {reason}.', style='red')
 
-            result = session.execute(
-                select(Vehicle).where(Vehicle.vehicle_id.in_(vehicle_ids))
-            )
+        vids = list(dict.fromkeys(resolved.values()))
 
-            # https://docs.sqlalchemy.org/en/14/orm/queryguide.html#selecting-orm-entities-and-attributes
-            selected_vehicles.extend(result.scalars().all())
+        if len(vids) == 0:
+            messages.print('No matching vehicles found.', style='red')
+            ctx.exit()
 
-        if vehicle_names:
+        result = session.execute(select(Vehicle).where(Vehicle.vehicle_id.in_(vids)))
 
-            result = session.execute(
-                select(Vehicle).where(Vehicle.name.in_(vehicle_names))
-            )
+        vehicles = {v.vehicle_id: v for v in result.scalars()}
 
-            selected_vehicles.extend(result.scalars().all())
+        # in the order they were requested
+        selected_vehicles = [vehicles[vid] for vid in vids]
 
-        if len(selected_vehicles) == 0:
-            console.print('No matching vehicles found.', style='red')
-            ctx.exit()
+        if kwargs["format"] != "table":
 
-        for v in selected_vehicles:
-
-            console.print()
-            console.print(v)
-            console.print()
-
-            # This call will load all of the records - for small data
-            # sets it doesn't matter
-            # console.print(len(v.fuel_records[-10:]))
-
-
-            # --------------------
-            # Load the vehicle report
-
-            statement = vehicle_report(v.vehicle_id, kwargs["tail"])
-            df = pd.read_sql(statement, session.connection())
-
-            # reverse the rows as the query will bring them in with the
-            # last date as the first entry, I want to see it as the
-            # first entry. Not really an elegant way to do it with pure SQL
-
-            df = df[::-1]
-            df.reset_index(inplace=True, drop=True)
-
-            # Load the vehicle summary report
-
-            summary_statement = vehicle_report_summary(v.vehicle_id, include_optional=kwargs['extra_summary'])
-            df_totals = pd.read_sql(summary_statement, session.connection())
-
-            # ----------------
-            # rename the columns to something more friendly
-
-            df_totals.rename(
-                columns={
-                    'fill_ups':'Fill-Ups',
-                    'total_mileage':'Mileage (Total)',
-                    'total_fuel':'Fuel (Total)',
-                    'total_cost':'Cost (Total)',
-                    'min_mileage':'Mileage (Min)',
-                    'max_mileage':'Mileage (Max)',
-                    'avg_mileage':'Mileage (Avg)',
-                    'min_fuel':'Fuel (Min)',
-                    'max_fuel':'Fuel (Max)',
-                    'avg_fuel':'Fuel (Avg)',
-                    'min_cost':'Cost (Min)',
-                    'max_cost':'Cost (Max)',
-                    'avg_cost':'Cost (Avg)',
-                    'avg_cost_per_liter':'$/l (Avg)',
-                    'avg_l_per_100km':'l/100km (Avg)',
-                    'mpg_us':'mpg (us) (Avg)',
-                    'mpg_imp':'mpg (imp) (Avg)',
-                },
-                inplace=True,
-            )
+            if kwargs["summary"]:
 
-            # rename the columsn
-            df.rename(
-                columns={
-                    'fuel_id':'fuel (id)',
-                    'fill_date':'fill date',
-                    'cost_per_liter':'$/l',
-                    'l_per_100km':'l/100km',
-                    'mpg_us':'mpg (us)',
-                    'mpg_imp':'mpg (imp)',
-                },
-                inplace=True,
-            )
+                def statement(ids):
+                    return vehicles_report_summary(
+                        ids,
+                        include_optional=kwargs["extra_summary"],
+                    )
 
-            # ----------------
+            else:
 
-            console.print(
-                df.to_markdown(
-                    index=True,
-                    tablefmt="pretty",
-                )
-            )
+                def statement(ids):
+                    return vehicles_report(ids, kwargs["tail"])
 
-            console.print()
-            console.print('Summary by Year:')
+            columns = report_columns(statement(vids))
 
-            console.print(
-                df_totals.to_markdown(
-                    index=True,
-                    tablefmt="pretty",
-                )
+            if kwargs["format"] == "jsonl":
+                sink = JsonLinesSink(click.get_binary_stream("stdout"), columns)
+
+            else:
+                sink = CsvStreamSink(click.get_text_stream("stdout"), columns)
+
+            with phase("write"):
+                write_reports(session, selected_vehicles, sink, statement)
+
+            return
+
+        # --------------------
+        # Load the vehicle reports and summaries
+
+        # without the cache the rows are written as they are read from
+        # SQLite, the cached reports are DataFrames
+
+        if kwargs["engine"] == "sql" and (kwargs["no_cache"] or not cache_size):
+
+            tables = streamed_tables(
+                session,
+                vids,
+                kwargs["tail"],
+                kwargs["extra_summary"],
             )
 
-            # Write to excel/ods/csv
+        else:
+            with phase("load reports"):
+                frames = frame_tables(
+                    cached_reports(
+                        session,
+                        config,
+                        vids,
+                        kwargs["tail"],
+                        kwargs["extra_summary"],
+                        kwargs["engine"],
+                        use_cache=not kwargs["no_cache"],
+                    )
+                )
+
+            def tables(vid):
+                return iter(frames[vid])
+
+        with phase("render"):
+            lines = report_lines(selected_vehicles, tables)
+
+            if kwargs["pager"]:
+                click.echo_via_pager(f"{line}\n" for line in lines)
+
+            else:
+                for line in lines:
+                    click.echo(line)
 
 
 # - Export to csv, excel, ods <- see bulk export
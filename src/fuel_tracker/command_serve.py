@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   4a0d3c86-ca9d-11f1-bd52-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+"""
+
+# ------------
+# System Modules - Included with Python
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+# ------------
+# Custom Modules
+
+from .models import get_session
+from .server import FuelTrackerAPI, FuelTrackerServer
+
+# -------------
+
+
+@click.command("serve")
+@click.pass_context
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    show_default=True,
+    help="The address to listen on.",
+)
+@click.option(
+    "--port",
+    type=click.IntRange(min=0, max=65535),
+    default=8765,
+    show_default=True,
+    help="The port to listen on.",
+)
+@click.option(
+    "--pool-size",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help=(
+        "The number of database connections kept open. Requests wait "
+        "for a free connection."
+    ),
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Don't read or write the report cache.",
+)
+@click.option(
+    "--quiet",
+    is_flag=True,
+    help="Don't log the requests.",
+)
+def serve(*args, **kwargs):
+    """
+    Serve the database as a local JSON HTTP API. The vehicles, fuel
+    records, reports and exports are available to other programs. The
+    database engine and its connections stay open between requests:
+
+    $ ft serve --port=8765
+
+    $ curl http://127.0.0.1:8765/vehicles
+
+    $ curl "http://127.0.0.1:8765/report?vehicle=passat&tail=5"
+
+    $ curl "http://127.0.0.1:8765/export?all=1"
+
+    $ curl -d '{"vehicle": "passat", "fill_date": "2021-08-29",
+    "mileage": 500, "fuel": 40, "cost": 55}' http://127.0.0.1:8765/fuel
+
+    Stop the server with Ctrl+C.
+    """
+
+    ctx = args[0]
+    config = dict(ctx.obj["config"])
+
+    # Replace the engine of `ft` with one sized for concurrent requests.
+    # The pysqlite statement cache keeps the prepared statements of each
+    # pooled connection.
+    config["db"].kw["bind"].dispose()
+
+    config["db"] = get_session(
+        config["path_db"],
+        config["settings"]["sqlite"],
+        pool_size=kwargs["pool_size"],
+        max_overflow=0,
+        pool_timeout=30,
+        connect_args={"cached_statements": 256},
+    )
+
+    api = FuelTrackerAPI(config, use_cache=not kwargs["no_cache"])
+
+    server = FuelTrackerServer((kwargs["host"], kwargs["port"]), api, quiet=kwargs["quiet"])
+
+    host, port = server.server_address[:2]
+
+    click.secho(f"Serving {config['path_db']} on http://{host}:{port}", fg="cyan", err=True)
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()
+        config["db"].kw["bind"].dispose()
@@ -18,6 +18,8 @@
 # ------------
 # System Modules - Included with Python
 
+from typing import Optional
+
 # ------------
 # 3rd Party - From PyPI
 
@@ -26,7 +28,48 @@
 
 # -------------
 
-# https://stackoverflow.com/a/9859202
+# The date formats accepted on the command line (and by `ft fuel
+# ingest`). The first format that matches is used.
+date_format_strings = [
+    "%Y-%m-%d",
+    "%d/%m/%y",
+    "%m/%d/%y",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+]
+
+# The range of a SQLite INTEGER (signed 64-bit). Larger values can't be
+# bound as a vehicle id.
+INTEGER_RANGE = range(-(2**63), 2**63)
+
+
+def parse_int(s: str) -> Optional[int]:
+    """
+    Return the integer value of the string or None if it isn't an
+    integer. Plain digit strings (the usual vehicle id) are converted
+    directly, anything else is accepted if it is a float with an integer
+    value (i.e. 4.0 or 1e3). Values outside of the SQLite INTEGER range
+    are not integers, they can only be names.
+    """
+
+    if s.isdecimal():
+        value = int(s)
+
+    else:
+        try:
+            value = float(s)
+
+        except (TypeError, ValueError):
+            return None
+
+        if not value.is_integer():
+            return None
+
+        value = int(value)
+
+    return value if value in INTEGER_RANGE else None
+
+
 def is_int(s: str) -> bool:
     """
     A method to determine if the string is indeed an integer.
@@ -34,31 +77,47 @@ def is_int(s: str) -> bool:
     Returns True if it is an integer, False otherwise
 
     """
+
+    return parse_int(str(s)) is not None
+
+
+def require_pyarrow():
+    """
+    Import and return pyarrow, an optional dependency used for the
+    Parquet and Feather formats. Raises a ClickException with the
+    install instructions if it isn't available.
+    """
+
     try:
+        import pyarrow
 
-        return float(str(s)).is_integer()
+    except ImportError:
+        import click
 
-    except:
+        raise click.ClickException(
+            "Parquet and Feather files require pyarrow: "
+            "pip install 'fuel_tracker[arrow]'"
+        )
 
-        return False
+    return pyarrow
 
 
-def integer_or_string(items: list[str]) -> tuple[list[str], list[str]]:
+def require_aiosqlite():
     """
-    given a list of strings return two lists, the first list will be the
-    strings that can be converted to integers. The second list will be
-    the list of strings that cannot be converted to a string.
+    Import and return aiosqlite, an optional dependency used for the
+    asyncio database access layer (see aio.py). Raises a ClickException
+    with the install instructions if it isn't available.
     """
 
-    number_items = []
-    string_items = []
-
-    for item in items:
+    try:
+        import aiosqlite
 
-        if is_int(item):
-            number_items.append(item)
+    except ImportError:
+        import click
 
-        else:
-            string_items.append(item)
+        raise click.ClickException(
+            "The asyncio database access requires aiosqlite: "
+            "pip install 'fuel_tracker[async]'"
+        )
 
-    return number_items, string_items
+    return aiosqlite
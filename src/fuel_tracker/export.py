@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   7f0c51e4-ca9b-11f1-b7a2-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Stream the vehicles and their fuel records out of the database for `ft
+bulk export`. The rows are pulled from the cursor in batches
+(`yield_per`) and handed to one or more sinks, so memory is bounded by
+the batch size instead of the size of the fleet.
+
+Each sink receives `start(page)`, `write(rows)` for every batch of the
+vehicle, `finish()` at the end of the vehicle and `close()` once all of
+the vehicles have been exported:
+
+- CsvSink - one CSV file per vehicle, written as the rows arrive
+- XlsxSink - openpyxl write-only workbook, one sheet per vehicle
+- OdsSink - odfpy has no streaming writer, one vehicle is held at a time
+- TableSink - displays one vehicle at a time in the terminal
+- JsonLinesSink - one JSON object per record (NDJSON) to a binary
+  stream, written as the rows arrive
+- CsvStreamSink - one CSV table of all of the vehicles to a text stream
+  (i.e. stdout), written as the rows arrive
+- ParquetSink - Parquet file, all vehicles in one file (requires pyarrow)
+- FeatherSink - Arrow IPC (Feather v2) file, all vehicles in one file
+  (requires pyarrow)
+
+Reference:
+- https://docs.sqlalchemy.org/en/20/orm/queryguide/api.html#fetching-large-result-sets-with-yield-per
+- https://openpyxl.readthedocs.io/en/stable/optimized.html#write-only-mode
+- https://arrow.apache.org/docs/python/parquet.html
+- https://arrow.apache.org/docs/python/ipc.html
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import csv
+import json
+
+from abc import ABC, abstractmethod
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterator, Optional
+
+# ------------
+# 3rd Party - From PyPI
+
+import click
+
+from sqlalchemy import select
+from sqlalchemy.sql.expression import Select
+
+# ------------
+# Custom Modules
+
+from .models import Vehicle, FuelRecord
+from .ingest import VEHICLE_COLUMNS, FUEL_COLUMNS
+from .common import require_pyarrow
+
+from .resolver import VehicleResolver
+
+# -------------
+
+# The columns of the export, this is the layout `ft bulk add` reads
+EXPORT_COLUMNS = VEHICLE_COLUMNS + FUEL_COLUMNS
+
+DEFAULT_BATCH_SIZE = 1_000
+
+# The number of rows buffered before a Parquet row group (or Arrow
+# record batch) is written
+ROW_GROUP_SIZE = 65_536
+
+
+def arrow_schema(pa):
+    """
+    Return the pyarrow schema of the EXPORT_COLUMNS.
+    """
+
+    return pa.schema(
+        [
+            ("name", pa.string()),
+            ("make", pa.string()),
+            ("model", pa.string()),
+            ("year", pa.int32()),
+            ("tank_capacity", pa.float64()),
+            ("initial_odometer", pa.float64()),
+            ("fuel_id", pa.int64()),
+            ("fill_date", pa.date32()),
+            ("mileage", pa.float64()),
+            ("fuel", pa.float64()),
+            ("cost", pa.float64()),
+            ("partial", pa.bool_()),
+            ("comment", pa.string()),
+        ]
+    )
+
+
+def select_export_vehicles(
+    session,
+    vehicles: Optional[list[str]],
+) -> tuple[dict, dict[str, str]]:
+    """
+    Given the vehicle names and ids (None for all of the vehicles),
+    resolve them (see resolver.py) and return a tuple of:
+
+    - a dictionary mapping the vehicle_id to a tuple of (page, values).
+      The page is the name or id used on the command line (the vehicle
+      name for all of the vehicles) and values is a tuple of the
+      VEHICLE_COLUMNS. A vehicle requested twice is exported once.
+    - a dictionary mapping the vehicles that don't resolve to the reason
+    """
+
+    columns = [Vehicle.__table__.c[c] for c in VEHICLE_COLUMNS]
+
+    statement = select(Vehicle.vehicle_id, *columns)
+
+    if vehicles is None:
+        return {
+            vid: (values[0], tuple(values))
+            for vid, *values in session.execute(statement)
+        }, {}
+
+    resolved, unresolved = VehicleResolver().resolve(session, vehicles)
+
+    statement = statement.where(Vehicle.vehicle_id.in_(set(resolved.values())))
+
+    found = {vid: tuple(values) for vid, *values in session.execute(statement)}
+
+    selected = {}
+
+    for vehicle, vid in resolved.items():
+
+        if vid not in selected:
+            selected[vid] = (f"{vehicle}", found[vid])
+
+    return selected, unresolved
+
+
+def export_statement(vids: Optional[list[int]]) -> Select:
+    """
+    Given the vehicle ids (None for all of the vehicles), return the
+    statement that selects the vehicle_id and the FUEL_COLUMNS of all of
+    their fuel records in one pass, ordered by vehicle and date. The
+    vehicle columns are added by `export_vehicles`, there is no join
+    (the records of vehicles that aren't selected are skipped there).
+    """
+
+    columns = [FuelRecord.__table__.c[c] for c in FUEL_COLUMNS]
+
+    statement = select(FuelRecord.vehicle_id, *columns)
+
+    if vids is None:
+        statement = statement.where(FuelRecord.vehicle_id.is_not(None))
+
+    else:
+        statement = statement.where(FuelRecord.vehicle_id.in_(vids))
+
+    # served by the ix_fuel_vehicle_fill_date index, no sort
+    return statement.order_by(
+        FuelRecord.vehicle_id,
+        FuelRecord.fill_date,
+        FuelRecord.fuel_id,
+    )
+
+
+def iter_batches(
+    session,
+    statement: Select,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[list[tuple]]:
+    """
+    Execute the statement and yield the rows in lists of at most
+    `batch_size` tuples.
+    """
+
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+class CsvSink:
+    """
+    Write each vehicle to `<stem>_<page>.csv` next to `path`. The first
+    column is a row index, the same as the files pandas wrote.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = None
+
+    def start(self, page: str) -> None:
+        self.file = open(
+            self.path.parent / Path(f"{self.path.stem}_{page}.csv"),
+            "w",
+            newline="",
+            encoding="utf-8",
+        )
+
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        self.writer.writerow([""] + EXPORT_COLUMNS)
+        self.index = 0
+
+    def write(self, rows: list[tuple]) -> None:
+        self.writer.writerows(
+            (i, *row) for i, row in enumerate(rows, start=self.index)
+        )
+
+        self.index += len(rows)
+
+    def finish(self) -> None:
+        self.file.close()
+        self.file = None
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+
+
+class XlsxSink:
+    """
+    Write each vehicle to a sheet of an Excel workbook. In write-only
+    mode openpyxl streams the rows to a temporary file as they are
+    appended.
+    """
+
+    def __init__(self, path: Path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+
+    def start(self, page: str) -> None:
+        self.sheet = self.workbook.create_sheet(page)
+        self.sheet.append(EXPORT_COLUMNS)
+
+    def write(self, rows: list[tuple]) -> None:
+        for row in rows:
+            self.sheet.append(row)
+
+    def finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+
+class OdsSink:
+    """
+    Write each vehicle to a sheet of an Open Office spreadsheet. odfpy
+    builds the document in memory, so this isn't bounded like the other
+    sinks, but only the current vehicle is held as a DataFrame.
+    """
+
+    def __init__(self, path: Path):
+        import pandas as pd
+
+        self.pd = pd
+        self.writer = pd.ExcelWriter(path, engine="odf")
+
+    def start(self, page: str) -> None:
+        self.page = page
+        self.rows = []
+
+    def write(self, rows: list[tuple]) -> None:
+        self.rows.extend(rows)
+
+    def finish(self) -> None:
+        df = self.pd.DataFrame.from_records(self.rows, columns=EXPORT_COLUMNS)
+
+        # for some reason, export the fill_date as a datetime to ods
+        # assigns the cell formatting as a number. In the spreadsheet we
+        # can change the format to date and the value is displayed
+        # correctly, but the user shouldn't have to do that. We'll
+        # convert it to a string and leave it at that.
+        df["fill_date"] = self.pd.to_datetime(df["fill_date"]).dt.strftime("%Y-%m-%d")
+
+        df.to_excel(self.writer, sheet_name=self.page, index=False)
+        self.rows = []
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class TableSink:
+    """
+    Display each vehicle in the terminal as a table.
+    """
+
+    def start(self, page: str) -> None:
+        self.rows = []
+
+    def write(self, rows: list[tuple]) -> None:
+        self.rows.extend(rows)
+
+    def finish(self) -> None:
+        from tabulate import tabulate
+
+        click.echo(tabulate(self.rows, headers=EXPORT_COLUMNS, tablefmt="pretty"))
+        click.echo()
+
+        self.rows = []
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesSink:
+    """
+    Write every record to a binary stream as a JSON object (one per
+    line) keyed by the columns (EXPORT_COLUMNS by default). Each batch
+    is encoded and written with one call.
+    """
+
+    def __init__(self, stream, columns: list[str] = EXPORT_COLUMNS):
+        self.stream = stream
+        self.columns = columns
+
+    def start(self, page: str) -> None:
+        pass
+
+    def write(self, rows: list[tuple]) -> None:
+        lines = "".join(
+            json.dumps(dict(zip(self.columns, row)), default=str) + "\n"
+            for row in rows
+        )
+
+        self.stream.write(lines.encode("utf-8"))
+
+    def finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class CsvStreamSink:
+    """
+    Write every record to a text stream (i.e. stdout) as one CSV table
+    with the columns (EXPORT_COLUMNS by default) as the header. Unlike
+    CsvSink there is no index column, the vehicles are told apart by
+    their columns.
+    """
+
+    def __init__(self, stream, columns: list[str] = EXPORT_COLUMNS):
+        self.stream = stream
+
+        self.writer = csv.writer(stream, lineterminator="\n")
+        self.writer.writerow(columns)
+
+    def start(self, page: str) -> None:
+        pass
+
+    def write(self, rows: list[tuple]) -> None:
+        self.writer.writerows(rows)
+
+    def finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class ArrowSink(ABC):
+    """
+    Write all of the vehicles to one columnar file. The rows are
+    converted to typed Arrow columns and buffered until there are
+    ROW_GROUP_SIZE of them. Subclasses open the writer.
+    """
+
+    def __init__(self, path: Path):
+        self.pa = require_pyarrow()
+        self.schema = arrow_schema(self.pa)
+        self.writer = self.open(path)
+
+        self.batches = []
+        self.buffered = 0
+
+    @abstractmethod
+    def open(self, path: Path):
+        """
+        Return the Arrow writer of the file, called with `self.pa` and
+        `self.schema` set.
+        """
+
+    def start(self, page: str) -> None:
+        pass
+
+    def write(self, rows: list[tuple]) -> None:
+        columns = zip(*rows)
+
+        self.batches.append(
+            self.pa.RecordBatch.from_arrays(
+                [
+                    self.pa.array(values, type=field.type)
+                    for values, field in zip(columns, self.schema)
+                ],
+                schema=self.schema,
+            )
+        )
+
+        self.buffered += len(rows)
+
+        if self.buffered >= ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.batches:
+            table = self.pa.Table.from_batches(self.batches).combine_chunks()
+            self.writer.write_table(table)
+
+        self.batches = []
+        self.buffered = 0
+
+    def finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+
+
+class ParquetSink(ArrowSink):
+    """
+    Write the vehicles to a Parquet file (snappy compressed).
+    """
+
+    def open(self, path: Path):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(path, self.schema)
+
+
+class FeatherSink(ArrowSink):
+    """
+    Write the vehicles to an Arrow IPC file (Feather v2, lz4
+    compressed). It can be memory mapped by the reader.
+    """
+
+    def open(self, path: Path):
+        return self.pa.ipc.new_file(
+            str(path),
+            self.schema,
+            options=self.pa.ipc.IpcWriteOptions(compression="lz4"),
+        )
+
+
+def export_vehicles(
+    session,
+    vehicles: Optional[list[str]],
+    sinks: list,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_vehicle=None,
+    on_missing=None,
+) -> int:
+    """
+    Stream the vehicles (names or ids, None for all of the vehicles) to
+    all of the sinks. The fuel records of every vehicle are fetched with
+    a single statement and split into pages (sheets or files) as the
+    vehicle changes. The sinks are closed when the export is finished,
+    even if it fails.
+
+    `on_vehicle(page)` is called before each vehicle is exported and
+    `on_missing(vehicle, reason)` for each vehicle that doesn't resolve
+    (it isn't in the database or is ambiguous).
+
+    Returns the number of fuel records exported.
+    """
+
+    selected, missing = select_export_vehicles(session, vehicles)
+
+    if on_missing:
+        for vehicle, reason in missing.items():
+            on_missing(vehicle, reason)
+
+    # the statement returns the vehicles in vehicle_id order
+    order = sorted(selected)
+    position = 0
+    current = None
+
+    count = 0
+
+    def next_vehicle():
+        nonlocal position, current
+
+        if current is not None:
+            for sink in sinks:
+                sink.finish()
+
+        current = order[position]
+        position += 1
+
+        page, _ = selected[current]
+
+        if on_vehicle:
+            on_vehicle(page)
+
+        for sink in sinks:
+            sink.start(page)
+
+    try:
+        if not order:
+            return 0
+
+        statement = export_statement(None if vehicles is None else order)
+
+        for batch in iter_batches(session, statement, batch_size):
+
+            for vid, run in groupby(batch, key=itemgetter(0)):
+
+                # fuel records without a vehicle (written with
+                # foreign_keys off) or of a vehicle added after the
+                # vehicles were selected
+                if vid not in selected:
+                    continue
+
+                # vehicles without fuel records get an empty page
+                while current != vid:
+                    next_vehicle()
+
+                values = selected[vid][1]
+                rows = [values + row[1:] for row in run]
+
+                count += len(rows)
+
+                for sink in sinks:
+                    sink.write(rows)
+
+        while position < len(order):
+            next_vehicle()
+
+        for sink in sinks:
+            sink.finish()
+
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    return count
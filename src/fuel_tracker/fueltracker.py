@@ -17,6 +17,10 @@
 # ------------
 # System Modules - Included with Python
 
+import sys
+import time
+import importlib
+
 from pathlib import Path
 
 # ------------
@@ -26,18 +30,12 @@ import click
 import toml
 from appdirs import AppDirs
 
-from rich.traceback import install
-
-install(show_locals=True)
-
 # ------------
 # Custom Modules
 
-from .models import get_session
-from .command_fuel import fuel
-from .command_vehicle import vehicle
-from .command_bulk import bulk
-from .command_report import report
+# NOTE: The command modules (and the database models) are imported when
+# the command is used, see LazyGroup. Keep the imports in this module
+# light, they are paid for on every invocation of `ft`.
 
 # -------------
 
@@ -45,6 +43,91 @@ __appname__ = "fuel_tracker"
 __company__ = "bluebill.net"
 
 
+def excepthook(*args):
+    """
+    Install the rich traceback handler the first time an exception
+    reaches the top level and let it display the exception. Importing
+    rich.traceback (and pygments) up front would slow down every
+    command.
+    """
+
+    from rich.traceback import install
+
+    install(show_locals=True)
+
+    sys.excepthook(*args)
+
+
+sys.excepthook = excepthook
+
+
+class LazyGroup(click.Group):
+    """
+    A click group that imports the module defining a subcommand only
+    when the subcommand is invoked. `lazy_commands` maps the command
+    name to a tuple of (module, attribute, short help). The short help
+    is used for `--help` so that it doesn't have to import every module.
+
+    Reference:
+    - https://click.palletsprojects.com/en/8.1.x/complex/#lazily-loading-subcommands
+    """
+
+    def __init__(self, *args, lazy_commands: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.lazy_commands = lazy_commands or {}
+
+        # (module, wall, cpu) of the imported commands for `ft --timings`,
+        # they are imported before `main` runs
+        self.import_times = []
+
+    def list_commands(self, ctx) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name: str):
+
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module, attribute, _ = self.lazy_commands[cmd_name]
+
+            wall = time.perf_counter()
+            cpu = time.process_time()
+
+            command = getattr(importlib.import_module(module, __package__), attribute)
+
+            self.import_times.append(
+                (module, time.perf_counter() - wall, time.process_time() - cpu)
+            )
+
+            self.add_command(command, cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        """
+        Same as click.Group.format_commands but commands that haven't
+        been loaded use the short help from `lazy_commands`.
+        """
+
+        rows = []
+
+        for name in self.list_commands(ctx):
+
+            if name in self.commands:
+                command = self.commands[name]
+
+                if command.hidden:
+                    continue
+
+                rows.append((name, command.get_short_help_str(formatter.width)))
+
+            else:
+                rows.append((name, self.lazy_commands[name][2]))
+
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
 def construct_config() -> dict:
     """
     Retrieve the user configuration.
@@ -68,6 +151,8 @@ def construct_config() -> dict:
         "date_format": "%Y-%m-%d",
         "fuel_unit": "l",
         "mileage_unit": "km",
+        "report_cache_size": 32,
+        "sqlite": {},
     }
 
     # Default Settings Keys:
@@ -88,6 +173,23 @@ def construct_config() -> dict:
     #   - The unit (km or mi) we'll assume for mileage data. It will be
     #     stored as kilometers in the database.
 
+    # - report_cache_size
+    #   - The size of the `ft report show` cache in MB (see cache.py).
+    #     It is stored in the `cache` folder next to the settings file.
+    #     Set it to 0 to disable the cache.
+
+    # - sqlite
+    #   - A table of SQLite pragmas applied to every connection. They
+    #     are merged over the defaults (models.DEFAULT_PRAGMAS):
+    #
+    #     [sqlite]
+    #     journal_mode = "WAL"
+    #     synchronous = "NORMAL"
+    #     cache_size = -64000
+    #     mmap_size = 268435456
+    #     temp_store = "MEMORY"
+    #     foreign_keys = true
+
     if settings_file.exists():
         config["settings"] |= toml.loads(settings_file.read_text())
 
@@ -103,9 +205,49 @@ def construct_config() -> dict:
     return config
 
 
-@click.group()
+@click.group(
+    cls=LazyGroup,
+    lazy_commands={
+        "bulk": (
+            ".command_bulk",
+            "bulk",
+            "Perform bulk operations on the database such as adding new...",
+        ),
+        "fuel": (".command_fuel", "fuel", "Manage vehicle fuel records."),
+        "report": (
+            ".command_report",
+            "report",
+            "Generate reports from various parts of the database.",
+        ),
+        "serve": (".command_serve", "serve", "Serve the database as a local JSON HTTP API."),
+        "vehicle": (".command_vehicle", "vehicle", "Manage the vehicles in the database."),
+    },
+)
 @click.version_option()
 @click.pass_context
+@click.option(
+    "--timings",
+    is_flag=True,
+    help=(
+        "Print the wall and CPU time of each phase of the command, the "
+        "number and time of the SQL statements and the peak memory on "
+        "stderr when it finishes."
+    ),
+)
+@click.option(
+    "--timings-json",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Write the --timings measurements to a JSON file.",
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help=(
+        "Profile the command with cProfile and write the statistics to "
+        "the file. A `.txt` file gets the report sorted by cumulative "
+        "time, anything else the pstats data (python -m pstats, snakeviz)."
+    ),
+)
 def main(*args, **kwargs):
     """
     Fuel Tracker is a tool to manage fuel receipts and report on them.
@@ -117,15 +259,76 @@ def main(*args, **kwargs):
     ctx = args[0]
     ctx.ensure_object(dict)
 
-    config = construct_config()
+    if kwargs["timings"] or kwargs["timings_json"] or kwargs["profile"]:
+        start_profiling(ctx, **kwargs)
+
+    from . import profiling
+
+    from .models import get_session
+
+    with profiling.phase("settings"):
+        config = construct_config()
 
     # get a connection to the database (create it if it doesn't exit)
-    config["db"] = get_session(config["path_db"])
+    with profiling.phase("open database"):
+        config["db"] = get_session(config["path_db"], config["settings"]["sqlite"])
 
     ctx.obj["config"] = config
 
+    # the subcommand runs after `main` returns, Profiler.finish closes it
+    profiling.PROFILER.begin("command")
+
+
+def start_profiling(ctx, **kwargs):
+    """
+    Enable the instrumentation of `ft --timings` (see profiling.py)
+    and/or cProfile. The results are written when the command finishes.
+    """
+
+    import cProfile
+
+    from sqlalchemy.engine import Engine
+
+    from .profiling import Profiler, activate
+
+    profiler = activate(Profiler(enabled=True))
+
+    for module, wall, cpu in ctx.command.import_times:
+        profiler.add(f"import {module}", wall, cpu)
+
+    # every engine, including the migrations
+    profiler.instrument(Engine)
+
+    cprofile = None
+
+    if kwargs["profile"]:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    def finish():
+        profiler.finish()
+
+        if cprofile is not None:
+            cprofile.disable()
+
+            if kwargs["profile"].suffix.lower() == ".txt":
+                import pstats
+
+                with kwargs["profile"].open("w", encoding="utf-8") as fo:
+                    stats = pstats.Stats(cprofile, stream=fo)
+                    stats.sort_stats("cumulative").print_stats(50)
+
+            else:
+                cprofile.dump_stats(kwargs["profile"])
+
+        if kwargs["timings"]:
+            from rich.console import Console
+
+            profiler.print_table(Console(stderr=True))
+
+        if kwargs["timings_json"]:
+            import json
+
+            kwargs["timings_json"].write_text(json.dumps(profiler.to_dict(), indent=2))
 
-main.add_command(fuel)
-main.add_command(vehicle)
-main.add_command(bulk)
-main.add_command(report)
+    ctx.call_on_close(finish)
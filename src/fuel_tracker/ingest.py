@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   5e760b9c-ca98-11f1-8f3a-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Read bulk spreadsheets (CSV, XLSX and ODS) in bounded row chunks so
+that large imports do not have to hold the entire sheet in memory.
+
+Multiple spreadsheets can be parsed in a process pool. The parsed
+chunks are funneled back through a queue to the calling process, which
+is the only one that writes to the database.
+
+Reference:
+- https://pandas.pydata.org/docs/user_guide/io.html#iterating-through-files-chunk-by-chunk
+- https://openpyxl.readthedocs.io/en/stable/optimized.html#read-only-mode
+- https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+"""
+
+# ------------
+# System Modules - Included with Python
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import multiprocessing as mp
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, TYPE_CHECKING
+
+# ------------
+# 3rd Party - From PyPI
+
+# pandas is imported on first use (see `_import_pandas`), it is the
+# slowest import in the package and most commands don't need it.
+if TYPE_CHECKING:
+    import pandas as pd
+
+# ------------
+# Custom Modules
+
+from .models import CONTENT_COLUMNS, content_hash
+from .writer import BulkWriter, ADDED, UPDATED
+
+# -------------
+
+VEHICLE_COLUMNS = [
+    "name",
+    "make",
+    "model",
+    "year",
+    "tank_capacity",
+    "initial_odometer",
+]
+
+FUEL_COLUMNS = [
+    "fuel_id",
+    "fill_date",
+    "mileage",
+    "fuel",
+    "cost",
+    "partial",
+    "comment",
+]
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Columnar formats, these require pyarrow (`pip install fuel_tracker[arrow]`)
+COLUMNAR_SUFFIXES = (".parquet", ".feather", ".arrow")
+
+
+def _import_pandas():
+    """
+    Import and return pandas. The first call also registers the sqlite
+    adapter for numpy integers so they are written as integers instead
+    of blobs.
+
+    https://stackoverflow.com/questions/57628273/saving-numpy-integers-in-sqlite-database-with-sqlalchemy
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    sqlite3.register_adapter(np.int64, lambda val: int(val))
+
+    return pd
+
+
+def _read_csv_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Read the CSV file `chunk_size` rows at a time.
+    """
+
+    pd = _import_pandas()
+
+    yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def _read_xlsx_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Read the first sheet of the Excel workbook `chunk_size` rows at a
+    time. openpyxl in read-only mode parses the sheet lazily so only the
+    current chunk is held in memory.
+    """
+
+    pd = _import_pandas()
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+
+        header = next(rows, None)
+
+        if header is None:
+            return
+
+        width = len(header)
+        batch = []
+
+        for row in rows:
+
+            # read-only mode can report trailing empty rows
+            if all(value is None for value in row):
+                continue
+
+            # Workbooks without a dimension (the write-only workbooks of
+            # `ft bulk export --excel`) leave out the trailing empty
+            # cells, the rows are padded to the header.
+            if len(row) != width:
+                row = (*row[:width], *[None] * (width - len(row)))
+
+            batch.append(row)
+
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=header)
+                batch = []
+
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=header)
+
+    finally:
+        wb.close()
+
+
+def _read_ods_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    odfpy has no streaming reader, the sheet has to be parsed in one go.
+    We still hand it out in chunks so the database side of the import
+    stays bounded.
+    """
+
+    pd = _import_pandas()
+
+    df = pd.read_excel(path, engine="odf")
+
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start : start + chunk_size]
+
+
+def _read_parquet_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Read the Parquet file `chunk_size` rows at a time. The columns are
+    typed, there is no parsing.
+    """
+
+    import pyarrow.parquet as pq
+
+    with pq.ParquetFile(path) as parquet:
+        for batch in parquet.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+def _read_feather_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Read the Arrow IPC (Feather v2) file one record batch at a time. The
+    file is memory mapped, the batch size is set by the writer.
+    """
+
+    import pyarrow as pa
+
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+
+            for start in range(0, batch.num_rows, chunk_size):
+                yield batch.slice(start, chunk_size).to_pandas()
+
+
+def read_chunks(
+    path: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Given the path to a CSV, XLSX, ODS, Parquet or Feather file, yield
+    normalized DataFrames of at most `chunk_size` rows. See
+    `normalize_chunk` for the transformations applied to each chunk.
+    """
+
+    suffix = path.suffix.lower()
+
+    if suffix == ".csv":
+        reader = _read_csv_chunks
+
+    elif suffix in (".xlsx", ".xlsm"):
+        reader = _read_xlsx_chunks
+
+    elif suffix == ".ods":
+        reader = _read_ods_chunks
+
+    elif suffix in COLUMNAR_SUFFIXES:
+        reader = _read_parquet_chunks if suffix == ".parquet" else _read_feather_chunks
+
+    else:
+        raise ValueError(f"Unsupported spreadsheet format: {path.suffix}")
+
+    for chunk in reader(path, chunk_size):
+        yield normalize_chunk(chunk)
+
+
+def normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean up a chunk of spreadsheet rows so it can be written directly
+    to the database:
+
+    - drop columns that are not part of the VEHICLE or FUEL tables
+      (i.e. the index column written by `ft bulk export --csv`)
+    - convert `fill_date` to a date
+    - convert `partial` to a bool (empty cells are False)
+    - replace NaN with None
+    """
+
+    pd = _import_pandas()
+
+    columns = [c for c in VEHICLE_COLUMNS + FUEL_COLUMNS if c in df.columns]
+    df = df[columns].copy()
+
+    df["fill_date"] = pd.to_datetime(df["fill_date"]).dt.date
+
+    # Fill NaN with 0, before casting to bool. Otherwise we end up
+    # with a lot of True values.
+    df["partial"] = df["partial"].fillna(0).astype(bool)
+
+    return df.astype(object).where(df.notna(), None)
+
+
+def stream_add(
+    session,
+    path: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    incremental: bool = False,
+) -> dict:
+    """
+    Import the spreadsheet into the database `chunk_size` rows at a
+    time. Vehicles are resolved by name as they are encountered and the
+    fuel records of each chunk are written with a `BulkWriter`.
+
+    With `incremental` the rows are matched with the fuel records in the
+    database (see `BulkWriter.match_fuel_records`), only the new and
+    changed rows are written.
+
+    Returns a dictionary mapping the vehicle name to a tuple of the
+    vehicle_id and the number of fuel records added. With `incremental`
+    the number is a Counter of the record statuses (added, updated and
+    unchanged).
+    """
+
+    writer = BulkWriter(session, batch_size=chunk_size)
+    counts = {}
+
+    for chunk in read_chunks(path, chunk_size):
+
+        for name, count in write_chunk(writer, chunk, incremental).items():
+            counts[name] = counts[name] + count if name in counts else count
+
+    return {name: (writer.vehicles[name], count) for name, count in counts.items()}
+
+
+def write_chunk(writer: BulkWriter, chunk: pd.DataFrame, incremental: bool = False) -> dict:
+    """
+    Write a normalized chunk of spreadsheet rows with the writer. The
+    vehicles in the chunk are resolved in one batch.
+
+    With `incremental` the rows are hashed and matched with the database
+    first and only the new and changed rows are converted to records and
+    written, a sheet that was imported before costs little more than
+    reading it.
+
+    Returns a dictionary mapping the vehicle name to the number of fuel
+    records written for it, or with `incremental`, to a Counter of the
+    record statuses.
+    """
+
+    vehicles = chunk[VEHICLE_COLUMNS].drop_duplicates("name")
+    vehicle_ids = writer.resolve_vehicles(vehicles.to_dict("records"))
+
+    if not incremental:
+        writer.add_fuel_records(fuel_records(chunk, vehicle_ids))
+
+        return chunk["name"].value_counts(sort=False).to_dict()
+
+    hashes = content_hashes(chunk)
+
+    fuel_ids = chunk["fuel_id"] if "fuel_id" in chunk.columns else [None] * len(chunk)
+    vids = [vehicle_ids[name] for name in chunk["name"]]
+
+    statuses = writer.match_fuel_records(list(zip(fuel_ids, vids, hashes)))
+
+    for status, write in (
+        (ADDED, writer.add_fuel_records),
+        (UPDATED, writer.update_fuel_records),
+    ):
+        rows = [i for i, s in enumerate(statuses) if s == status]
+
+        if rows:
+            changed = chunk.iloc[rows]
+
+            # the new records get their fuel_id from the database, the
+            # fuel_id of the row belongs to another database (or vehicle)
+            if status == ADDED:
+                changed = changed.drop(columns="fuel_id", errors="ignore")
+
+            write(fuel_records(changed, vehicle_ids, [hashes[i] for i in rows]))
+
+    counts = {}
+
+    for (name, status), count in Counter(zip(chunk["name"], statuses)).items():
+        counts.setdefault(name, Counter())[status] = count
+
+    return counts
+
+
+def fuel_records(chunk: pd.DataFrame, vehicle_ids: dict, hashes: list = None) -> list[dict]:
+    """
+    Return the fuel records (FUEL column values) of the normalized
+    chunk. `vehicle_ids` maps the vehicle names to their vehicle_id,
+    the content hashes of the rows can be given if they are known.
+    """
+
+    fuel_columns = [c for c in FUEL_COLUMNS if c in chunk.columns]
+
+    records = chunk[fuel_columns].to_dict("records")
+
+    for record, name in zip(records, chunk["name"]):
+        record["vehicle_id"] = vehicle_ids[name]
+
+    if hashes is not None:
+        for record, h in zip(records, hashes):
+            record["content_hash"] = h
+
+    return records
+
+
+def content_hashes(chunk: pd.DataFrame) -> list[int]:
+    """
+    Return the content hash (see `models.content_hash`) of each row of
+    the normalized chunk. The hashes are computed from the columns, the
+    rows are never converted to dictionaries.
+    """
+
+    columns = [
+        chunk[c] if c in chunk.columns else [None] * len(chunk)
+        for c in CONTENT_COLUMNS
+    ]
+
+    return [content_hash(*values) for values in zip(*columns)]
+
+
+def _parse_worker(path: Path, chunk_size: int, chunks, stop) -> None:
+    """
+    Runs in a worker process. Parse the spreadsheet and put each chunk
+    on the `chunks` queue as (path, chunk). When the spreadsheet is
+    finished (path, None) is sent. If parsing fails (path, exception)
+    is sent instead.
+
+    The queue is bounded, if the writer falls behind the workers block
+    here. `stop` is checked while blocked so the workers can be shut
+    down if the writer fails.
+    """
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+
+            except queue.Full:
+                continue
+
+        return False
+
+    try:
+        for chunk in read_chunks(path, chunk_size):
+            if not put((path, chunk)):
+                return
+
+    except Exception as e:
+        put((path, e))
+        return
+
+    put((path, None))
+
+
+def parallel_chunks(
+    paths: list[Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    jobs: int = 2,
+) -> Iterator[tuple[Path, pd.DataFrame]]:
+    """
+    Parse the spreadsheets in a pool of `jobs` processes and yield
+    (path, chunk) tuples as the chunks become available. The chunks of
+    different spreadsheets are interleaved, the chunks of the same
+    spreadsheet are yielded in order.
+
+    If a spreadsheet cannot be parsed, the exception is raised here. So
+    is the exception of a worker that failed without reporting it on the
+    queue (i.e. it was killed, BrokenProcessPool, or the parse error
+    couldn't be pickled).
+    """
+
+    with mp.Manager() as manager:
+
+        # Bound the queue so the parsed chunks waiting to be written
+        # doesn't grow without limit.
+        chunks = manager.Queue(maxsize=2 * jobs)
+        stop = manager.Event()
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+
+            futures = [
+                executor.submit(_parse_worker, path, chunk_size, chunks, stop)
+                for path in paths
+            ]
+
+            try:
+                remaining = len(paths)
+
+                while remaining:
+                    try:
+                        path, chunk = chunks.get(timeout=0.1)
+
+                    except queue.Empty:
+                        for future in futures:
+                            if future.done() and future.exception() is not None:
+                                raise future.exception()
+
+                        continue
+
+                    if chunk is None:
+                        remaining -= 1
+
+                    elif isinstance(chunk, Exception):
+                        raise chunk
+
+                    else:
+                        yield path, chunk
+
+            finally:
+                stop.set()
+                executor.shutdown(cancel_futures=True)
+
+
+def parallel_add(
+    session,
+    paths: list[Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    jobs: int = 2,
+    incremental: bool = False,
+) -> dict:
+    """
+    Import the spreadsheets into the database, parsing them in parallel
+    with `parallel_chunks`. All of the writing is done on the session
+    passed in, within its transaction. See `stream_add` for
+    `incremental`.
+
+    Returns a dictionary mapping each path to a dictionary of the
+    vehicle name to a tuple of the vehicle_id and the number of fuel
+    records added (see `stream_add`).
+    """
+
+    writer = BulkWriter(session, batch_size=chunk_size)
+    counts = {path: {} for path in paths}
+
+    for path, chunk in parallel_chunks(paths, chunk_size, jobs):
+
+        added = counts[path]
+
+        for name, count in write_chunk(writer, chunk, incremental).items():
+            added[name] = added[name] + count if name in added else count
+
+    return {
+        path: {name: (writer.vehicles[name], count) for name, count in added.items()}
+        for path, added in counts.items()
+    }
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   4c7e9a02-ca9c-11f1-a4d0-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+A NumPy metrics engine for `ft report show --engine=numpy`. The raw
+fuel record columns of all of the requested vehicles are read with one
+statement into NumPy arrays and the derived metrics are computed for
+the whole history at once, without a Python loop per record.
+
+The histories are ordered by vehicle_id, fill_date and fuel_id (the
+ix_fuel_vehicle_fill_date index order). Per vehicle calculations, like
+the days since the last fill-up, use the index of the first record of
+each vehicle to reset at the vehicle boundaries.
+
+The report columns match `queries.vehicles_report` so the engines can
+be swapped.
+
+Reference:
+- https://numpy.org/doc/stable/reference/generated/numpy.searchsorted.html
+- https://numpy.org/doc/stable/reference/generated/numpy.bincount.html
+"""
+
+# ------------
+# System Modules - Included with Python
+
+# ------------
+# 3rd Party - From PyPI
+
+import numpy as np
+
+from sqlalchemy import select, type_coerce, String
+
+# ------------
+# Custom Modules
+
+from .models import FuelRecord
+from .queries import ROLLING_WINDOW
+
+# -------------
+
+# kilometers to miles and liters to gallons (the same constants as the
+# SQL queries)
+MILES_PER_KM = 0.621371
+US_GALLONS_PER_LITER = 0.264172
+IMP_GALLONS_PER_LITER = 0.219969
+
+REPORT_COLUMNS = [
+    "vehicle_id",
+    "fuel_id",
+    "fill_date",
+    "days",
+    "mileage",
+    "fuel",
+    "cost",
+    "cost_per_liter",
+    "l_per_100km",
+    "l_per_100km_rolling",
+    "mpg_us",
+    "mpg_imp",
+]
+
+
+def history_statement(vids: list[int]):
+    """
+    Select the raw columns of the fuel records of the vehicles in index
+    order. The fill_date is left as the ISO string stored in SQLite,
+    NumPy parses it faster than SQLAlchemy can create date objects.
+    """
+
+    return (
+        select(
+            FuelRecord.vehicle_id,
+            FuelRecord.fuel_id,
+            type_coerce(FuelRecord.fill_date, String).label("fill_date"),
+            FuelRecord.mileage,
+            FuelRecord.fuel,
+            FuelRecord.cost,
+            FuelRecord.partial,
+        )
+        .where(FuelRecord.vehicle_id.in_(vids))
+        .order_by(FuelRecord.vehicle_id, FuelRecord.fill_date, FuelRecord.fuel_id)
+    )
+
+
+def to_history(rows: list[tuple]) -> dict[str, np.ndarray]:
+    """
+    Convert the rows of `history_statement` to a dictionary of NumPy
+    arrays, one per column. NULL values become NaN (or False for
+    partial).
+    """
+
+    if rows:
+        vehicle_id, fuel_id, fill_date, mileage, fuel, cost, partial = zip(*rows)
+
+    else:
+        vehicle_id = fuel_id = fill_date = mileage = fuel = cost = partial = ()
+
+    return {
+        "vehicle_id": np.array(vehicle_id, dtype=np.int64),
+        "fuel_id": np.array(fuel_id, dtype=np.int64),
+        "fill_date": np.array(fill_date, dtype="datetime64[D]"),
+        "mileage": np.array(mileage, dtype=np.float64),
+        "fuel": np.array(fuel, dtype=np.float64),
+        "cost": np.array(cost, dtype=np.float64),
+        "partial": np.array([bool(p) for p in partial], dtype=bool),
+    }
+
+
+def load_history(session, vids: list[int]) -> dict[str, np.ndarray]:
+    """
+    Read the fuel records of the vehicles with one statement and return
+    them as NumPy arrays. See `to_history`. The statement is executed
+    on the connection, skipping the ORM result processing.
+    """
+
+    return to_history(session.connection().execute(history_statement(vids)).all())
+
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """
+    Divide element wise. Division by zero is NaN (NULL in SQLite) rather
+    than infinity.
+    """
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator
+
+    result[~np.isfinite(result)] = np.nan
+
+    return result
+
+
+def round_half_away(values: np.ndarray, decimals: int = 3) -> np.ndarray:
+    """
+    Round to `decimals` places with ties away from zero, the way SQLite
+    `ROUND()` does. `np.round` rounds ties to even, 0.0125 would be 0.012
+    instead of 0.013.
+
+    SQLite rounds the decimal value, 32.7405 is a tie even though its
+    double is a little less. Scaling by 10**decimals can lose the last
+    bits, the scaled value is nudged up by a few ulps so these ties
+    round up too.
+    """
+
+    scale = 10.0**decimals
+    scaled = np.abs(values) * scale * (1 + 4 * np.finfo(np.float64).eps)
+
+    return np.sign(values) * np.floor(scaled + 0.5) / scale
+
+
+def vehicle_bounds(vehicle_id: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Given the sorted vehicle_id array, return the index of the first
+    and the last record of the vehicle of every record.
+    """
+
+    first = np.searchsorted(vehicle_id, vehicle_id, side="left")
+    last = np.searchsorted(vehicle_id, vehicle_id, side="right") - 1
+
+    return first, last
+
+
+def days_between(fill_date: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """
+    The number of days since the previous fill-up of the vehicle, 0 for
+    the first fill-up.
+    """
+
+    days = np.zeros(len(fill_date), dtype=np.int64)
+    days[1:] = np.diff(fill_date).astype(np.int64)
+    days[first == np.arange(len(fill_date))] = 0
+
+    return days
+
+
+def rolling_l_per_100km(
+    fuel: np.ndarray,
+    mileage: np.ndarray,
+    first: np.ndarray,
+    window: int = ROLLING_WINDOW,
+) -> np.ndarray:
+    """
+    The l/100km of the last `window` fill-ups of the vehicle (fewer at
+    the start of the history), from the total fuel and mileage of the
+    window. The window sums are differences of cumulative sums.
+    """
+
+    index = np.arange(len(fuel))
+    start = np.maximum(index - (window - 1), first)
+
+    total_fuel = np.concatenate(([0.0], np.cumsum(np.nan_to_num(fuel))))
+    total_mileage = np.concatenate(([0.0], np.cumsum(np.nan_to_num(mileage))))
+
+    return 100 * ratio(
+        total_fuel[index + 1] - total_fuel[start],
+        total_mileage[index + 1] - total_mileage[start],
+    )
+
+
+def tank_totals(
+    fuel: np.ndarray,
+    mileage: np.ndarray,
+    partial: np.ndarray,
+    first: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The fuel and mileage of each full tank. The consumption can only be
+    measured when the tank is filled, the fuel and mileage of partial
+    fill-ups are carried forward to the next full fill-up of the
+    vehicle. Partial fill-ups (and partial fill-ups at the end of the
+    history) are NaN.
+
+    Every full fill-up closes a segment. The segment ids are a
+    cumulative sum of the segment starts and the segment totals are a
+    weighted bincount, linear in the number of records. See
+    `queries.fuel_history` for the SQL version.
+    """
+
+    n = len(fuel)
+
+    if n == 0:
+        return np.array([], dtype=np.float64), np.array([], dtype=np.float64)
+
+    full = ~partial
+
+    # a segment starts at the first record of each vehicle and after
+    # every full fill-up
+    starts = first == np.arange(n)
+    starts[1:] |= full[:-1]
+
+    segment = np.cumsum(starts) - 1
+
+    tank_fuel = np.bincount(segment, weights=np.nan_to_num(fuel))[segment]
+    tank_mileage = np.bincount(segment, weights=np.nan_to_num(mileage))[segment]
+
+    tank_fuel[partial] = np.nan
+    tank_mileage[partial] = np.nan
+
+    return tank_fuel, tank_mileage
+
+
+def compute_metrics(history: dict[str, np.ndarray], window: int = ROLLING_WINDOW) -> dict[str, np.ndarray]:
+    """
+    Given the history arrays (see `to_history`), return a dictionary of
+    the history plus the derived metrics:
+
+    - days - days since the previous fill-up
+    - cost_per_liter
+    - l_per_100km - of the tank, see `tank_totals`
+    - l_per_100km_rolling - over the last `window` fill-ups
+    - mpg_us - of the tank
+    - mpg_imp - of the tank
+
+    The economy of partial fill-ups is NaN.
+
+    The ratios are rounded the same way as the SQL report.
+    """
+
+    mileage = history["mileage"]
+    fuel = history["fuel"]
+
+    first, _ = vehicle_bounds(history["vehicle_id"])
+
+    tank_fuel, tank_mileage = tank_totals(fuel, mileage, history["partial"], first)
+
+    tank_miles = tank_mileage * MILES_PER_KM
+
+    metrics = dict(history)
+
+    metrics["days"] = days_between(history["fill_date"], first)
+    metrics["cost_per_liter"] = round_half_away(ratio(history["cost"], fuel))
+    metrics["l_per_100km"] = round_half_away(100 * ratio(tank_fuel, tank_mileage))
+    metrics["l_per_100km_rolling"] = round_half_away(
+        rolling_l_per_100km(fuel, mileage, first, window)
+    )
+    metrics["mpg_us"] = round_half_away(ratio(tank_miles, tank_fuel * US_GALLONS_PER_LITER))
+    metrics["mpg_imp"] = round_half_away(ratio(tank_miles, tank_fuel * IMP_GALLONS_PER_LITER))
+
+    return metrics
+
+
+def tail_mask(vehicle_id: np.ndarray, tail: int) -> np.ndarray:
+    """
+    Select the last `tail` records of every vehicle, -1 selects all of
+    them.
+    """
+
+    if tail < 0:
+        return np.ones(len(vehicle_id), dtype=bool)
+
+    _, last = vehicle_bounds(vehicle_id)
+
+    return last - np.arange(len(vehicle_id)) < tail
+
+
+def vehicles_report(session, vids: list[int], tail: int = -1):
+    """
+    The NumPy version of `queries.vehicles_report`. Returns a DataFrame
+    with the REPORT_COLUMNS of the last `tail` records of each vehicle,
+    ordered by vehicle_id and fill_date. The metrics are calculated on
+    the full history so the first row of the tail has the correct days
+    and rolling average.
+    """
+
+    import pandas as pd
+
+    metrics = compute_metrics(load_history(session, vids))
+
+    mask = tail_mask(metrics["vehicle_id"], tail)
+
+    df = pd.DataFrame({c: metrics[c][mask] for c in REPORT_COLUMNS})
+
+    # match the python dates that read_sql returns for the SQL engine
+    df["fill_date"] = metrics["fill_date"][mask].astype(object)
+
+    return df
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   0b4e7a52-ca9b-11f1-9d36-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Forward-only schema migrations for the database.
+
+The schema version is stored in the database header with `PRAGMA
+user_version`. At startup `migrate` reads it (one cheap statement) and
+only runs DDL when the database is behind `SCHEMA_VERSION`. Databases
+created before the version stamp existed report 0 and are brought up to
+date by the first migration.
+
+To change the schema, append a function to MIGRATIONS. It receives the
+connection, runs inside the migration transaction and must never be
+changed once released - write a new migration instead.
+
+Reference:
+- https://www.sqlite.org/pragma.html#pragma_user_version
+- https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#serializable-isolation-savepoints-transactional-ddl
+"""
+
+# ------------
+# System Modules - Included with Python
+
+# ------------
+# 3rd Party - From PyPI
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+# ------------
+# Custom Modules
+
+from .models import (
+    Base,
+    FuelRecord,
+    FuelSummary,
+    VehicleVersion,
+    FUEL_SUMMARY_TRIGGERS,
+    VEHICLE_VERSION_TRIGGERS,
+    CONTENT_COLUMNS,
+    content_hash,
+    rebuild_fuel_summary,
+)
+
+# -------------
+
+
+class SchemaError(RuntimeError):
+    """
+    The database schema is newer than this version of Fuel Tracker.
+    """
+
+
+def _baseline(connection) -> None:
+    """
+    Version 1 - create the tables, the report indexes and the
+    FUEL_SUMMARY triggers. Safe to run against databases that were
+    created before the schema was versioned.
+    """
+
+    # Is this database older than the FUEL_SUMMARY table? If so it will
+    # need to be populated once it is created.
+    new_summary = not inspect(connection).has_table(FuelSummary.__tablename__)
+
+    # https://docs.sqlalchemy.org/en/14/core/metadata.html#creating-and-dropping-database-tables
+    Base.metadata.create_all(connection)
+
+    # create_all skips the indexes of tables that already exist. Create
+    # any that are missing so existing databases pick them up. NOTE:
+    # reflection can't see expression indexes, so checkfirst=True won't
+    # work here, let SQLite do the check.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+    for trigger in FUEL_SUMMARY_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+    if new_summary:
+        rebuild_fuel_summary(connection)
+
+
+def _partial_covering_index(connection) -> None:
+    """
+    Version 2 - add the partial column to the ix_fuel_vehicle_fill_date
+    covering index, the report carries the fuel of partial fill-ups
+    forward to the next full tank.
+    """
+
+    index = next(
+        i for i in FuelRecord.__table__.indexes
+        if i.name == "ix_fuel_vehicle_fill_date"
+    )
+
+    connection.execute(DropIndex(index, if_exists=True))
+    connection.execute(CreateIndex(index))
+
+
+def _vehicle_versions(connection) -> None:
+    """
+    Version 3 - the VEHICLE_VERSION modification counters used to
+    validate the cached reports (see cache.py).
+    """
+
+    VehicleVersion.__table__.create(connection, checkfirst=True)
+
+    for trigger in VEHICLE_VERSION_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO VEHICLE_VERSION (vehicle_id, version) "
+        "SELECT vehicle_id, random() FROM VEHICLE"
+    )
+
+
+def _content_hash(connection) -> None:
+    """
+    Version 4 - the FUEL.content_hash column (see models.content_hash)
+    and its index. The existing fuel records are hashed in one `UPDATE`
+    with the hash registered as an SQL function on this connection.
+    """
+
+    columns = [c["name"] for c in inspect(connection).get_columns(FuelRecord.__tablename__)]
+
+    # new databases already have the column (create_all)
+    if "content_hash" not in columns:
+        connection.exec_driver_sql("ALTER TABLE FUEL ADD COLUMN content_hash INTEGER")
+
+    # NOTE: the DBAPI connection, not the driver connection. With
+    # aiosqlite the driver's create_function is a coroutine, the adapter
+    # waits for it.
+    connection.connection.dbapi_connection.create_function(
+        "content_hash",
+        len(CONTENT_COLUMNS),
+        content_hash,
+        deterministic=True,
+    )
+
+    connection.exec_driver_sql(
+        f"UPDATE FUEL SET content_hash = content_hash({', '.join(CONTENT_COLUMNS)}) "
+        "WHERE content_hash IS NULL"
+    )
+
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_fuel_vehicle_content_hash "
+        "ON FUEL (vehicle_id, content_hash)"
+    )
+
+
+# The migrations in order, MIGRATIONS[n] upgrades version n to n + 1.
+MIGRATIONS = [
+    _baseline,
+    _partial_covering_index,
+    _vehicle_versions,
+    _content_hash,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(connection) -> int:
+    """
+    Return the schema version stamped in the database.
+    """
+
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine) -> int:
+    """
+    Bring the database up to SCHEMA_VERSION. Returns the number of
+    migrations that were applied, 0 if the database was current.
+
+    All pending migrations run in a single `BEGIN IMMEDIATE`
+    transaction (SQLite DDL is transactional), so a failed migration
+    leaves the database untouched and concurrent `ft` processes wait for
+    the first one to finish instead of migrating twice.
+    """
+
+    with engine.connect() as connection:
+        version = schema_version(connection)
+
+    if version == SCHEMA_VERSION:
+        return 0
+
+    if version > SCHEMA_VERSION:
+        raise SchemaError(
+            f"The database schema (version {version}) is newer than this "
+            f"version of Fuel Tracker supports (version {SCHEMA_VERSION})."
+        )
+
+    # pysqlite doesn't wrap DDL in a transaction, manage it ourselves.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        try:
+            # another process may have migrated while we waited for the
+            # lock
+            start = schema_version(connection)
+
+            for version, migration in enumerate(MIGRATIONS[start:], start=start + 1):
+                migration(connection)
+
+                # PRAGMA can't take bound parameters, version is an int
+                connection.exec_driver_sql(f"PRAGMA user_version = {version:d}")
+
+            connection.exec_driver_sql("COMMIT")
+
+        except BaseException:
+            connection.exec_driver_sql("ROLLBACK")
+            raise
+
+    return SCHEMA_VERSION - start
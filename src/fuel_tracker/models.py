@@ -17,11 +17,16 @@
 Reference:
 - https://realpython.com/python-sqlite-sqlalchemy/#working-with-sqlalchemy-and-python-objects
 - https://docs.sqlalchemy.org/en/14/core/type_basics.html
+- https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#foreign-key-support
+- https://www.sqlite.org/pragma.html
 """
 
 # ------------
 # System Modules - Included with Python
 
+import re
+import hashlib
+
 from typing import Optional
 
 # ------------
@@ -30,14 +35,15 @@ from typing import Optional
 
 from sqlalchemy.ext.declarative import declarative_base
 
-from sqlalchemy import Column, ForeignKey, CheckConstraint
+from sqlalchemy import Column, ForeignKey, CheckConstraint, Index
 from sqlalchemy import Integer, Float, String, Boolean, Date
-from sqlalchemy import select
+from sqlalchemy import select, insert, delete, func, literal_column
 
 from sqlalchemy.sql.expression import Select # For type hinting
 
 # from sqlalchemy import Table
 from sqlalchemy import create_engine
+from sqlalchemy import event
 
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import relationship
@@ -47,19 +53,33 @@ from sqlalchemy.orm import relationship
 # ------------
 # Custom Modules
 
-import sqlite3
-import numpy as np
-
 # -------------
-# sqlite adapters
-
-# https://stackoverflow.com/questions/57628273/saving-numpy-integers-in-sqlite-database-with-sqlalchemy
-# https://docs.sqlalchemy.org/en/14/orm/cascades.html?highlight=cascade%20save%20update#cascade-save-update
-
-# Register the following adapter so that numpy integers can vb converted
-# to regular integers otherwise they will be blobs
-
-sqlite3.register_adapter(np.int64, lambda val: int(val))
+# SQLite performance profile
+
+# The pragmas applied to every new connection. These can be overridden
+# in the [sqlite] table of settings.toml.
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",  # readers don't block the writer (and vice versa)
+    "synchronous": "NORMAL",  # safe with WAL, fewer fsync calls
+    "cache_size": -64000,  # negative values are KiB - 64 MB page cache
+    "mmap_size": 268435456,  # 256 MB memory mapped I/O
+    "temp_store": "MEMORY",  # temp tables and indices (sorting) in memory
+    "foreign_keys": True,  # enforce ON DELETE CASCADE
+}
+
+# The pragmas that can be set from the settings file.
+SQLITE_PRAGMAS = {
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+    "foreign_keys",
+    "busy_timeout",
+    "page_size",
+    "wal_autocheckpoint",
+}
 
 # -------------
 
@@ -82,12 +102,19 @@ class Vehicle(Base):
     tank_capacity = Column(Float, default=0.0)
     initial_odometer = Column(Float, default=0.0)
 
+    # NOTE: The collection is write only, it is never loaded. Adding a
+    # fuel record doesn't require loading the vehicle's history. Use
+    # `vehicle.fuel_records.select()` to build a query for the records.
+    # Deleting relies on the database (ON DELETE CASCADE).
+    # https://docs.sqlalchemy.org/en/20/orm/large_collections.html#write-only-relationships
     fuel_records = relationship(
         "FuelRecord",
         cascade="all, delete, delete-orphan, save-update",
         order_by="FuelRecord.fill_date",
         primaryjoin="Vehicle.vehicle_id == FuelRecord.vehicle_id",
-        backref='Vehicle'
+        backref='Vehicle',
+        lazy="write_only",
+        passive_deletes=True,
     )
 
     def __str__(self):
@@ -127,6 +154,27 @@ class FuelRecord(Base):
         CheckConstraint("mileage >= 0.0"),
         CheckConstraint("fuel >= 0.0"),
         CheckConstraint("cost >= 0.0"),
+        # Covering indexes for the report queries (see queries.py). The
+        # fuel_id breaks ties between fill-ups on the same date.
+        Index(
+            "ix_fuel_vehicle_fill_date",
+            "vehicle_id",
+            "fill_date",
+            "fuel_id",
+            "mileage",
+            "fuel",
+            "cost",
+            "partial",
+        ),
+        Index(
+            "ix_fuel_vehicle_year",
+            "vehicle_id",
+            func.strftime(literal_column("'%Y'"), literal_column("fill_date")),
+            "fill_date",
+            "mileage",
+            "fuel",
+            "cost",
+        ),
     )
 
     fuel_id = Column(Integer, primary_key=True)
@@ -138,6 +186,10 @@ class FuelRecord(Base):
     partial = Column(Boolean)
     comment = Column(String)
 
+    # See `content_hash`, indexed with the vehicle_id by the version 4
+    # migration (ix_fuel_vehicle_content_hash).
+    content_hash = Column(Integer)
+
     vehicle_id = Column(Integer, ForeignKey("VEHICLE.vehicle_id", ondelete="CASCADE"))
 
     def __repr__(self):
@@ -154,21 +206,489 @@ class FuelRecord(Base):
         )
 
 
-def get_session(path):
+# The FUEL columns that make up the content hash of a fuel record.
+CONTENT_COLUMNS = ("fill_date", "mileage", "fuel", "cost", "partial", "comment")
+
+
+def content_hash(
+    fill_date=None,
+    mileage=None,
+    fuel=None,
+    cost=None,
+    partial=None,
+    comment=None,
+) -> int:
+    """
+    Return the content hash of a fuel record, a signed 64-bit integer
+    (an SQLite INTEGER). `ft bulk add --incremental` uses it to find the
+    rows of a spreadsheet that are already in the database.
+
+    The values are normalized first so the same record hashes the same
+    whether it comes from a spreadsheet, the ORM or straight from the
+    database: the date is `YYYY-MM-DD`, the numbers are floats, partial
+    is a bool and an empty comment is the same as no comment.
+    """
+
+    values = (
+        "" if fill_date is None else str(fill_date)[:10],
+        "" if mileage is None else repr(float(mileage)),
+        "" if fuel is None else repr(float(fuel)),
+        "" if cost is None else repr(float(cost)),
+        "1" if partial else "0",
+        comment or "",
+    )
+
+    digest = hashlib.blake2b("\x1f".join(values).encode(), digest_size=8).digest()
+
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@event.listens_for(FuelRecord, "before_insert")
+@event.listens_for(FuelRecord, "before_update")
+def set_content_hash(mapper, connection, target):
+    """
+    Keep the content hash of the fuel records written with the ORM
+    current. The BulkWriter sets it for the Core inserts.
+    """
+
+    target.content_hash = content_hash(*(getattr(target, c) for c in CONTENT_COLUMNS))
+
+
+class FuelSummary(Base):
+    """
+    A model of the FUEL_SUMMARY table - a per vehicle, per year rollup
+    of the FUEL table. It is maintained by the triggers in
+    FUEL_SUMMARY_TRIGGERS and can be recomputed with
+    `rebuild_fuel_summary`.
+    """
+
+    __tablename__ = "FUEL_SUMMARY"
+
+    vehicle_id = Column(
+        Integer,
+        ForeignKey("VEHICLE.vehicle_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    year = Column(String, primary_key=True)  # strftime('%Y', fill_date)
+
+    fill_ups = Column(Integer, default=0)
+
+    total_mileage = Column(Float, default=0.0)
+    total_fuel = Column(Float, default=0.0)
+    total_cost = Column(Float, default=0.0)
+
+    min_mileage = Column(Float)
+    max_mileage = Column(Float)
+    min_fuel = Column(Float)
+    max_fuel = Column(Float)
+    min_cost = Column(Float)
+    max_cost = Column(Float)
+
+    def __repr__(self):
+
+        return (
+            f"FuelSummary(vehicle_id={self.vehicle_id}, "
+            f"year={self.year}, "
+            f"fill_ups={self.fill_ups}, "
+            f"total_mileage={self.total_mileage}, "
+            f"total_fuel={self.total_fuel}, "
+            f"total_cost={self.total_cost})"
+        )
+
+
+class VehicleVersion(Base):
+    """
+    A model of the VEHICLE_VERSION table - a modification counter per
+    vehicle. The triggers in VEHICLE_VERSION_TRIGGERS change the version
+    whenever the vehicle or one of its fuel records changes, so it can
+    be used to tell if a cached report is still current.
+
+    The counter starts at a random value and the rows are kept when a
+    vehicle is deleted. A new vehicle that reuses a vehicle_id, or a new
+    database, won't repeat the versions of the old one.
+    """
+
+    __tablename__ = "VEHICLE_VERSION"
+
+    vehicle_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+
+    def __repr__(self):
+
+        return (
+            f"VehicleVersion(vehicle_id={self.vehicle_id}, "
+            f"version={self.version})"
+        )
+
+
+# -------------
+# FUEL_SUMMARY triggers
+
+# The columns that are rolled up (totals, minimums and maximums).
+_SUMMARY_VALUES = ("mileage", "fuel", "cost")
+
+
+def _summary_add_sql(row: str) -> str:
+    """
+    The SQL to add the FUEL `row` (NEW) to its FUEL_SUMMARY row.
+    """
+
+    values = ", ".join(f"{row}.{c}, {row}.{c}, {row}.{c}" for c in _SUMMARY_VALUES)
+
+    updates = ",\n".join(
+        f"total_{c} = coalesce(total_{c}, 0) + coalesce(excluded.total_{c}, 0), "
+        f"min_{c} = coalesce(min(min_{c}, excluded.min_{c}), min_{c}, excluded.min_{c}), "
+        f"max_{c} = coalesce(max(max_{c}, excluded.max_{c}), max_{c}, excluded.max_{c})"
+        for c in _SUMMARY_VALUES
+    )
+
+    return f"""
+    INSERT INTO FUEL_SUMMARY (
+        vehicle_id, year, fill_ups,
+        total_mileage, min_mileage, max_mileage,
+        total_fuel, min_fuel, max_fuel,
+        total_cost, min_cost, max_cost
+    )
+    SELECT {row}.vehicle_id, strftime('%Y', {row}.fill_date), 1, {values}
+    WHERE {row}.fill_date IS NOT NULL
+    ON CONFLICT (vehicle_id, year) DO UPDATE SET
+        fill_ups = fill_ups + 1,
+        {updates};
+    """
+
+
+def _summary_remove_sql(row: str) -> str:
+    """
+    The SQL to remove the FUEL `row` (OLD) from its FUEL_SUMMARY row.
+    The totals are decremented. A minimum or maximum only has to be
+    recomputed, from the year of records (ix_fuel_vehicle_year), if the
+    removed record was the extreme value.
+    """
+
+    group = (
+        f"vehicle_id = {row}.vehicle_id "
+        f"AND strftime('%Y', fill_date) = strftime('%Y', {row}.fill_date)"
+    )
+
+    updates = ",\n".join(
+        f"total_{c} = coalesce(total_{c}, 0) - coalesce({row}.{c}, 0), "
+        f"min_{c} = CASE WHEN {row}.{c} <= min_{c} "
+        f"THEN (SELECT min({c}) FROM FUEL WHERE {group}) ELSE min_{c} END, "
+        f"max_{c} = CASE WHEN {row}.{c} >= max_{c} "
+        f"THEN (SELECT max({c}) FROM FUEL WHERE {group}) ELSE max_{c} END"
+        for c in _SUMMARY_VALUES
+    )
+
+    where = (
+        f"vehicle_id = {row}.vehicle_id "
+        f"AND year = strftime('%Y', {row}.fill_date)"
+    )
+
+    return f"""
+    UPDATE FUEL_SUMMARY SET
+        fill_ups = fill_ups - 1,
+        {updates}
+    WHERE {where};
+
+    DELETE FROM FUEL_SUMMARY WHERE {where} AND fill_ups <= 0;
+    """
+
+
+FUEL_SUMMARY_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fuel_summary_insert
+    AFTER INSERT ON FUEL
+    BEGIN
+    {_summary_add_sql("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fuel_summary_delete
+    AFTER DELETE ON FUEL
+    BEGIN
+    {_summary_remove_sql("OLD")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fuel_summary_update
+    AFTER UPDATE OF vehicle_id, fill_date, mileage, fuel, cost ON FUEL
+    BEGIN
+    {_summary_remove_sql("OLD")}
+    {_summary_add_sql("NEW")}
+    END
+    """,
+]
+
+
+# -------------
+# VEHICLE_VERSION triggers
+
+
+def _version_bump_sql(row: str) -> str:
+    """
+    The SQL to change the version of the vehicle of the `row` (NEW or
+    OLD).
+    """
+
+    return f"""
+    INSERT INTO VEHICLE_VERSION (vehicle_id, version)
+    VALUES ({row}.vehicle_id, random())
+    ON CONFLICT (vehicle_id) DO UPDATE SET version = version + 1;
+    """
+
+
+VEHICLE_VERSION_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS vehicle_version_insert
+    AFTER INSERT ON VEHICLE
+    BEGIN
+    {_version_bump_sql("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS vehicle_version_update
+    AFTER UPDATE ON VEHICLE
+    BEGIN
+    {_version_bump_sql("OLD")}
+    {_version_bump_sql("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS vehicle_version_delete
+    AFTER DELETE ON VEHICLE
+    BEGIN
+    {_version_bump_sql("OLD")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS vehicle_version_fuel_insert
+    AFTER INSERT ON FUEL
+    BEGIN
+    {_version_bump_sql("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS vehicle_version_fuel_update
+    AFTER UPDATE ON FUEL
+    BEGIN
+    {_version_bump_sql("OLD")}
+    {_version_bump_sql("NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS vehicle_version_fuel_delete
+    AFTER DELETE ON FUEL
+    BEGIN
+    {_version_bump_sql("OLD")}
+    END
+    """,
+]
+
+
+def rebuild_fuel_summary(connection) -> None:
+    """
+    Recompute the FUEL_SUMMARY table from the FUEL table.
+    """
+
+    fill_year = func.strftime(literal_column("'%Y'"), FuelRecord.fill_date)
+
+    rollup = (
+        select(
+            FuelRecord.vehicle_id,
+            fill_year,
+            func.count(),
+            func.sum(FuelRecord.mileage),
+            func.min(FuelRecord.mileage),
+            func.max(FuelRecord.mileage),
+            func.sum(FuelRecord.fuel),
+            func.min(FuelRecord.fuel),
+            func.max(FuelRecord.fuel),
+            func.sum(FuelRecord.cost),
+            func.min(FuelRecord.cost),
+            func.max(FuelRecord.cost),
+        )
+        .where(FuelRecord.fill_date.is_not(None))
+        .group_by(FuelRecord.vehicle_id, fill_year)
+    )
+
+    columns = [
+        "vehicle_id",
+        "year",
+        "fill_ups",
+        "total_mileage",
+        "min_mileage",
+        "max_mileage",
+        "total_fuel",
+        "min_fuel",
+        "max_fuel",
+        "total_cost",
+        "min_cost",
+        "max_cost",
+    ]
+
+    connection.execute(delete(FuelSummary))
+    connection.execute(insert(FuelSummary).from_select(columns, rollup))
+
+
+def format_pragmas(pragmas: dict) -> list[str]:
+    """
+    Given a dictionary of pragma names and values, return the list of
+    `PRAGMA name = value` statements. Boolean values are converted to
+    ON/OFF.
+
+    Raises a ValueError if the pragma isn't one of SQLITE_PRAGMAS or the
+    value isn't a simple keyword or number.
+    """
+
+    statements = []
+
+    for name, value in pragmas.items():
+
+        if name not in SQLITE_PRAGMAS:
+            raise ValueError(f"Unsupported SQLite pragma: {name}")
+
+        if isinstance(value, bool):
+            value = "ON" if value else "OFF"
+
+        value = str(value)
+
+        if not re.fullmatch(r"-?\w+", value):
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+
+        statements.append(f"PRAGMA {name} = {value}")
+
+    return statements
+
+
+class TankTotal:
+    """
+    The `tank_total(value, full)` SQL window function, the total of
+    `value` since the previous full fill-up, including this one (see
+    `queries.fuel_history`). `full` is 1 for a full tank.
+
+    Over a running frame (UNBOUNDED PRECEDING to CURRENT ROW) in
+    fill_date order the total restarts after every full fill-up. It is
+    the segmented sum of `metrics.tank_totals` calculated in the same
+    window pass as the other report columns, SQL can't restart a sum
+    without a second window over the first one (and SQLite sorts the
+    rows again for it).
+
+    Reference:
+    - https://www.sqlite.org/windowfunctions.html#user_defined_aggregate_window_functions
+    - https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.create_window_function
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.full = True
+
+    def step(self, value, full):
+        if self.full:
+            self.total = 0.0
+
+        self.total += value or 0.0
+        self.full = bool(full)
+
+    def inverse(self, value, full):
+        raise NotImplementedError(
+            "tank_total frames have to start at UNBOUNDED PRECEDING"
+        )
+
+    def value(self):
+        return self.total
+
+    def finalize(self):
+        return self.total
+
+
+class TankTotalDesc:
+    """
+    The `tank_total_desc(value, full)` SQL window function, `tank_total`
+    for the fill-ups in descending fill_date order. The frame is CURRENT
+    ROW to UNBOUNDED FOLLOWING, the fill-up and the older ones.
+
+    The total of a fill-up is its value plus the total of the next
+    (older) fill-up if that one is partial. SQLite steps the rows of the
+    frame before it asks for the first value, the totals are calculated
+    in one pass from the oldest fill-up.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.full = []
+        self.start = 0
+        self.totals = None
+
+    def step(self, value, full):
+        self.values.append(value or 0.0)
+        self.full.append(bool(full))
+        self.totals = None
+
+    def inverse(self, value, full):
+        self.start += 1
+
+    def value(self):
+        if self.totals is None:
+            self.totals = [0.0] * len(self.values)
+
+            older = 0.0
+
+            for i in reversed(range(self.start, len(self.values))):
+                self.totals[i] = self.values[i] + older
+                older = 0.0 if self.full[i] else self.totals[i]
+
+        return self.totals[self.start] if self.start < len(self.values) else 0.0
+
+    def finalize(self):
+        return self.value()
+
+
+# The aggregate window functions registered on every connection, the
+# name -> (number of arguments, aggregate class).
+WINDOW_FUNCTIONS = {
+    "tank_total": (2, TankTotal),
+    "tank_total_desc": (2, TankTotalDesc),
+}
+
+
+def get_session(path, pragmas: Optional[dict] = None, **engine_options):
     """
     Given the path to the sqlite database, return a session instance.
+
+    `pragmas` are merged over DEFAULT_PRAGMAS and applied to every
+    connection the engine opens. `engine_options` are passed to
+    `create_engine` (i.e. the pool size of a long running server).
     """
 
+    statements = format_pragmas(DEFAULT_PRAGMAS | (pragmas or {}))
+
     # https://docs.sqlalchemy.org/en/14/tutorial/engine.html
     engine = create_engine(
         f"sqlite+pysqlite:///{path}",
         echo=False,
         future=True,  # enable 2.0 future (Core)
+        **engine_options,
     )
 
-    # https://docs.sqlalchemy.org/en/14/core/metadata.html#creating-and-dropping-database-tables
-    # make sure all the Tables defined by the Base classes are created
-    Base.metadata.create_all(engine)
+    # https://docs.sqlalchemy.org/en/20/core/events.html#sqlalchemy.events.PoolEvents.connect
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+
+        for statement in statements:
+            cursor.execute(statement)
+
+        cursor.close()
+
+        for name, (count, aggregate) in WINDOW_FUNCTIONS.items():
+            dbapi_connection.create_window_function(name, count, aggregate)
+
+    # Only runs DDL when the database schema is behind. NOTE: imported
+    # here, migrations.py depends on the models in this module.
+    from .migrations import migrate
+
+    migrate(engine)
 
     return sessionmaker(engine, future=True)
 
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   5c2e8f94-ca9e-11f1-9f61-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Timing instrumentation for `ft --timings` and `ft --profile`.
+
+The commands mark their phases with `phase`:
+
+    with phase("render"):
+        ...
+
+Each phase records its wall and CPU time and the number and duration of
+the SQL statements executed while it was open (from the SQLAlchemy
+cursor events of the instrumented engine). Phases can be nested, the
+times are inclusive. The peak memory is the peak resident set size of
+the process.
+
+When the instrumentation isn't enabled `phase` does nothing, it costs a
+function call. Only the main thread is recorded (`ft serve` handles its
+requests in other threads).
+
+This module is imported on every invocation of `ft`, keep its imports
+light.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import sys
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Optional
+
+# ------------
+# 3rd Party - From PyPI
+
+# ------------
+# Custom Modules
+
+# -------------
+
+# The number of the slowest statements reported
+SLOWEST_STATEMENTS = 5
+
+
+class Phase:
+    """
+    The measurements of one phase.
+    """
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "sql_count": self.sql_count,
+            "sql_time": self.sql_time,
+        }
+
+
+def peak_memory() -> Optional[int]:
+    """
+    Return the peak resident set size of the process in bytes or None
+    if the platform doesn't report it (Windows).
+    """
+
+    try:
+        import resource
+
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """
+    Records the phases and SQL statements of a command.
+
+    # Parameters
+
+    enabled:bool
+        - Record the phases. A disabled profiler does nothing.
+    """
+
+    def __init__(self, enabled: bool = False):
+
+        self.enabled = enabled
+        self.thread = threading.get_ident()
+
+        self.phases = []
+        self.stack = []
+
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = []
+
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+    def add(self, name: str, wall: float, cpu: float) -> None:
+        """
+        Add a phase that was measured before the profiler existed (i.e.
+        importing the command module). It is included in the total.
+        """
+
+        if not self.enabled:
+            return
+
+        p = Phase(name, len(self.stack))
+        p.wall = wall
+        p.cpu = cpu
+
+        self.phases.append(p)
+
+        self.start_wall -= wall
+        self.start_cpu -= cpu
+
+    def begin(self, name: str) -> Optional[Phase]:
+        """
+        Open a phase. Returns the phase to pass to `end` (None if it
+        isn't recorded).
+        """
+
+        if not self.enabled or threading.get_ident() != self.thread:
+            return None
+
+        p = Phase(name, len(self.stack))
+
+        # the start times, replaced by the durations in `end`
+        p.wall = time.perf_counter()
+        p.cpu = time.process_time()
+
+        self.phases.append(p)
+        self.stack.append(p)
+
+        return p
+
+    def end(self, p: Optional[Phase]) -> None:
+        """
+        Close the phase and any phases opened after it.
+        """
+
+        if p is None or p not in self.stack:
+            return
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        while self.stack:
+            current = self.stack.pop()
+
+            current.wall = wall - current.wall
+            current.cpu = cpu - current.cpu
+
+            if current is p:
+                break
+
+    @contextmanager
+    def phase(self, name: str):
+        p = self.begin(name)
+
+        try:
+            yield p
+
+        finally:
+            self.end(p)
+
+    def instrument(self, engine) -> None:
+        """
+        Time every statement the engine executes.
+
+        Reference:
+        - https://docs.sqlalchemy.org/en/20/faq/performance.html#query-profiling
+        """
+
+        if not self.enabled:
+            return
+
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["profiler_start"].pop()
+
+            if threading.get_ident() != self.thread:
+                return
+
+            self.sql_count += 1
+            self.sql_time += elapsed
+
+            for p in self.stack:
+                p.sql_count += 1
+                p.sql_time += elapsed
+
+            self.statements.append((elapsed, statement))
+
+            # keep the slowest ones
+            if len(self.statements) > 4 * SLOWEST_STATEMENTS:
+                self.statements.sort(key=lambda s: s[0], reverse=True)
+                del self.statements[SLOWEST_STATEMENTS:]
+
+    def finish(self) -> None:
+        """
+        Close the open phases.
+        """
+
+        if self.stack:
+            self.end(self.stack[0])
+
+    def slowest(self) -> list[tuple[float, str]]:
+        return sorted(self.statements, key=lambda s: s[0], reverse=True)[:SLOWEST_STATEMENTS]
+
+    def to_dict(self) -> dict:
+        return {
+            "wall": time.perf_counter() - self.start_wall,
+            "cpu": time.process_time() - self.start_cpu,
+            "sql_count": self.sql_count,
+            "sql_time": self.sql_time,
+            "peak_memory": peak_memory(),
+            "phases": [p.to_dict() for p in self.phases],
+            "slowest_statements": [
+                {"time": elapsed, "statement": statement}
+                for elapsed, statement in self.slowest()
+            ],
+        }
+
+    def print_table(self, console) -> None:
+        """
+        Print the phases as a table on the rich console.
+        """
+
+        from rich.table import Table
+
+        report = self.to_dict()
+
+        table = Table(title="Timings", title_justify="left")
+
+        table.add_column("phase")
+        table.add_column("wall (ms)", justify="right")
+        table.add_column("cpu (ms)", justify="right")
+        table.add_column("sql", justify="right")
+        table.add_column("sql (ms)", justify="right")
+
+        def row(name, values, **kwargs):
+            table.add_row(
+                name,
+                f"{1000 * values['wall']:,.1f}",
+                f"{1000 * values['cpu']:,.1f}",
+                f"{values['sql_count']:,}",
+                f"{1000 * values['sql_time']:,.1f}",
+                **kwargs,
+            )
+
+        for p in report["phases"]:
+            row("  " * p["depth"] + p["name"], p)
+
+        row("total", report, style="bold")
+
+        console.print(table)
+
+        peak = report["peak_memory"]
+
+        console.print(
+            "Peak memory: " + ("n/a" if peak is None else f"{peak / 2**20:,.1f} MB")
+        )
+
+        if report["slowest_statements"]:
+            console.print()
+            console.print("Slowest statements:")
+
+            for s in report["slowest_statements"]:
+                statement = " ".join(s["statement"].split())
+
+                console.print(
+                    f"{1000 * s['time']:>10,.1f} ms  {statement}",
+                    markup=False,
+                    no_wrap=True,
+                    overflow="ellipsis",
+                )
+
+
+# The profiler of the running command. `ft` replaces it when --timings
+# or --profile is used.
+PROFILER = Profiler()
+
+
+def activate(profiler: Profiler) -> Profiler:
+    global PROFILER
+
+    PROFILER = profiler
+
+    return profiler
+
+
+def phase(name: str):
+    """
+    Mark a phase of the running command, see Profiler.phase.
+    """
+
+    return PROFILER.phase(name)
@@ -27,7 +27,11 @@ from sqlalchemy import (
     distinct,
     func,
     text,
+    literal_column,
+    case,
     Integer,
+    Float,
+    Text,
 )
 
 from sqlalchemy.sql.expression import cast
@@ -38,10 +42,24 @@ from sqlalchemy.sql.expression import cast
 from .models import (
     Vehicle,
     FuelRecord,
+    FuelSummary,
 )
 
 # -------------
 
+# The year of the fill date. The format is rendered as a literal (not a
+# bound parameter) so SQLite matches the expression against the
+# ix_fuel_vehicle_year index.
+fill_year = func.strftime(literal_column("'%Y'"), FuelRecord.fill_date)
+
+# The number of fill-ups in the rolling l/100km average
+ROLLING_WINDOW = 5
+
+# The order of the rows of each vehicle in `vehicles_report` and
+# `vehicles_report_summary`, see `report_text`.
+REPORT_ORDER = ('fill_date', 'fuel_id')
+SUMMARY_ORDER = ('year',)
+
 
 def vehicle_report(vid, tail=-1):
     """
@@ -102,31 +120,79 @@ def vehicle_report(vid, tail=-1):
     # This way we can see the n - 1 count, i.e. the number of days
     # since the last fill-up not in the tail.
 
-    statement = (
-        select(
-            # Vehicle.vehicle_id,
-            # Vehicle.name,
-            FuelRecord.fuel_id,
-            FuelRecord.fill_date,
-            cast(func.julianday(FuelRecord.fill_date) - func.lag(func.julianday(FuelRecord.fill_date), 1, func.julianday(FuelRecord.fill_date)).over(order_by=FuelRecord.fill_date), Integer).label('days'),
-            FuelRecord.mileage,
-            FuelRecord.fuel,
-            FuelRecord.cost,
-            func.round(FuelRecord.cost/FuelRecord.fuel, 3).label('cost_per_liter'),
-            func.round(100*FuelRecord.fuel/FuelRecord.mileage, 3).label('l_per_100km'),
-            func.round((FuelRecord.mileage*0.621371)/(FuelRecord.fuel*0.264172), 3).label('mpg_us'),
-            func.round((FuelRecord.mileage*0.621371)/(FuelRecord.fuel*0.219969), 3).label('mpg_imp'),
-        )
-        .select_from(Vehicle)
-        .join(FuelRecord)
-        .filter(Vehicle.vehicle_id == vid)
-        .order_by(FuelRecord.fill_date.desc())
-        .limit(tail)
+    # NOTE: The economy of partial fill-ups is carried forward to the
+    # next full tank (see `fuel_history`). The windows are calculated
+    # newest first, reading ix_fuel_vehicle_fill_date backwards, so the
+    # tail is a LIMIT and nothing is sorted.
+
+    history = fuel_history(FuelRecord.vehicle_id == vid, descending=True)
+
+    if tail >= 0:
+        history = history.limit(tail)
+
+    r = history.subquery().c
+
+    l_per_100km, mpg_us, mpg_imp = economy_columns(r)
+
+    # in the order of the history, see `vehicles_report`
+    statement = select(
+        r.fuel_id,
+        r.fill_date,
+        r.days,
+        r.mileage,
+        r.fuel,
+        r.cost,
+        r.cost_per_liter,
+        l_per_100km,
+        mpg_us,
+        mpg_imp,
     )
 
     return statement
 
 
+def summary_columns(include_optional=False):
+    """
+    Return the aggregate columns of the yearly summary report. See
+    `vehicle_report_summary` for the SQL.
+    """
+
+    columns = [
+        fill_year.label('year'),
+        func.count(FuelRecord.fill_date).label('fill_ups'),
+
+        func.round(func.sum(FuelRecord.mileage), 1).label('total_mileage'),
+        func.round(func.sum(FuelRecord.fuel), 3).label('total_fuel'),
+        func.round(func.sum(FuelRecord.cost), 2).label('total_cost'),
+
+        func.round(func.sum(FuelRecord.cost)/func.sum(FuelRecord.fuel), 3).label('avg_cost_per_liter'),
+        func.round(100*func.sum(FuelRecord.fuel)/func.sum(FuelRecord.mileage), 3).label('avg_l_per_100km'),
+        func.round((func.sum(FuelRecord.mileage)*0.621371)/(func.sum(FuelRecord.fuel)*0.264172), 3).label('mpg_us'),
+        func.round((func.sum(FuelRecord.mileage)*0.621371)/(func.sum(FuelRecord.fuel)*0.219969), 3).label('mpg_imp'),
+    ]
+
+    optional_columns = [
+
+        func.round(func.min(FuelRecord.mileage), 1).label('min_mileage'),
+        func.round(func.max(FuelRecord.mileage), 1).label('max_mileage'),
+        func.round(func.avg(FuelRecord.mileage), 1).label('avg_mileage'),
+
+        func.round(func.min(FuelRecord.fuel), 3).label('min_fuel'),
+        func.round(func.max(FuelRecord.fuel), 3).label('max_fuel'),
+        func.round(func.avg(FuelRecord.fuel), 3).label('avg_fuel'),
+
+        func.round(func.min(FuelRecord.cost), 2).label('min_cost'),
+        func.round(func.max(FuelRecord.cost), 2).label('max_cost'),
+        func.round(func.avg(FuelRecord.cost), 2).label('avg_cost'),
+    ]
+
+
+    if include_optional:
+        columns = columns + optional_columns
+
+    return columns
+
+
 def vehicle_report_summary(vid, include_optional=False):
     """
     """
@@ -174,51 +240,318 @@ def vehicle_report_summary(vid, include_optional=False):
     # GROUP BY strftime('%Y', f.fill_date)
     # ORDER By f.fill_date DESC
 
-    columns = [
-        func.strftime('%Y', FuelRecord.fill_date).label('year'),
-        func.count(FuelRecord.fill_date).label('fill_ups'),
+    columns = summary_columns(include_optional)
 
-        func.round(func.sum(FuelRecord.mileage), 1).label('total_mileage'),
-        func.round(func.sum(FuelRecord.fuel), 3).label('total_fuel'),
-        func.round(func.sum(FuelRecord.cost), 2).label('total_cost'),
+    statement = (
+        select(*columns)
+        .select_from(Vehicle)
+        .join(FuelRecord)
+        .filter(Vehicle.vehicle_id == vid)
+        .order_by(fill_year.asc())
+        .group_by(fill_year)
+    )
 
-        func.round(func.sum(FuelRecord.cost)/func.sum(FuelRecord.fuel), 3).label('avg_cost_per_liter'),
-        func.round(100*func.sum(FuelRecord.fuel)/func.sum(FuelRecord.mileage), 3).label('avg_l_per_100km'),
-        func.round((func.sum(FuelRecord.mileage)*0.621371)/(func.sum(FuelRecord.fuel)*0.264172), 3).label('mpg_us'),
-        func.round((func.sum(FuelRecord.mileage)*0.621371)/(func.sum(FuelRecord.fuel)*0.219969), 3).label('mpg_imp'),
+    return statement
+
+
+def fuel_history(where, descending=False):
+    """
+    The fuel records (matching the `where` clause) with the columns that
+    are calculated in one pass over the ix_fuel_vehicle_fill_date index
+    order, partitioned by vehicle:
+
+    - days - since the previous fill-up
+    - cost_per_liter
+    - l_per_100km_rolling - the l/100km of the total fuel and mileage
+      of the last ROLLING_WINDOW fill-ups
+    - full - 1 for a full tank, 0 for a partial fill-up (NULL is full)
+    - tank_fuel, tank_mileage - the fuel and mileage since the previous
+      full fill-up of the vehicle
+    - rank, records - the position of the record and the number of
+      records of the vehicle, see `vehicles_report`
+
+    The consumption can only be measured when the tank is filled. The
+    fuel and mileage of partial fill-ups are carried forward to the next
+    full fill-up, so the economy of a full fill-up is calculated from
+    its tank totals (see `economy_columns`). The tank totals are running
+    totals that restart after every full fill-up (the `tank_total`
+    window functions, see `models.TankTotal`), in the same window as
+    the other columns. No self join and no second window.
+
+    The records are ordered by vehicle_id and fill_date, newest first if
+    `descending` (the index is read backwards). The order is the order
+    of the windows, SQLite doesn't sort the rows.
+
+    Returns the select statement.
+    """
+
+    # SELECT
+    #     ...
+    #     tank_total(f.fuel, full) OVER (
+    #         w ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+    #     ) AS tank_fuel,
+    #     ...
+    # FROM FUEL AS f
+    # WHERE f.vehicle_id IN (1, 2, 3)
+    # WINDOW w AS (PARTITION BY f.vehicle_id ORDER BY f.fill_date, f.fuel_id)
+    # ORDER BY f.vehicle_id, f.fill_date, f.fuel_id
+
+    order = (FuelRecord.fill_date, FuelRecord.fuel_id)
+
+    if descending:
+        order = tuple(c.desc() for c in order)
+
+    window = {
+        "partition_by": FuelRecord.vehicle_id,
+        "order_by": order,
+    }
+
+    julianday = func.julianday(FuelRecord.fill_date)
+
+    full = case((FuelRecord.partial, 0), else_=1)
+
+    if descending:
+        previous = func.lead(julianday, 1, julianday)
+
+        # the last ROLLING_WINDOW fill-ups, including this one
+        rolling = (0, ROLLING_WINDOW - 1)
+
+        def tank(value):
+            return func.tank_total_desc(value, full, type_=Float).over(**window, rows=(0, None))
+
+    else:
+        previous = func.lag(julianday, 1, julianday)
+
+        rolling = (-(ROLLING_WINDOW - 1), 0)
+
+        def tank(value):
+            return func.tank_total(value, full, type_=Float).over(**window, rows=(None, 0))
+
+    return (
+        select(
+            FuelRecord.vehicle_id,
+            FuelRecord.fuel_id,
+            FuelRecord.fill_date,
+            cast(julianday - previous.over(**window), Integer).label('days'),
+            FuelRecord.mileage,
+            FuelRecord.fuel,
+            FuelRecord.cost,
+            func.round(FuelRecord.cost/FuelRecord.fuel, 3).label('cost_per_liter'),
+            func.round(100*func.sum(FuelRecord.fuel).over(**window, rows=rolling)/func.sum(FuelRecord.mileage).over(**window, rows=rolling), 3).label('l_per_100km_rolling'),
+            full.label('full'),
+            tank(FuelRecord.fuel).label('tank_fuel'),
+            tank(FuelRecord.mileage).label('tank_mileage'),
+            func.row_number().over(**window).label('rank'),
+            func.count().over(**window, rows=(None, None)).label('records'),
+        )
+        .where(where)
+        .order_by(FuelRecord.vehicle_id, *order)
+    )
+
+
+def economy_columns(c):
+    """
+    Return the partial-fill aware l_per_100km, mpg_us and mpg_imp
+    columns from the full, tank_fuel and tank_mileage columns of `c`
+    (see `fuel_history`). Partial fill-ups are NULL.
+    """
+
+    def measured(value):
+        return func.round(case((c.full == 1, value)), 3)
+
+    return [
+        measured(100*c.tank_fuel/c.tank_mileage).label('l_per_100km'),
+        measured((c.tank_mileage*0.621371)/(c.tank_fuel*0.264172)).label('mpg_us'),
+        measured((c.tank_mileage*0.621371)/(c.tank_fuel*0.219969)).label('mpg_imp'),
     ]
 
-    optional_columns = [
 
-        func.round(func.min(FuelRecord.mileage), 1).label('min_mileage'),
-        func.round(func.max(FuelRecord.mileage), 1).label('max_mileage'),
-        func.round(func.avg(FuelRecord.mileage), 1).label('avg_mileage'),
+def vehicles_report(vids, tail=-1):
+    """
+    The multi-vehicle version of `vehicle_report`. The window functions
+    are partitioned by vehicle so all of the requested vehicles can be
+    reported in one statement. The last `tail` records of each vehicle
+    are selected by ranking them with ROW_NUMBER (-1 selects all of
+    them).
+
+    The rows are ordered by vehicle_id and then by fill_date ascending
+    (the opposite of `vehicle_report`) and include the vehicle_id
+    column. See `fuel_history` for the calculated columns, the economy
+    of partial fill-ups is carried forward to the next full tank.
+
+    See `metrics.vehicles_report` for the NumPy version.
+    """
 
-        func.round(func.min(FuelRecord.fuel), 3).label('min_fuel'),
-        func.round(func.max(FuelRecord.fuel), 3).label('max_fuel'),
-        func.round(func.avg(FuelRecord.fuel), 3).label('avg_fuel'),
+    # SELECT ... FROM (
+    #     SELECT
+    #         f.vehicle_id,
+    #         f.fuel_id,
+    #         ...
+    #         ROW_NUMBER() OVER w AS rank,
+    #         COUNT(*) OVER (
+    #             w ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+    #         ) AS records
+    #     FROM FUEL AS f
+    #     WHERE f.vehicle_id IN (1, 2, 3)
+    #     WINDOW w AS (PARTITION BY f.vehicle_id ORDER BY f.fill_date, f.fuel_id)
+    # )
+    # WHERE rank > records - 10
+    # ORDER BY vehicle_id, fill_date, fuel_id
+
+    # NOTE: All of the windows share the partition and the ascending
+    # order of ix_fuel_vehicle_fill_date, the history is read from the
+    # index in one pass without sorting. Ranking in the opposite
+    # direction would force SQLite to sort the full history, so the tail
+    # is found by counting the records in the partition instead.
+
+    # NOTE: The rows are in the order of the history subquery. SQLite
+    # keeps the ORDER BY of a subquery in FROM when the outer query is a
+    # plain select of one subquery (no join, aggregate or ORDER BY of
+    # its own). An outer ORDER BY would sort the rows again.
+
+    r = fuel_history(FuelRecord.vehicle_id.in_(vids)).subquery().c
+
+    l_per_100km, mpg_us, mpg_imp = economy_columns(r)
+
+    statement = select(
+        r.vehicle_id,
+        r.fuel_id,
+        r.fill_date,
+        r.days,
+        r.mileage,
+        r.fuel,
+        r.cost,
+        r.cost_per_liter,
+        l_per_100km,
+        r.l_per_100km_rolling,
+        mpg_us,
+        mpg_imp,
+    )
 
-        func.round(func.min(FuelRecord.cost), 2).label('min_cost'),
-        func.round(func.max(FuelRecord.cost), 2).label('max_cost'),
-        func.round(func.avg(FuelRecord.cost), 2).label('avg_cost'),
+    if tail >= 0:
+        statement = statement.where(r.rank > r.records - tail)
+
+    return statement
+
+
+def vehicles_report_summary(vids, include_optional=False):
+    """
+    The multi-vehicle version of `vehicle_report_summary`. It reads the
+    FUEL_SUMMARY rollup table instead of aggregating the FUEL table. The
+    summary is ordered by vehicle_id and year and includes the
+    vehicle_id column.
+    """
+
+    fs = FuelSummary
+
+    columns = [
+        fs.vehicle_id,
+        fs.year,
+        fs.fill_ups,
+
+        func.round(fs.total_mileage, 1).label('total_mileage'),
+        func.round(fs.total_fuel, 3).label('total_fuel'),
+        func.round(fs.total_cost, 2).label('total_cost'),
+
+        func.round(fs.total_cost/fs.total_fuel, 3).label('avg_cost_per_liter'),
+        func.round(100*fs.total_fuel/fs.total_mileage, 3).label('avg_l_per_100km'),
+        func.round((fs.total_mileage*0.621371)/(fs.total_fuel*0.264172), 3).label('mpg_us'),
+        func.round((fs.total_mileage*0.621371)/(fs.total_fuel*0.219969), 3).label('mpg_imp'),
     ]
 
+    optional_columns = [
+
+        func.round(fs.min_mileage, 1).label('min_mileage'),
+        func.round(fs.max_mileage, 1).label('max_mileage'),
+        func.round(fs.total_mileage/fs.fill_ups, 1).label('avg_mileage'),
+
+        func.round(fs.min_fuel, 3).label('min_fuel'),
+        func.round(fs.max_fuel, 3).label('max_fuel'),
+        func.round(fs.total_fuel/fs.fill_ups, 3).label('avg_fuel'),
+
+        func.round(fs.min_cost, 2).label('min_cost'),
+        func.round(fs.max_cost, 2).label('max_cost'),
+        func.round(fs.total_cost/fs.fill_ups, 2).label('avg_cost'),
+    ]
 
     if include_optional:
         columns = columns + optional_columns
 
     statement = (
         select(*columns)
-        .select_from(Vehicle)
-        .join(FuelRecord)
-        .filter(Vehicle.vehicle_id == vid)
-        .order_by(FuelRecord.fill_date.asc())
-        .group_by(func.strftime('%Y', FuelRecord.fill_date))
+        .where(fs.vehicle_id.in_(vids))
+        .order_by(fs.vehicle_id, fs.year)
     )
 
     return statement
 
 
+def report_text(statement, order_by):
+    """
+    Return the multi-vehicle report (`vehicles_report` or
+    `vehicles_report_summary`) with every column, except the
+    vehicle_id, cast to TEXT. SQLite formats the values the way they
+    are displayed so they can be written without converting them (see
+    render.py). The rows are ordered by the vehicle_id and the
+    `order_by` columns (names of the report columns), REPORT_ORDER or
+    SUMMARY_ORDER.
+
+    The text columns are followed by the number of rows of the vehicle
+    (`rows`) and the width of the widest value of each column
+    (`<column>_width`, NULL if every value is NULL):
+
+    SELECT
+        vehicle_id,
+        CAST(fuel_id AS TEXT) AS fuel_id,
+        ...
+        COUNT(*) OVER (PARTITION BY vehicle_id) AS rows,
+        MAX(LENGTH(CAST(fuel_id AS TEXT))) OVER (PARTITION BY vehicle_id) AS fuel_id_width,
+        ...
+
+    The widths are window aggregates, they are calculated in the same
+    pass as the report (the report isn't run twice) and they are known
+    when the first row of the vehicle is read.
+    """
+
+    # NOTE: The windows are calculated after the WHERE clause, the
+    # widths are the widths of the `tail` rows. SQLite sorts the report
+    # rows by vehicle for them (the history isn't sorted), the rows are
+    # sorted in the same pass.
+
+    vehicle_id, *columns = statement.selected_columns
+
+    vehicle = {'partition_by': vehicle_id}
+
+    return statement.with_only_columns(
+        vehicle_id,
+        *(cast(c, Text).label(c.name) for c in columns),
+        func.count().over(**vehicle).label('rows'),
+        *(
+            func.max(func.length(cast(c, Text))).over(**vehicle).label(f'{c.name}_width')
+            for c in columns
+        ),
+    ).order_by(None).order_by(
+        vehicle_id,
+        *(statement.selected_columns[name] for name in order_by),
+    )
+
+
+def explain_query_plan(session, statement) -> list[str]:
+    """
+    Return the `EXPLAIN QUERY PLAN` details of the statement, one string
+    per step (i.e. 'SEARCH FUEL USING COVERING INDEX ...').
+    """
+
+    compiled = statement.compile(
+        dialect=session.bind.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+
+    result = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+
+    return [row.detail for row in result]
+
+
 # ---------------------
 # This uses the raw sql and the text() function - it works, but is specific to SQLite
 # def vehicle_report(vid, tail=-1):
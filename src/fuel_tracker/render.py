@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   8d41c6a2-caa0-11f1-8e2b-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+A fixed-width table writer for the terminal. It writes the same table
+as tabulate's `pretty` format (`DataFrame.to_markdown(tablefmt="pretty")`):
+
++---+-----------+------------+
+|   | fuel (id) | fill date  |
++---+-----------+------------+
+| 0 |    829    | 2021-06-05 |
++---+-----------+------------+
+
+tabulate measures every cell before it writes the first line, which
+means the whole table has to be in memory (and it is slow for long
+tables). Here the column widths are known up front (from the database
+with `MAX(LENGTH()) OVER`, see `queries.report_text`) so the rows are
+formatted one at a time as they are read from the cursor.
+
+The cells are text, None is written as a blank cell. A cell that is
+wider than its column is written in full, the line is longer.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+from typing import Iterable, Iterator, Optional, Sequence
+
+# ------------
+# 3rd Party - From PyPI
+
+# ------------
+# Custom Modules
+
+# -------------
+
+
+def table_lines(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Optional[str]]],
+    widths: Sequence[int],
+) -> Iterator[str]:
+    """
+    Yield the lines of the table. The rows are read as the lines are
+    consumed.
+
+    # Parameters
+
+    headers:Sequence[str]
+        - The column headers.
+
+    rows:Iterable[Sequence[Optional[str]]]
+        - The rows of text cells.
+
+    widths:Sequence[int]
+        - The width of the widest cell of each column (None or 0 if the
+          column is empty). The headers are measured here.
+    """
+
+    widths = [max(w or 0, len(h)) for w, h in zip(widths, headers)]
+
+    rule = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+
+    # the cells are centered, an odd space goes to the right
+    line = ("| " + " | ".join(f"{{:^{w}}}" for w in widths) + " |").format
+
+    yield rule
+    yield line(*headers)
+    yield rule
+
+    for row in rows:
+        yield line(*["" if cell is None else cell for cell in row])
+
+    yield rule
+
+
+def indexed(rows: Iterable[Sequence], start: int = 0) -> Iterator[list]:
+    """
+    Prefix the rows with their row number (the DataFrame index).
+    """
+
+    return ([str(i), *row] for i, row in enumerate(rows, start))
+
+
+def frame_table(df, headers: Optional[dict] = None, index: bool = True) -> tuple:
+    """
+    Return the DataFrame as a (headers, rows, widths) table for
+    `table_lines`. The cells are converted like tabulate converts them,
+    missing values (None, NaN) are blank.
+
+    # Parameters
+
+    df:DataFrame
+        - The DataFrame.
+
+    headers:dict
+        - Maps the column names to the headers, the columns that aren't
+          mapped use their names.
+
+    index:bool
+        - Include the row number (the index). Like tabulate, an empty
+          table doesn't have an index column.
+    """
+
+    headers = headers or {}
+
+    rows = [
+        [None if cell is None or cell != cell else str(cell) for cell in row]
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+    columns = [headers.get(c, c) for c in df.columns]
+
+    if index and rows:
+        rows = list(indexed(rows))
+        columns = ['', *columns]
+
+    widths = [
+        max((len(row[i]) for row in rows if row[i] is not None), default=0)
+        for i in range(len(columns))
+    ]
+
+    return columns, rows, widths
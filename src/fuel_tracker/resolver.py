@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   c2a8e4f6-ca9d-11f1-b0e9-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Resolve the vehicle names and ids given on the command line (or to the
+API) to the vehicle_id. Every command accepts vehicles by name or id,
+this is the one place that decides which vehicle an argument means.
+
+All of the arguments are classified in one pass and the ones that
+aren't cached are looked up with one combined statement (batched for
+very long argument lists). An argument that looks like an integer is
+matched against the ids and the names, a vehicle can be named `2015`.
+If the id and the name match different vehicles the argument is
+ambiguous and isn't resolved.
+
+The resolver remembers every id and name it has looked up, including
+the ones that don't exist. Use one resolver per command (or per
+request), a long lived resolver won't see vehicles that are added,
+renamed or deleted by someone else unless it is cleared.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+from typing import Iterable, Optional
+
+# ------------
+# 3rd Party - From PyPI
+
+from sqlalchemy import select, bindparam
+
+# ------------
+# Custom Modules
+
+from .models import Vehicle
+from .common import parse_int
+
+# -------------
+
+SELECT_VEHICLE_IDS = select(Vehicle.vehicle_id, Vehicle.name).where(
+    Vehicle.vehicle_id.in_(bindparam("ids", expanding=True))
+    | Vehicle.name.in_(bindparam("names", expanding=True))
+)
+
+NOT_A_VEHICLE = "does not match a vehicle"
+
+
+class VehicleResolver:
+    """
+    Resolve vehicle names and ids to the vehicle_id with a cache.
+
+    # Parameters
+
+    batch_size:int
+        - The maximum number of ids (and names) in one statement.
+    """
+
+    def __init__(self, batch_size: int = 500):
+
+        self.batch_size = batch_size
+
+        # vehicle_id -> name and name -> vehicle_id, None if the
+        # vehicle doesn't exist
+        self.by_id = {}
+        self.by_name = {}
+
+    def clear(self) -> None:
+        """
+        Forget every id and name that was looked up, including the ones
+        that didn't exist.
+        """
+
+        self.by_id.clear()
+        self.by_name.clear()
+
+    def lookup(self, session, ids: Iterable[int], names: Iterable[str]) -> None:
+        """
+        Look up the ids and names that aren't cached yet.
+        """
+
+        ids = [i for i in dict.fromkeys(ids) if i not in self.by_id]
+        names = [n for n in dict.fromkeys(names) if n not in self.by_name]
+
+        for start in range(0, max(len(ids), len(names)), self.batch_size):
+            end = start + self.batch_size
+
+            result = session.execute(
+                SELECT_VEHICLE_IDS,
+                {"ids": ids[start:end], "names": names[start:end]},
+            )
+
+            for vid, name in result:
+                self.by_id[vid] = name
+                self.by_name[name] = vid
+
+        for i in ids:
+            self.by_id.setdefault(i, None)
+
+        for n in names:
+            self.by_name.setdefault(n, None)
+
+    def match(self, vehicle: str) -> tuple[Optional[int], Optional[str]]:
+        """
+        Return the (vehicle_id, reason) of a looked up argument. The
+        vehicle_id is None and the reason explains why if it doesn't
+        resolve.
+        """
+
+        number = parse_int(vehicle)
+
+        by_id = number if self.by_id.get(number) is not None else None
+        by_name = self.by_name.get(vehicle)
+
+        if by_id is not None and by_name is not None and by_id != by_name:
+            return None, (
+                f"is ambiguous, it is the id of {self.by_id[by_id]} and the "
+                f"name of vehicle {by_name}"
+            )
+
+        if by_id is None and by_name is None:
+            return None, NOT_A_VEHICLE
+
+        return (by_name if by_id is None else by_id), None
+
+    def resolve(
+        self,
+        session,
+        vehicles: Iterable[str],
+    ) -> tuple[dict[str, int], dict[str, str]]:
+        """
+        Resolve the vehicle names and ids. Returns a tuple of:
+
+        - a dictionary mapping the arguments that resolve to their
+          vehicle_id, in the order given. Duplicates are included once.
+        - a dictionary mapping the arguments that don't resolve to the
+          reason (they don't exist or are ambiguous).
+        """
+
+        vehicles = [str(v) for v in dict.fromkeys(vehicles)]
+
+        numbers = (parse_int(v) for v in vehicles)
+
+        self.lookup(session, (n for n in numbers if n is not None), vehicles)
+
+        resolved = {}
+        unresolved = {}
+
+        for vehicle in vehicles:
+            vid, reason = self.match(vehicle)
+
+            if vid is None:
+                unresolved[vehicle] = reason
+
+            else:
+                resolved[vehicle] = vid
+
+        return resolved, unresolved
+
+    def resolve_one(self, session, vehicle: str) -> tuple[Optional[int], Optional[str]]:
+        """
+        Resolve a single vehicle name or id. Returns the (vehicle_id,
+        reason) tuple of `match`.
+        """
+
+        resolved, unresolved = self.resolve(session, [vehicle])
+
+        return resolved.get(str(vehicle)), unresolved.get(str(vehicle))
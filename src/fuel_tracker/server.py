@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   2e8b4f70-ca9d-11f1-a1c5-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+A local JSON HTTP API for `ft serve`. It exposes the vehicle, fuel,
+report and export operations to other programs without paying the `ft`
+start up cost on every call.
+
+The server is a stdlib `ThreadingHTTPServer`, every request is handled
+in its own thread. One engine is shared by all of the requests, its
+connection pool holds the SQLite connections open (with their page
+caches and prepared statement caches) between requests. With WAL
+journaling the report and export reads run concurrently, the writes are
+serialized by SQLite.
+
+Routes:
+
+- GET /vehicles - all of the vehicles
+- GET /vehicles/<vehicle> - one vehicle by name or id
+- POST /vehicles - add a vehicle, the body is an object of the VEHICLE
+  columns
+- POST /fuel - add fuel records, the body is a record (the same fields
+  as `ft fuel ingest`) or a list of them. All or nothing.
+- GET /report?vehicle=passat&vehicle=3&tail=10&engine=sql&extra_summary=1
+  - the `ft report show` report and yearly summary of the vehicles
+- GET /export?vehicle=passat or /export?all=1 - the `ft bulk export`
+  records as NDJSON, streamed from the cursor with chunked encoding
+
+Responses are JSON. Errors are `{"error": "message"}` with a 4xx
+status.
+
+Reference:
+- https://docs.python.org/3/library/http.server.html
+- https://docs.sqlalchemy.org/en/20/core/pooling.html
+- https://docs.sqlalchemy.org/en/20/core/connections.html#sql-compilation-caching
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import json
+import re
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# ------------
+# 3rd Party - From PyPI
+
+from sqlalchemy import select, bindparam
+from sqlalchemy.exc import IntegrityError
+
+# ------------
+# Custom Modules
+
+from .models import Vehicle
+from .writer import BulkWriter
+from .stream import to_fuel_record, RecordError
+from .resolver import VehicleResolver
+from .export import JsonLinesSink, select_export_vehicles, export_vehicles
+from .command_report import cached_reports
+
+# -------------
+
+VEHICLE_FIELDS = [
+    "vehicle_id",
+    "name",
+    "make",
+    "model",
+    "year",
+    "tank_capacity",
+    "initial_odometer",
+]
+
+# Built once, the compiled SQL is reused from the engine's statement
+# cache.
+SELECT_VEHICLES = select(Vehicle).order_by(Vehicle.vehicle_id)
+
+SELECT_VEHICLE_BY_ID = select(Vehicle).where(Vehicle.vehicle_id == bindparam("vid"))
+
+# The size of the request body we'll read.
+MAX_BODY_SIZE = 16 * 2**20
+
+
+class ApiError(Exception):
+    """
+    The request can't be completed. Sent to the client as
+    `{"error": message}` with the status.
+    """
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+
+        self.status = status
+        self.message = message
+
+
+def vehicle_to_dict(vehicle: Vehicle) -> dict:
+    return {field: getattr(vehicle, field) for field in VEHICLE_FIELDS}
+
+
+def records(df) -> list[dict]:
+    """
+    Convert the report DataFrame to a list of dictionaries. NaN (the
+    economy of partial fill-ups) becomes null.
+    """
+
+    columns = list(df.columns)
+
+    # tolist converts the NumPy values to Python values, NaN != NaN
+    rows = zip(*(df[c].tolist() for c in columns))
+
+    return [
+        dict(zip(columns, [None if v != v else v for v in row]))
+        for row in rows
+    ]
+
+
+def not_found(unresolved: dict[str, str]) -> ApiError:
+    """
+    The 404 error listing the vehicles that don't resolve and why.
+    """
+
+    return ApiError(
+        HTTPStatus.NOT_FOUND,
+        "; ".join(f"{vehicle} {reason}" for vehicle, reason in unresolved.items()),
+    )
+
+
+def find_vehicle(session, vehicle: str) -> Vehicle:
+    """
+    Return the vehicle by id or name. Raises ApiError (404) if it
+    doesn't resolve.
+    """
+
+    vid, reason = VehicleResolver().resolve_one(session, vehicle)
+
+    if vid is None:
+        raise not_found({vehicle: reason})
+
+    return session.execute(SELECT_VEHICLE_BY_ID.params(vid=vid)).scalar()
+
+
+def resolve_vehicles(session, vehicles: list[str]) -> dict[str, int]:
+    """
+    Resolve the vehicle names and ids in one statement. Returns a
+    dictionary mapping each of them to the vehicle_id. Raises ApiError
+    (404) listing the vehicles that don't resolve.
+    """
+
+    resolved, unresolved = VehicleResolver().resolve(session, vehicles)
+
+    if unresolved:
+        raise not_found(unresolved)
+
+    return resolved
+
+
+class FuelTrackerAPI:
+    """
+    The route handlers. Each handler receives the path match, the query
+    string (a dictionary of lists) and the decoded JSON body and returns
+    a tuple of the status and the JSON payload, or a callable that
+    streams the response body to a binary stream.
+
+    # Parameters
+
+    config:dict
+        - The `ft` configuration, `config["db"]` is the shared session
+          factory.
+
+    use_cache:bool
+        - Use the report cache for /report
+    """
+
+    def __init__(self, config: dict, use_cache: bool = True):
+
+        self.config = config
+        self.db = config["db"]
+        self.use_cache = use_cache
+
+        self.routes = [
+            ("GET", re.compile(r"/vehicles/?"), self.list_vehicles),
+            ("GET", re.compile(r"/vehicles/(?P<vehicle>[^/]+)"), self.get_vehicle),
+            ("POST", re.compile(r"/vehicles/?"), self.add_vehicle),
+            ("POST", re.compile(r"/fuel/?"), self.add_fuel),
+            ("GET", re.compile(r"/report/?"), self.report),
+            ("GET", re.compile(r"/export/?"), self.export),
+        ]
+
+    def route(self, method: str, path: str):
+        """
+        Return the handler and the match of the path. Raises ApiError
+        (404 or 405) if there isn't one.
+        """
+
+        allowed = False
+
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+
+            if match is None:
+                continue
+
+            if route_method == method:
+                return handler, match
+
+            allowed = True
+
+        if allowed:
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {path}")
+
+        raise ApiError(HTTPStatus.NOT_FOUND, f"{path} not found")
+
+    # ----------------
+    # Vehicles
+
+    def list_vehicles(self, match, query, body):
+
+        with self.db() as session:
+            vehicles = session.execute(SELECT_VEHICLES).scalars().all()
+
+            return HTTPStatus.OK, {"vehicles": [vehicle_to_dict(v) for v in vehicles]}
+
+    def get_vehicle(self, match, query, body):
+
+        with self.db() as session:
+            vehicle = find_vehicle(session, unquote(match["vehicle"]))
+
+            return HTTPStatus.OK, vehicle_to_dict(vehicle)
+
+    def add_vehicle(self, match, query, body):
+
+        if not isinstance(body, dict) or not body.get("name"):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "The vehicle needs a name")
+
+        values = {k: body[k] for k in VEHICLE_FIELDS[1:] if k in body}
+
+        try:
+            with self.db.begin() as session:
+                vehicle = Vehicle(**values)
+                session.add(vehicle)
+                session.flush()  # get the new id
+
+                result = vehicle_to_dict(vehicle)
+
+        except IntegrityError:
+            raise ApiError(HTTPStatus.CONFLICT, f"{values['name']} already exists")
+
+        return HTTPStatus.CREATED, result
+
+    # ----------------
+    # Fuel
+
+    def add_fuel(self, match, query, body):
+
+        body = body if isinstance(body, list) else [body]
+
+        if not body:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "No fuel records")
+
+        parsed = []
+        errors = []
+
+        for i, record in enumerate(body):
+            try:
+                parsed.append(to_fuel_record(record))
+
+            except RecordError as e:
+                errors.append(f"record {i}: {e}")
+
+        if errors:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "; ".join(errors))
+
+        with self.db.begin() as session:
+            vids = resolve_vehicles(session, list(dict.fromkeys(v for v, _ in parsed)))
+
+            for vehicle, values in parsed:
+                values["vehicle_id"] = vids[vehicle]
+
+            added = BulkWriter(session).add_fuel_records([values for _, values in parsed])
+
+        return HTTPStatus.CREATED, {"added": added}
+
+    # ----------------
+    # Reports
+
+    def report(self, match, query, body):
+
+        vehicles = query.get("vehicle", [])
+
+        if not vehicles:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Specify at least one vehicle")
+
+        try:
+            tail = int(query.get("tail", ["10"])[-1])
+
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "tail must be an integer")
+
+        engine = query.get("engine", ["sql"])[-1]
+
+        if engine not in ("sql", "numpy"):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "engine must be sql or numpy")
+
+        extra_summary = query.get("extra_summary", ["0"])[-1].lower() in ("1", "true", "yes")
+
+        with self.db() as session:
+            resolved = resolve_vehicles(session, vehicles)
+
+            vids = list(dict.fromkeys(resolved.values()))
+
+            selected = {
+                v.vehicle_id: v
+                for v in session.execute(
+                    select(Vehicle).where(Vehicle.vehicle_id.in_(vids))
+                ).scalars()
+            }
+
+            results = cached_reports(
+                session,
+                self.config,
+                vids,
+                tail,
+                extra_summary,
+                engine,
+                use_cache=self.use_cache,
+            )
+
+        reports = []
+
+        for vid in vids:
+            report, summary = results[vid]
+
+            reports.append(
+                {
+                    "vehicle": vehicle_to_dict(selected[vid]),
+                    "records": records(report),
+                    "summary": records(summary),
+                }
+            )
+
+        return HTTPStatus.OK, {"reports": reports}
+
+    # ----------------
+    # Export
+
+    def export(self, match, query, body):
+
+        everything = query.get("all", ["0"])[-1].lower() in ("1", "true", "yes")
+        vehicles = None if everything else query.get("vehicle", [])
+
+        if not everything and not vehicles:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Specify a vehicle or all=1")
+
+        # check the vehicles before the response starts
+        with self.db() as session:
+            _, missing = select_export_vehicles(session, vehicles)
+
+        if missing:
+            raise not_found(missing)
+
+        def stream(wfile):
+            with self.db() as session:
+                export_vehicles(session, vehicles, [JsonLinesSink(wfile)])
+
+        return HTTPStatus.OK, stream
+
+
+class ChunkedWriter:
+    """
+    Write to the response with HTTP/1.1 chunked transfer encoding, one
+    chunk per write.
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data: bytes) -> None:
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def close(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Dispatch the requests to the FuelTrackerAPI of the server. HTTP/1.1
+    keeps the connections of the clients open between requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    # The headers and the body are separate writes, without TCP_NODELAY
+    # keep-alive clients wait for the delayed ACK on every response.
+    disable_nagle_algorithm = True
+
+    server_version = "FuelTracker"
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+
+        if length > MAX_BODY_SIZE:
+            # the body isn't read, the rest of the connection would be
+            # parsed as the next request
+            self.close_connection = True
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "The body is too large")
+
+        if length == 0:
+            return None
+
+        try:
+            return json.loads(self.rfile.read(length))
+
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+
+    def dispatch(self, method: str):
+
+        url = urlsplit(self.path)
+
+        try:
+            body = self.read_body()
+
+            handler, match = self.server.api.route(method, url.path)
+
+            status, payload = handler(match, parse_qs(url.query), body)
+
+        except ApiError as e:
+            status, payload = e.status, {"error": e.message}
+
+        except Exception as e:
+            self.log_error("%s %s failed: %r", method, self.path, e)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+        if callable(payload):
+            self.send_stream(status, payload)
+
+        else:
+            self.send_json(status, payload)
+
+    def send_json(self, status: HTTPStatus, payload) -> None:
+        data = json.dumps(payload, default=str).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+
+        if self.close_connection:
+            self.send_header("Connection", "close")
+
+        self.end_headers()
+
+        self.wfile.write(data)
+
+    def send_stream(self, status: HTTPStatus, stream) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        writer = ChunkedWriter(self.wfile)
+
+        try:
+            stream(writer)
+
+        except Exception as e:
+            # the status was sent, all we can do is drop the connection
+            self.log_error("%s failed while streaming: %r", self.path, e)
+            self.close_connection = True
+            return
+
+        writer.close()
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class FuelTrackerServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server for the FuelTrackerAPI.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], api: FuelTrackerAPI, quiet: bool = False):
+        super().__init__(address, RequestHandler)
+
+        self.api = api
+        self.quiet = quiet
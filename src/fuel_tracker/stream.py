@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   bc2b9616-ca99-11f1-82b1-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+Read a continuous stream of fuel records (NDJSON or CSV) and write them
+to the database in batches. Used by `ft fuel ingest`.
+
+Each record is an object (NDJSON) or a row (CSV, with a header line)
+with the following fields:
+
+- vehicle - the vehicle name or id (`vehicle_id` or `name` also work)
+- fill_date - the date of the fill-up (`date` also works)
+- fuel
+- mileage
+- cost
+- partial - optional
+- comment - optional
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import csv
+import json
+import queue
+import threading
+import time
+
+from datetime import datetime
+from typing import Iterator, TextIO, Union
+
+# ------------
+# 3rd Party - From PyPI
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+# ------------
+# Custom Modules
+
+from .models import Vehicle
+from .writer import BulkWriter
+from .resolver import VehicleResolver, NOT_A_VEHICLE
+from .common import date_format_strings
+
+# -------------
+
+# Sent by the reader thread when the input is exhausted
+_END = object()
+
+
+class RecordError(ValueError):
+    """
+    The record could not be converted to a fuel record.
+    """
+
+
+def read_ndjson(stream: TextIO) -> Iterator[str]:
+    """
+    Yield every non-blank line of the stream. The lines are decoded by
+    `to_fuel_record` so a malformed line only rejects that record.
+    """
+
+    for line in stream:
+        line = line.strip()
+
+        if line:
+            yield line
+
+
+def read_csv(stream: TextIO) -> Iterator[dict]:
+    """
+    Yield a dictionary for every row of the stream. The first line is
+    the header.
+    """
+
+    yield from csv.DictReader(stream)
+
+
+READERS = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+}
+
+
+def parse_date(value) -> datetime:
+    """
+    Parse the date using the same formats as `ft fuel add`. The first
+    format that works is used.
+    """
+
+    value = str(value).strip()
+
+    # accept ISO timestamps, 2021-08-29T10:15:00 or 2021-08-29 10:15:00
+    if len(value) > 10 and value[4:5] == "-":
+        value = value[:10]
+
+    for fmt in date_format_strings:
+        try:
+            return datetime.strptime(value, fmt).date()
+
+        except ValueError:
+            continue
+
+    raise RecordError(f"Invalid date: {value}")
+
+
+def parse_bool(value) -> bool:
+    """
+    Convert the CSV/JSON value to a bool. Empty values are False.
+    """
+
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "t", "yes", "y")
+
+    return bool(value)
+
+
+def to_fuel_record(record) -> tuple[str, dict]:
+    """
+    Given the raw record (a dictionary or a JSON string), return a tuple
+    of the vehicle (name or id) and a dictionary of the FUEL column
+    values.
+
+    Raises a RecordError if the record is invalid.
+    """
+
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+
+        except json.JSONDecodeError as e:
+            raise RecordError(f"Invalid JSON: {e}")
+
+    if not isinstance(record, dict):
+        raise RecordError("The record is not an object")
+
+    vehicle = next(
+        (record[k] for k in ("vehicle", "vehicle_id", "name") if record.get(k) not in (None, "")),
+        None,
+    )
+
+    if vehicle is None:
+        raise RecordError("No vehicle specified")
+
+    fill_date = record.get("fill_date", record.get("date"))
+
+    if fill_date in (None, ""):
+        raise RecordError("No fill_date specified")
+
+    values = {"fill_date": parse_date(fill_date)}
+
+    for key in ("fuel", "mileage", "cost"):
+        try:
+            values[key] = float(record[key])
+
+        except (KeyError, TypeError, ValueError):
+            raise RecordError(f"Invalid {key}: {record.get(key)}")
+
+        if values[key] < 0:
+            raise RecordError(f"Invalid {key}: {record.get(key)}")
+
+    values["partial"] = parse_bool(record.get("partial"))
+    values["comment"] = record.get("comment") or None
+
+    return str(vehicle), values
+
+
+def _read_worker(records: Iterator[Union[dict, str]], items: queue.Queue) -> None:
+    """
+    Runs in a thread. Put every record on the queue as
+    (line, record) or (line, exception) followed by _END. Reading in a
+    thread lets the writer commit on time even when the input is idle.
+    """
+
+    line = 0
+
+    try:
+        for line, record in enumerate(records, start=1):
+            items.put((line, record))
+
+    except Exception as e:
+        items.put((line + 1, e))
+
+    items.put((None, _END))
+
+
+def ingest(
+    db,
+    stream: TextIO,
+    fmt: str = "ndjson",
+    batch_size: int = 1000,
+    interval: float = 1.0,
+    on_error=None,
+    on_commit=None,
+) -> tuple[int, int]:
+    """
+    Read the fuel records from the stream and write them to the
+    database. The pending records are committed when there are
+    `batch_size` of them or `interval` seconds after the first one
+    arrived, whichever comes first.
+
+    `on_error(line, message)` is called for every rejected record and
+    `on_commit(count)` after every commit.
+
+    The vehicles are resolved with a cache that is cleared after every
+    commit and every miss, a vehicle added (or deleted) while the stream
+    is running is seen by the next record (or batch). If a vehicle is deleted before its records
+    are committed, those records are rejected and the rest of the batch
+    is committed.
+
+    Returns a tuple of the number of records added and rejected.
+    """
+
+    items = queue.Queue(maxsize=4 * batch_size)
+
+    reader = threading.Thread(
+        target=_read_worker,
+        args=(READERS[fmt](stream), items),
+        daemon=True,
+    )
+    reader.start()
+
+    vehicles = VehicleResolver()
+
+    # (line, vehicle, values) of the records waiting to be committed
+    pending = []
+    deadline = None
+
+    added = 0
+    rejected = 0
+
+    def reject(line, message):
+        nonlocal rejected
+
+        rejected += 1
+
+        if on_error:
+            on_error(line, message)
+
+    def commit():
+        nonlocal pending, deadline, added
+
+        while pending:
+            try:
+                with db.begin() as session:
+                    BulkWriter(session, batch_size=batch_size).add_fuel_records(
+                        [values for _, _, values in pending]
+                    )
+
+            except IntegrityError:
+                # a vehicle was deleted after it was resolved, reject its
+                # records and try the rest again
+                with db() as session:
+                    existing = set(
+                        session.execute(
+                            select(Vehicle.vehicle_id).where(
+                                Vehicle.vehicle_id.in_({v["vehicle_id"] for _, _, v in pending})
+                            )
+                        ).scalars()
+                    )
+
+                remaining = [p for p in pending if p[2]["vehicle_id"] in existing]
+
+                if len(remaining) == len(pending):
+                    raise
+
+                for line, vehicle, values in pending:
+                    if values["vehicle_id"] not in existing:
+                        reject(line, f"{vehicle} {NOT_A_VEHICLE}")
+
+                pending = remaining
+                continue
+
+            added += len(pending)
+
+            if on_commit:
+                on_commit(len(pending))
+
+            break
+
+        pending = []
+        deadline = None
+
+        vehicles.clear()
+
+    while True:
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        try:
+            line, record = items.get(timeout=timeout)
+
+        except queue.Empty:
+            commit()
+            continue
+
+        if record is _END:
+            break
+
+        try:
+            if isinstance(record, Exception):
+                raise RecordError(str(record))
+
+            vehicle, values = to_fuel_record(record)
+            # the session only connects if the vehicle isn't cached
+            with db() as session:
+                vid, reason = vehicles.resolve_one(session, vehicle)
+
+            if vid is None:
+                # don't remember the miss, the vehicle may be added
+                vehicles.clear()
+
+                raise RecordError(f"{vehicle} {reason}")
+
+        except RecordError as e:
+            reject(line, str(e))
+            continue
+
+        values["vehicle_id"] = vid
+        pending.append((line, vehicle, values))
+
+        if deadline is None:
+            deadline = time.monotonic() + interval
+
+        if len(pending) >= batch_size:
+            commit()
+
+    commit()
+
+    return added, rejected
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   5e760e12-ca98-11f1-8f3a-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+A high-throughput writer for the VEHICLE and FUEL tables. It bypasses
+the ORM unit-of-work and issues Core `INSERT` statements as executemany
+batches, using `RETURNING` to recover the new vehicle ids.
+
+Every fuel record written is given its content hash (see
+`models.content_hash`), `match_fuel_records` uses it to find the records
+that are already in the database.
+
+Reference:
+- https://docs.sqlalchemy.org/en/20/core/connections.html#engine-insertmanyvalues
+- https://docs.sqlalchemy.org/en/20/faq/performance.html#i-m-inserting-400-000-rows-with-the-orm-and-it-s-really-slow
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import json
+
+from typing import Iterable
+
+# ------------
+# 3rd Party - From PyPI
+
+from sqlalchemy import select, insert, update, bindparam, func
+
+# ------------
+# Custom Modules
+
+from .models import Vehicle, FuelRecord, CONTENT_COLUMNS, content_hash
+
+# -------------
+
+DEFAULT_BATCH_SIZE = 5_000
+
+# The status of each record given to `match_fuel_records`
+ADDED = "added"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+
+
+class BulkWriter:
+    """
+    Write vehicles and fuel records to the database using Core inserts.
+
+    The writer works within the transaction of the session it is given,
+    it never commits. Vehicle names are cached (name -> vehicle_id) so a
+    vehicle is only looked up or created once per writer.
+
+    # Usage
+
+    with config["db"].begin() as session:
+        writer = BulkWriter(session)
+        vid = writer.add_vehicle({"name": "passat", ...})
+        writer.add_fuel_records([{"vehicle_id": vid, ...}, ...])
+    """
+
+    def __init__(self, session, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.session = session
+        self.batch_size = batch_size
+
+        self.vehicles = {}
+        self.records_written = 0
+
+    def add_vehicles(self, vehicles: list[dict]) -> list[int]:
+        """
+        Insert the vehicles (dictionaries of VEHICLE column values) and
+        return the new vehicle ids in the same order. The names must not
+        already exist in the database.
+        """
+
+        table = Vehicle.__table__
+
+        statement = insert(table).returning(
+            table.c.vehicle_id,
+            table.c.name,
+            sort_by_parameter_order=True,
+        )
+
+        ids = []
+
+        for start in range(0, len(vehicles), self.batch_size):
+            batch = vehicles[start : start + self.batch_size]
+
+            for vid, name in self.session.execute(statement, batch):
+                self.vehicles[name] = vid
+                ids.append(vid)
+
+        return ids
+
+    def add_vehicle(self, values: dict) -> int:
+        """
+        Insert a single vehicle and return its vehicle_id.
+        """
+
+        return self.add_vehicles([values])[0]
+
+    def resolve_vehicles(self, vehicles: Iterable[dict]) -> dict:
+        """
+        Given an iterable of vehicle dictionaries, return a dictionary
+        mapping the vehicle name to the vehicle_id. Vehicles are matched
+        by name, any that do not exist are created. Uncached names are
+        looked up with one `IN` query and the missing ones are created
+        with one batched insert.
+        """
+
+        missing = {}
+
+        for values in vehicles:
+            if values["name"] not in self.vehicles:
+                missing.setdefault(values["name"], values)
+
+        if missing:
+
+            table = Vehicle.__table__
+            names = list(missing)
+
+            for start in range(0, len(names), self.batch_size):
+                result = self.session.execute(
+                    select(table.c.name, table.c.vehicle_id).where(
+                        table.c.name.in_(names[start : start + self.batch_size])
+                    )
+                )
+
+                self.vehicles.update(result.tuples().all())
+
+            new_vehicles = [v for k, v in missing.items() if k not in self.vehicles]
+
+            if new_vehicles:
+                self.add_vehicles(new_vehicles)
+
+        return self.vehicles
+
+    def add_fuel_records(self, records: list[dict]) -> int:
+        """
+        Insert the fuel records (dictionaries of FUEL column values
+        including the vehicle_id) in executemany batches. Every record
+        in a batch must have the same keys. The content_hash is added to
+        the records that don't have one.
+
+        Returns the number of records written.
+        """
+
+        table = FuelRecord.__table__
+
+        set_content_hashes(records)
+
+        for start in range(0, len(records), self.batch_size):
+            self.session.execute(
+                insert(table),
+                records[start : start + self.batch_size],
+            )
+
+        self.records_written += len(records)
+
+        return len(records)
+
+    def update_fuel_records(self, records: list[dict]) -> int:
+        """
+        Update the fuel records (dictionaries of FUEL column values
+        including the fuel_id) in executemany batches. Every record must
+        have the same keys. The content_hash is added to the records
+        that don't have one.
+
+        Returns the number of records updated.
+        """
+
+        if not records:
+            return 0
+
+        table = FuelRecord.__table__
+
+        set_content_hashes(records)
+
+        columns = [c for c in records[0] if c != "fuel_id"]
+
+        statement = (
+            update(table)
+            .where(table.c.fuel_id == bindparam("b_fuel_id"))
+            .values({c: bindparam(c) for c in columns})
+        )
+
+        for start in range(0, len(records), self.batch_size):
+            self.session.execute(
+                statement,
+                [
+                    {"b_fuel_id": r["fuel_id"], **{c: r[c] for c in columns}}
+                    for r in records[start : start + self.batch_size]
+                ],
+            )
+
+        return len(records)
+
+    def match_fuel_records(self, keys: list[tuple]) -> list[str]:
+        """
+        Given the (fuel_id, vehicle_id, content_hash) of fuel records,
+        return the status of each one against the database:
+
+        - UNCHANGED - it is in the database
+        - UPDATED - the fuel_id is in the database with a different
+          content, the record should be updated
+        - ADDED - it isn't in the database, it should be inserted
+
+        The fuel_id (it can be None) is a surrogate key, a record is
+        only that fuel record if the fuel_id is in the database for the
+        same vehicle. The others are matched by their content hash
+        within their vehicle (ix_fuel_vehicle_content_hash). Only the
+        keys are read, the records are never loaded.
+
+        Reference:
+        - https://www.sqlite.org/json1.html#jeach
+        """
+
+        table = FuelRecord.__table__
+
+        # The keys are sent as one JSON array parameter and read with
+        # json_each, instead of a bound parameter per value.
+        values = func.json_each(bindparam("values")).table_valued("value")
+
+        # fuel_id -> (vehicle_id, content_hash) of the records in the
+        # database
+        existing = {}
+
+        fuel_ids = [fid for fid, _, _ in keys if fid is not None]
+
+        if fuel_ids:
+            result = self.session.execute(
+                select(table.c.fuel_id, table.c.vehicle_id, table.c.content_hash).where(
+                    table.c.fuel_id.in_(select(values.c.value))
+                ),
+                {"values": json.dumps(fuel_ids)},
+            )
+
+            existing.update((fid, (vid, h)) for fid, vid, h in result.all())
+
+        def same_vehicle(fid, vid):
+            return fid in existing and existing[fid][0] == vid
+
+        # vehicle_id -> the content hashes to look for
+        unmatched = {}
+
+        for fid, vid, h in keys:
+            if not same_vehicle(fid, vid):
+                unmatched.setdefault(vid, set()).add(h)
+
+        # (vehicle_id, content_hash) of the records in the database
+        known = set()
+
+        statement = select(table.c.content_hash).where(
+            table.c.vehicle_id == bindparam("vehicle_id"),
+            table.c.content_hash.in_(select(values.c.value)),
+        )
+
+        for vid, hashes in unmatched.items():
+            result = self.session.execute(
+                statement,
+                {"vehicle_id": vid, "values": json.dumps(list(hashes))},
+            )
+
+            known.update((vid, h) for h in result.scalars().all())
+
+        statuses = []
+
+        for fid, vid, h in keys:
+            if same_vehicle(fid, vid):
+                statuses.append(UNCHANGED if existing[fid][1] == h else UPDATED)
+
+            else:
+                statuses.append(UNCHANGED if (vid, h) in known else ADDED)
+
+        return statuses
+
+
+def set_content_hashes(records: Iterable[dict]) -> None:
+    """
+    Add the content_hash to the fuel records that don't have one.
+    """
+
+    for record in records:
+        if "content_hash" not in record:
+            record["content_hash"] = content_hash(*(record.get(c) for c in CONTENT_COLUMNS))
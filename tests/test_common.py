@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   8d24f1b6-cb4f-11f1-8d1a-02fc00000002
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+The vehicle arguments that are parsed as ids. Integers that can't be
+bound as a SQLite INTEGER are names.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+# ------------
+# 3rd Party - From PyPI
+
+import pytest
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.common import parse_int
+
+# -------------
+
+
+@pytest.mark.parametrize(
+    "s, expected",
+    [
+        ("4", 4),
+        ("4.0", 4),
+        ("1e3", 1000),
+        ("-1", -1),
+        ("9223372036854775807", 2**63 - 1),
+        ("-9223372036854775808", -(2**63)),
+        ("9223372036854775808", None),
+        ("99999999999999999999", None),
+        ("-99999999999999999999", None),
+        ("1e30", None),
+        ("4.5", None),
+        ("inf", None),
+        ("nan", None),
+        ("passat", None),
+    ],
+)
+def test_parse_int(s, expected):
+    assert parse_int(s) == expected
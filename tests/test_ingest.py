@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   0b7e3c52-cb4e-11f1-8d1a-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+The spreadsheets written by `ft bulk export` can be imported again with
+`ft bulk add --stream` and `--incremental`.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+from collections import Counter
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import pandas as pd
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+from fuel_tracker.ingest import stream_add, read_chunks, FUEL_COLUMNS
+from fuel_tracker.export import export_vehicles, XlsxSink
+from fuel_tracker.writer import UNCHANGED
+
+# -------------
+
+DATA = Path(__file__).parent.parent / "data"
+
+
+def test_xlsx_export_round_trip(tmp_path):
+    sheet = DATA / "data_passat.csv"
+
+    db = get_session(tmp_path / "fuel.db")
+
+    try:
+        with db.begin() as session:
+            stream_add(session, sheet)
+
+        path = tmp_path / "passat.xlsx"
+
+        with db() as session:
+            export_vehicles(session, None, [XlsxSink(path)])
+
+        expected = pd.concat(read_chunks(sheet), ignore_index=True)
+
+        # The exported workbook doesn't have a dimension, the rows
+        # without a comment are shorter than the header. With small
+        # chunks some chunks only have short rows.
+        exported = pd.concat(read_chunks(path, chunk_size=5), ignore_index=True)
+
+        # the export is in fill_date order
+        def by_fuel_id(df):
+            return df[FUEL_COLUMNS].sort_values("fuel_id", ignore_index=True)
+
+        pd.testing.assert_frame_equal(
+            by_fuel_id(exported),
+            by_fuel_id(expected),
+            check_dtype=False,
+        )
+
+        with db() as session:
+            added = stream_add(session, path, chunk_size=5, incremental=True)
+
+        _, statuses = added["passat"]
+
+        assert statuses == Counter({UNCHANGED: len(expected)})
+
+    finally:
+        db.kw["bind"].dispose()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   8d24f1b6-cb4f-11f1-8d1a-02fc00000003
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+The numpy report rounds its ratios the same way as SQLite `ROUND()`,
+ties are rounded away from zero.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import json
+import sqlite3
+
+# ------------
+# 3rd Party - From PyPI
+
+import numpy as np
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.metrics import round_half_away
+
+# -------------
+
+
+def sqlite_round(values: np.ndarray, decimals: int = 3) -> np.ndarray:
+    connection = sqlite3.connect(":memory:")
+
+    try:
+        rows = connection.execute(
+            "SELECT ROUND(value, ?) FROM json_each(?)",
+            (decimals, json.dumps(values.tolist())),
+        )
+
+        return np.array([value for (value,) in rows])
+
+    finally:
+        connection.close()
+
+
+def test_ties_round_away_from_zero():
+    values = np.array([0.0125, -0.0125, 1.0005, 6.0725, 32.7405, -64.2515, 0.0])
+
+    expected = np.array([0.013, -0.013, 1.001, 6.073, 32.741, -64.252, 0.0])
+
+    assert np.array_equal(round_half_away(values), expected)
+
+
+def test_nan_is_kept():
+    assert np.isnan(round_half_away(np.array([np.nan]))).all()
+
+
+def test_round_matches_sqlite():
+    rng = np.random.default_rng(0)
+
+    values = np.concatenate(
+        [
+            # every value is a tie at 3 decimals
+            rng.uniform(-1000, 1000, 20000).round(3) + np.sign(rng.uniform(-1, 1, 20000)) * 0.0005,
+            rng.uniform(-1000, 1000, 20000).round(4),
+            rng.uniform(1, 20, 20000) / rng.uniform(0.1, 3, 20000),
+        ]
+    )
+
+    assert np.array_equal(round_half_away(values), sqlite_round(values))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   8d24f1b6-cb4f-11f1-8d1a-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+The partial-fill aware fuel economy of `ft report show` against a
+straightforward reference calculation. The bundled data/*.csv sets are
+imported into a temporary database (the same way as `ft bulk add`) and
+the l/100km, mpg (us) and mpg (imp) columns of the report engines are
+compared, record by record, with a Python loop that carries the fuel
+and mileage of partial fill-ups forward to the next full tank.
+
+The bundled partial fill-ups are checked and synthetic patterns (every
+n-th record marked partial) on top of the bundled data, including
+partial fill-ups at the start and the end of a history.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+import math
+
+from pathlib import Path
+
+# ------------
+# 3rd Party - From PyPI
+
+import pandas as pd
+import pytest
+
+from sqlalchemy import update
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session, FuelRecord
+from fuel_tracker.ingest import stream_add
+from fuel_tracker.queries import vehicle_report, vehicles_report
+from fuel_tracker import metrics
+
+# -------------
+
+DATA = Path(__file__).parent.parent / "data"
+
+ECONOMY_COLUMNS = ["l_per_100km", "mpg_us", "mpg_imp"]
+
+
+def sql_report(session, vids) -> pd.DataFrame:
+    return pd.read_sql(vehicles_report(vids, -1), session.connection())
+
+
+def numpy_report(session, vids) -> pd.DataFrame:
+    return metrics.vehicles_report(session, vids, -1)
+
+
+def sql_vehicle_report(session, vids) -> pd.DataFrame:
+    """
+    `queries.vehicle_report` is calculated newest first, it is reversed
+    to compare it with the history.
+    """
+
+    return pd.concat(
+        [
+            pd.read_sql(vehicle_report(vid, -1), session.connection()).iloc[::-1]
+            for vid in vids
+        ],
+        ignore_index=True,
+    )
+
+
+ENGINES = {
+    "sql": sql_report,
+    "numpy": numpy_report,
+    "sql (vehicle_report)": sql_vehicle_report,
+}
+
+
+def reference_economy(records: list[dict]) -> list[tuple]:
+    """
+    The economy of one vehicle, calculated one record at a time. The
+    records are in fill_date order. Returns a tuple of (l_per_100km,
+    mpg_us, mpg_imp) per record, None for partial fill-ups.
+    """
+
+    economy = []
+
+    fuel = 0.0
+    mileage = 0.0
+
+    for record in records:
+        fuel += record["fuel"] or 0.0
+        mileage += record["mileage"] or 0.0
+
+        if record["partial"]:
+            economy.append((None, None, None))
+            continue
+
+        miles = mileage * metrics.MILES_PER_KM
+
+        economy.append(
+            (
+                round(100 * fuel / mileage, 3),
+                round(miles / (fuel * metrics.US_GALLONS_PER_LITER), 3),
+                round(miles / (fuel * metrics.IMP_GALLONS_PER_LITER), 3),
+            )
+        )
+
+        fuel = 0.0
+        mileage = 0.0
+
+    return economy
+
+
+def same(expected, actual) -> bool:
+    """
+    Compare a reference value with a report value (NaN or None is a
+    partial fill-up).
+    """
+
+    if expected is None:
+        return actual is None or math.isnan(actual)
+
+    return math.isclose(expected, actual, abs_tol=1e-3)
+
+
+def mark_partial(session, vids: list[int], every: int) -> None:
+    """
+    Mark every n-th record of the history partial, and the last record
+    of each vehicle.
+    """
+
+    rows = session.execute(metrics.history_statement(vids)).all()
+
+    last = {row.vehicle_id: row.fuel_id for row in rows}
+
+    partial = [
+        row.fuel_id
+        for i, row in enumerate(rows)
+        if i % every == 0 or last[row.vehicle_id] == row.fuel_id
+    ]
+
+    session.execute(
+        update(FuelRecord)
+        .where(FuelRecord.fuel_id.in_(partial))
+        .values(partial=True)
+    )
+
+
+@pytest.fixture(scope="module")
+def fleet(tmp_path_factory):
+    """
+    The sessionmaker of a database with the bundled data/*.csv sets and
+    their vehicle ids.
+    """
+
+    db = get_session(tmp_path_factory.mktemp("economy") / "economy.db")
+
+    with db.begin() as session:
+        vehicles = {}
+
+        for path in sorted(DATA.glob("*.csv")):
+            vehicles.update(stream_add(session, path))
+
+    yield db, sorted(vid for vid, _ in vehicles.values())
+
+    db.kw["bind"].dispose()
+
+
+@pytest.mark.parametrize("every", [None, 2, 3, 4])
+@pytest.mark.parametrize("engine", ENGINES)
+def test_partial_economy(fleet, engine, every):
+    db, vids = fleet
+
+    # the synthetic partial fill-ups are rolled back
+    with db() as session:
+        if every is not None:
+            mark_partial(session, vids, every)
+
+        rows = session.execute(metrics.history_statement(vids)).mappings().all()
+
+        assert any(row["partial"] for row in rows)
+
+        expected = []
+
+        for vid in vids:
+            expected.extend(reference_economy([r for r in rows if r["vehicle_id"] == vid]))
+
+        df = ENGINES[engine](session, vids)
+
+        session.rollback()
+
+    assert len(df) == len(rows)
+
+    differences = [
+        (row["fuel_id"], column, e, a)
+        for row, reference, values in zip(rows, expected, df[ECONOMY_COLUMNS].itertuples(index=False))
+        for column, e, a in zip(ECONOMY_COLUMNS, reference, values)
+        if not same(e, a)
+    ]
+
+    assert differences == []
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+# -----------
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2021 Troy Williams
+
+# uuid:   5c1a9e70-cb4f-11f1-8d1a-02fc00000001
+# author: Troy Williams
+# email:  troy.williams@bluebill.net
+# date:   2026-10-18
+# -----------
+
+"""
+The report queries are answered from the covering indexes on the FUEL
+table. None of their `EXPLAIN QUERY PLAN` steps may scan a table or
+sort in a temporary B-tree.
+"""
+
+# ------------
+# System Modules - Included with Python
+
+from datetime import date, timedelta
+
+# ------------
+# 3rd Party - From PyPI
+
+import pytest
+
+# ------------
+# Custom Modules
+
+from fuel_tracker.models import get_session
+from fuel_tracker.writer import BulkWriter
+from fuel_tracker.queries import (
+    vehicle_report,
+    vehicle_report_summary,
+    vehicles_report,
+    vehicles_report_summary,
+    explain_query_plan,
+)
+from fuel_tracker.export import export_statement
+
+# -------------
+
+STATEMENTS = {
+    "vehicle_report": lambda: vehicle_report(1, 10),
+    "vehicle_report (all)": lambda: vehicle_report(1, -1),
+    "vehicle_report_summary": lambda: vehicle_report_summary(1),
+    "vehicle_report_summary (extra)": lambda: vehicle_report_summary(1, include_optional=True),
+    "vehicles_report": lambda: vehicles_report([1, 2, 3], 10),
+    "vehicles_report (all)": lambda: vehicles_report([1, 2, 3], -1),
+    "vehicles_report_summary": lambda: vehicles_report_summary([1, 2, 3]),
+    "export_statement": lambda: export_statement([1, 3]),
+    "export_statement (all)": lambda: export_statement(None),
+}
+
+
+def is_slow(step: str) -> bool:
+    """
+    Does the query plan step scan a whole table or sort?
+    """
+
+    return step.startswith(("SCAN FUEL", "SCAN VEHICLE")) or "TEMP B-TREE" in step
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    """
+    A database of 3 vehicles with 100 fuel records each, analyzed so the
+    planner has statistics to work with.
+    """
+
+    db = get_session(tmp_path_factory.mktemp("plans") / "plans.db")
+
+    with db.begin() as session:
+        writer = BulkWriter(session)
+
+        for i in range(3):
+            vid = writer.add_vehicle({"name": f"vehicle-{i}"})
+
+            writer.add_fuel_records(
+                [
+                    {
+                        "vehicle_id": vid,
+                        "fill_date": date(2020, 1, 1) + timedelta(days=7 * n),
+                        "mileage": 500.0,
+                        "fuel": 40.0,
+                        "cost": 50.0,
+                    }
+                    for n in range(100)
+                ]
+            )
+
+        session.connection().exec_driver_sql("ANALYZE")
+
+    yield db
+
+    db.kw["bind"].dispose()
+
+
+@pytest.mark.parametrize("label", STATEMENTS)
+def test_report_query_uses_covering_indexes(db, label):
+
+    with db() as session:
+        steps = explain_query_plan(session, STATEMENTS[label]())
+
+    assert [step for step in steps if is_slow(step)] == [], "\n".join(steps)